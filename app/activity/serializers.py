@@ -1,10 +1,13 @@
 """Serializers for Activity API"""
 
 from rest_framework import serializers
+from core.fields import TenthsModelSerializerMixin
 from core.models import Activity
 
 
-class ActivitySerializer(serializers.ModelSerializer):
+class ActivitySerializer(
+    TenthsModelSerializerMixin, serializers.ModelSerializer,
+):
     """Serializer for activities"""
 
     class Meta:
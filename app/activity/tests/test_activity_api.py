@@ -80,7 +80,7 @@ class PrivateActivityAPITests(TestCase):
         """Test create an activity"""
         payload = {
             "title": "Alergare",
-            "met": Decimal('2.4'),
+            "met": 2.4,
         }
         res = self.client.post(ACTIVITIES_URL, payload)
 
@@ -92,7 +92,7 @@ class PrivateActivityAPITests(TestCase):
 
     def test_partial_update(self):
         """Test update of a activity"""
-        original_met = Decimal('4.3')
+        original_met = 4.3
         activity = create_activity(
             user=self.user,
             title='Aerobic',
@@ -122,7 +122,7 @@ class PrivateActivityAPITests(TestCase):
 
         payload = {
             'title': 'Plimbare',
-            'met': Decimal('2.7'),
+            'met': 2.7,
         }
         url = detail_url(activity.id)
         res = self.client.put(url, payload)
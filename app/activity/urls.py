@@ -17,4 +17,14 @@ app_name = 'activity'
 
 urlpatterns = [
     path('', include(router.urls)),
+    path(
+        'async/activities/',
+        views.ActivityAsyncView.as_view(),
+        name='async-activity-list',
+    ),
+    path(
+        'async/activities/<int:pk>/',
+        views.ActivityAsyncView.as_view(),
+        name='async-activity-detail',
+    ),
 ]
@@ -1,21 +1,32 @@
 """Views for Activity API"""
 
 from rest_framework import viewsets
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
 from auth import custom_permissions
+from auth.authentication import (
+    ExpiringTokenAuthentication,
+    SignedTokenAuthentication,
+)
+from auth.throttling import WriteThrottle
 
+from core.async_views import AsyncCatalogView
+from core.batch import BatchRetrieveMixin
 from core.models import Activity
 from activity import serializers
 
 
-class ActivityViewSet(viewsets.ModelViewSet):
+class ActivityViewSet(BatchRetrieveMixin, viewsets.ModelViewSet):
     """View for managing activity APIs"""
     serializer_class = serializers.ActivitySerializer
     queryset = Activity.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [
+        ExpiringTokenAuthentication,
+        SignedTokenAuthentication,
+    ]
     permission_classes = [custom_permissions.UserPermission]
+    throttle_classes = [WriteThrottle]
+    throttle_scope = 'write'
 
     def get_queryset(self):
         """Retrieve activities"""
@@ -24,3 +35,9 @@ class ActivityViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         """Create a new activity"""
         serializer.save(user=self.request.user)
+
+
+class ActivityAsyncView(AsyncCatalogView):
+    """Async list and detail view for activities"""
+    model = Activity
+    serializer_class = serializers.ActivitySerializer
@@ -0,0 +1,9 @@
+"""Admin URL configuration, imported on first use of the admin urls"""
+from django.contrib import admin
+
+admin.autodiscover()
+
+admin.site.site_header = 'NutriGest'
+admin.site.index_title = 'Dashboard'
+
+urlpatterns, app_name, _ = admin.site.urls
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import datetime
 import os
 from pathlib import Path
 from rest_framework.settings import api_settings
@@ -33,7 +34,9 @@ ALLOWED_HOSTS = []
 # Application definition
 
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    # the admin modules of the apps are discovered by app.admin_urls on
+    # first use, django.contrib.admin itself is still imported at boot
+    'django.contrib.admin.apps.SimpleAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -50,6 +53,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -90,10 +94,33 @@ DATABASES = {
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        # keep connections open between requests of a worker
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+# state shared by the workers (rate limits, counters) needs redis,
+# the local memory cache is only shared by the threads of a process
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -113,6 +140,32 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# https://docs.djangoproject.com/en/4.2/topics/auth/passwords/
+
+# the first hasher is used for new passwords, hashes made by the others
+# are upgraded on the next successful login
+PASSWORD_HASHERS = [
+    'core.hashers.BoundedArgon2PasswordHasher',
+    'core.hashers.BoundedPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+ARGON2_TIME_COST = int(os.environ.get('ARGON2_TIME_COST', 2))
+ARGON2_MEMORY_COST = int(os.environ.get('ARGON2_MEMORY_COST', 19456))
+ARGON2_PARALLELISM = int(os.environ.get('ARGON2_PARALLELISM', 1))
+
+# hashing threads per process and hashes allowed to wait for one
+PASSWORD_HASHING_MAX_WORKERS = int(
+    os.environ.get('PASSWORD_HASHING_MAX_WORKERS', 1)
+)
+PASSWORD_HASHING_MAX_QUEUE = int(
+    os.environ.get('PASSWORD_HASHING_MAX_QUEUE', 8)
+)
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/3.2/topics/i18n/
 
@@ -137,6 +190,88 @@ MEDIA_URL = '/static/media/'
 MEDIA_ROOT = '/vol/web/media'
 STATIC_ROOT = '/vol/web/static'
 
+# Uploads are hashed while they are received for content addressed storage
+FILE_UPLOAD_HANDLERS = [
+    'core.storage.HashingMemoryFileUploadHandler',
+    'core.storage.HashingTemporaryFileUploadHandler',
+]
+# Uploads above this size are streamed to a temporary file
+FILE_UPLOAD_MAX_MEMORY_SIZE = 512 * 1024
+
+# Limits checked from the image header before any pixel is decoded,
+# larger images are stored downscaled to IMAGE_MAX_SIDE
+IMAGE_UPLOAD_MAX_BYTES = 20 * 1024 * 1024
+IMAGE_UPLOAD_MAX_PIXELS = 25_000_000
+IMAGE_UPLOAD_FORMATS = ['JPEG', 'PNG', 'WEBP']
+IMAGE_MAX_SIDE = 2048
+
+# Hand media transfers to the web server: 'nginx' for X-Accel-Redirect to
+# MEDIA_SENDFILE_PREFIX, 'apache' for X-Sendfile, empty to serve from Django
+MEDIA_SENDFILE = os.environ.get('MEDIA_SENDFILE', '')
+MEDIA_SENDFILE_PREFIX = os.environ.get(
+    'MEDIA_SENDFILE_PREFIX', '/protected-media/'
+)
+
+# Food uses are flushed to the database at most once per interval (seconds)
+# and decay with the half-life, TRENDING_SIZE foods are listed as trending.
+# Scores grow with 2 ** (half-lives since the epoch), the first epoch is
+# TRENDING_EPOCH and it is moved to the present, rescaling the scores, once
+# it is TRENDING_RENORMALIZE_AFTER half-lives old.
+TRENDING_EPOCH = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+TRENDING_HALF_LIFE = datetime.timedelta(days=7)
+TRENDING_RENORMALIZE_AFTER = 64
+TRENDING_FLUSH_INTERVAL = float(
+    os.environ.get('TRENDING_FLUSH_INTERVAL', 30)
+)
+TRENDING_SIZE = 20
+
+# Quick add lists: RECENT_SIZE foods and recipes are kept per user in the
+# cache and saved every RECENT_SAVE_EVERY uses, RECENT_LIST_SIZE are listed
+RECENT_SIZE = 50
+RECENT_LIST_SIZE = 10
+RECENT_SAVE_EVERY = 10
+RECENT_CACHE_TTL = 30 * 24 * 3600
+
+# Seconds barcode lookups are cached, codes of no food for a shorter time
+BARCODE_CACHE_TTL = 24 * 3600
+BARCODE_MISS_TTL = 300
+
+# Catalog changes are listed once they are this many seconds old, so changes
+# of transactions committing late are not skipped, at most a page at a time
+CHANGES_SETTLE_SECONDS = 5
+CHANGES_PAGE_SIZE = 500
+
+# The dashboard runs its independent queries on DASHBOARD_WORKERS threads per
+# process, each on a connection closed afterwards, and suggests
+# DASHBOARD_SUGGESTIONS activities
+DASHBOARD_WORKERS = int(os.environ.get('DASHBOARD_WORKERS', 4))
+DASHBOARD_SUGGESTIONS = 3
+
+# Catalog objects fetched by id in one request at most
+BATCH_MAX_IDS = 100
+
+# Catalog snapshots are written to SNAPSHOT_DIR under MEDIA_ROOT, the newest
+# SNAPSHOT_KEEP are kept so interrupted downloads can resume. Requests rebuild
+# a stale snapshot at most once per SNAPSHOT_REBUILD_INTERVAL seconds
+SNAPSHOT_DIR = 'snapshots'
+SNAPSHOT_KEEP = 2
+SNAPSHOT_BUILD_TIMEOUT = 600
+SNAPSHOT_REBUILD_INTERVAL = int(
+    os.environ.get('SNAPSHOT_REBUILD_INTERVAL', 3600)
+)
+
+# Admin changelists of unfiltered tables with at least this many rows show
+# the planner's estimate instead of running COUNT(*)
+ADMIN_ESTIMATE_COUNT = 100_000
+
+# /metrics answers scrapers from these networks and staff users only
+METRICS_ALLOWED_NETWORKS = os.environ.get(
+    'METRICS_ALLOWED_NETWORKS', '127.0.0.1/32,::1/128',
+).split(',')
+
+# Seconds /readyz answers from memory before pinging the databases again
+READINESS_TTL = float(os.environ.get('READINESS_TTL', 1))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -147,10 +282,44 @@ AUTH_USER_MODEL = 'core.User'
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'COERCE_DECIMAL_TO_STRING': False,
+    # proxies in front of the app appending to X-Forwarded-For, the client
+    # IP of rate limits is REMOTE_ADDR unless a proxy count is set
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
     # 'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     # 'PAGE_SIZE': 100,
 }
 
 SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True,
+    # also used by the schema views, the spectacular command and its check
+    'DEFAULT_GENERATOR_CLASS': 'auth.schema.SchemaGenerator',
+}
+
+# Schema written by the build_schema command, served instead of
+# generating it on the first request of every process
+OPENAPI_SCHEMA_FILE = os.environ.get(
+    'OPENAPI_SCHEMA_FILE', os.path.join(BASE_DIR, 'openapi.json')
+)
+
+# Lifetime of auth tokens, with sliding renewal a token in use is
+# extended once less than half of its lifetime is left
+AUTH_TOKEN_TTL = datetime.timedelta(
+    days=int(os.environ.get('AUTH_TOKEN_TTL_DAYS', 30))
+)
+AUTH_TOKEN_SLIDING = True
+
+# Issue short lived signed access tokens next to the auth token, they are
+# verified without any database access and renewed with the auth token
+AUTH_SIGNED_TOKENS = os.environ.get('AUTH_SIGNED_TOKENS', '') == '1'
+AUTH_ACCESS_TOKEN_TTL = datetime.timedelta(
+    minutes=int(os.environ.get('AUTH_ACCESS_TOKEN_TTL_MINUTES', 15))
+)
+
+# Requests allowed per client for each throttle scope, a client is
+# identified by its IP, the email it logs in with or its auth token
+RATE_LIMITS = {
+    'login': {'ip': '30/min', 'email': '10/min'},
+    'signup': {'ip': '20/hour'},
+    'refresh': {'ip': '60/min'},
+    'write': {'token': '120/min'},
 }
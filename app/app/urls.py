@@ -13,34 +13,49 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularSwaggerView,
-)
-from django.contrib import admin
-from django.urls import path, include
-from django.conf.urls.static import static
+from django.urls import path, include, URLResolver
+from django.urls.resolvers import RoutePattern
 from django.conf import settings
 
-admin.site.site_header = 'NutriGest'
-admin.site.index_title = 'Dashboard'
+from core.views import (
+    ChangesView,
+    docs_view,
+    healthz_view,
+    media_view,
+    metrics_view,
+    readyz_view,
+    schema_view,
+    SnapshotView,
+)
+from user.views import DashboardView
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
-    path('api/schema/', SpectacularAPIView.as_view(), name='api-schema'),
-    path(
-        'api/docs/',
-        SpectacularSwaggerView.as_view(url_name='api-schema'),
-        name='api-docs'
+    # a dotted path defers importing the admin until its urls are used
+    URLResolver(
+        RoutePattern('admin/', is_endpoint=False),
+        'app.admin_urls',
+        app_name='admin',
+        namespace='admin',
     ),
+    path('api/schema/', schema_view, name='api-schema'),
+    path('api/docs/', docs_view, name='api-docs'),
     path('api/user/', include('user.urls')),
     path('api/recipe/', include('recipe.urls')),
     path('api/food/', include('food.urls')),
     path('api/activity/', include('activity.urls')),
+    path('api/changes/', ChangesView.as_view(), name='changes'),
+    path('api/dashboard/', DashboardView.as_view(), name='dashboard'),
+    path(
+        'api/catalog/snapshot/',
+        SnapshotView.as_view(),
+        name='catalog-snapshot',
+    ),
+    path('metrics', metrics_view, name='metrics'),
+    path('healthz', healthz_view, name='healthz'),
+    path('readyz', readyz_view, name='readyz'),
+    path(
+        settings.MEDIA_URL.lstrip('/') + '<path:path>',
+        media_view,
+        name='media',
+    ),
 ]
-
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL,
-        document_root=settings.MEDIA_ROOT
-    )
@@ -0,0 +1,48 @@
+"""Token authentication for async views"""
+from django.conf import settings
+from django.utils import timezone
+
+from rest_framework import exceptions
+
+from auth.authentication import (
+    check_token,
+    needs_renewal,
+    verify_access_token,
+)
+from core.models import AuthToken
+
+
+async def authenticate(request):
+    """Return the active user owning the request token or None"""
+    header = request.headers.get('Authorization', '').split()
+    if len(header) != 2:
+        return None
+
+    if header[0].lower() == 'bearer' and settings.AUTH_SIGNED_TOKENS:
+        try:
+            return verify_access_token(header[1])[0]
+        except exceptions.AuthenticationFailed:
+            return None
+
+    if header[0].lower() != 'token':
+        return None
+
+    try:
+        token = await AuthToken.objects.select_related('user').aget(
+            key=header[1],
+        )
+    except AuthToken.DoesNotExist:
+        return None
+
+    now = timezone.now()
+    try:
+        check_token(token, now)
+    except exceptions.AuthenticationFailed:
+        return None
+
+    if needs_renewal(token, now):
+        await AuthToken.objects.filter(key=token.key).aupdate(
+            expires=now + settings.AUTH_TOKEN_TTL,
+        )
+
+    return token.user
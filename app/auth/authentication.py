@@ -0,0 +1,140 @@
+"""Authentication with expiring and signed tokens"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db import router
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import exceptions
+from rest_framework.authentication import (
+    BaseAuthentication,
+    TokenAuthentication,
+    get_authorization_header,
+)
+
+from core.models import AuthToken
+
+
+ACCESS_TOKEN_SALT = 'auth.access'
+
+
+def needs_renewal(token, now):
+    """Return True if a sliding token should be extended"""
+    return (
+        settings.AUTH_TOKEN_SLIDING and
+        token.expires - now < settings.AUTH_TOKEN_TTL / 2
+    )
+
+
+def check_token(token, now):
+    """Reject a token of an inactive user, expired or revoked"""
+    if not token.user.is_active:
+        raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+    if token.generation != token.user.token_generation:
+        raise exceptions.AuthenticationFailed(_('Token has been revoked.'))
+
+    if token.expires <= now:
+        raise exceptions.AuthenticationFailed(_('Token has expired.'))
+
+
+class ExpiringTokenAuthentication(TokenAuthentication):
+    """Token authentication that rejects and renews tokens by age"""
+    model = AuthToken
+
+    def authenticate_credentials(self, key):
+        try:
+            token = AuthToken.objects.select_related('user').get(key=key)
+        except AuthToken.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        now = timezone.now()
+        check_token(token, now)
+
+        # only written once per half lifetime, not on every request
+        if needs_renewal(token, now):
+            token.expires = now + settings.AUTH_TOKEN_TTL
+            AuthToken.objects.filter(key=token.key).update(
+                expires=token.expires,
+            )
+
+        return (token.user, token)
+
+
+def issue_access_token(user):
+    """Return a signed access token and its expiry for the user"""
+    payload = {
+        'u': user.pk,
+        's': user.is_staff,
+        'g': user.token_generation,
+    }
+    token = signing.dumps(payload, salt=ACCESS_TOKEN_SALT, compress=True)
+
+    return token, timezone.now() + settings.AUTH_ACCESS_TOKEN_TTL
+
+
+def verify_access_token(token):
+    """Return the user of a signed access token without touching the db"""
+    try:
+        payload = signing.loads(
+            token,
+            salt=ACCESS_TOKEN_SALT,
+            max_age=settings.AUTH_ACCESS_TOKEN_TTL,
+        )
+    except signing.SignatureExpired:
+        raise exceptions.AuthenticationFailed(_('Token has expired.'))
+    except signing.BadSignature:
+        raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+    # only the signed fields are set, anything else is loaded on access
+    user_model = get_user_model()
+    known = {
+        'id': payload['u'],
+        'is_staff': payload['s'],
+        'is_active': True,
+        'token_generation': payload['g'],
+    }
+    # from_db takes the values in the order of the model fields
+    field_names = [
+        field.attname for field in user_model._meta.concrete_fields
+        if field.attname in known
+    ]
+    user = user_model.from_db(
+        router.db_for_read(user_model),
+        field_names,
+        [known[name] for name in field_names],
+    )
+
+    return user, payload
+
+
+def check_generation(user, payload):
+    """Reject a signed token issued before the user revoked their tokens"""
+    if isinstance(payload, dict) and payload['g'] != user.token_generation:
+        raise exceptions.AuthenticationFailed(_('Token has been revoked.'))
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """Authenticate 'Bearer' access tokens by their signature alone"""
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        if not settings.AUTH_SIGNED_TOKENS:
+            return None
+
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed(_('Invalid token header.'))
+
+        try:
+            token = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(_('Invalid token header.'))
+
+        return verify_access_token(token)
+
+    def authenticate_header(self, request):
+        return self.keyword
@@ -3,6 +3,12 @@
 from rest_framework import permissions
 
 class UserPermission(permissions.BasePermission):
+    """Allow writes to staff and reads to any authenticated user
+
+    Only is_staff and is_authenticated are read, both are carried by signed
+    access tokens, so no user row is loaded to authorise a request.
+    """
+
     def has_permission(self, request, view):
         if view.action in ['create', 'update', 'partial_update', 'destroy']:
             return request.user.is_staff
@@ -0,0 +1,20 @@
+"""OpenAPI descriptions of the custom authentication classes
+
+Imported with the schema generator only, workers that never serve the
+schema do not load drf-spectacular's generation code.
+"""
+from drf_spectacular.extensions import OpenApiAuthenticationExtension
+from drf_spectacular.generators import SchemaGenerator as BaseSchemaGenerator
+
+
+class SignedTokenScheme(OpenApiAuthenticationExtension):
+    """Describe signed access tokens as bearer tokens"""
+    target_class = 'auth.authentication.SignedTokenAuthentication'
+    name = 'signedTokenAuth'
+
+    def get_security_definition(self, auto_schema):
+        return {'type': 'http', 'scheme': 'bearer'}
+
+
+class SchemaGenerator(BaseSchemaGenerator):
+    """Schema generator importing the extensions above before it runs"""
@@ -0,0 +1,147 @@
+"""Rate limiting for the API
+
+Limits use a sliding window counter: every identity keeps one counter for
+the current window and one for the previous window, weighted by how much
+of the previous window still overlaps. A check increments the current
+counters first and compares the counts the cache returns, so concurrent
+requests never pass on the same count. Rejected requests are taken back.
+"""
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache as default_cache
+from django.core.exceptions import ImproperlyConfigured
+
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """Return (requests, seconds) for a rate like '5/min'"""
+    num, period = rate.split('/')
+    return int(num), PERIODS[period[0]]
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """Throttle by IP, email and token with limits from RATE_LIMITS"""
+    cache = default_cache
+    timer = time.time
+
+    def __init__(self):
+        self.retry_after = None
+
+    def get_limits(self, view):
+        """Return the limits of the view scope"""
+        scope = getattr(view, 'throttle_scope', None)
+        if scope is None:
+            raise ImproperlyConfigured(
+                f'{view.__class__.__name__} must set throttle_scope.'
+            )
+        return scope, settings.RATE_LIMITS.get(scope, {})
+
+    def get_identity(self, request, kind):
+        """Return the value identifying the client for a kind of limit"""
+        if kind == 'ip':
+            return self.get_ident(request)
+
+        if kind == 'email':
+            email = request.data.get('email') if hasattr(
+                request.data, 'get') else None
+            if not email:
+                return None
+            if not isinstance(email, str):
+                # malformed, limited like the client that sent it
+                return self.get_ident(request)
+            return email.strip().lower()
+
+        if kind == 'token':
+            header = request.META.get('HTTP_AUTHORIZATION', '')
+            if not header:
+                return None
+            # keep cache keys short whatever the token length
+            return hashlib.sha1(header.encode()).hexdigest()
+
+        raise ImproperlyConfigured(f'Unknown rate limit kind {kind!r}.')
+
+    def allow_request(self, request, view):
+        scope, limits = self.get_limits(view)
+        now = self.timer()
+        waits = []
+        keys = []
+        for kind, rate in limits.items():
+            identity = self.get_identity(request, kind)
+            if identity is None:
+                continue
+
+            num, period = parse_rate(rate)
+            window = int(now // period)
+            prefix = f'throttle:{scope}:{kind}:{identity}'
+            keys.append((f'{prefix}:{window}', f'{prefix}:{window - 1}',
+                         num, period, now % period))
+
+        previous_counts = self.cache.get_many(
+            [previous for key, previous, *_ in keys]
+        )
+        for key, previous, num, period, elapsed in keys:
+            current_count = self.increment(key, period)
+            previous_count = previous_counts.get(previous, 0)
+            overlap = 1 - elapsed / period
+            # the current count includes this request
+            if previous_count * overlap + current_count > num:
+                waits.append(self.get_wait(
+                    num, period, elapsed, current_count - 1, previous_count,
+                ))
+
+        if waits:
+            for key, *_ in keys:
+                self.decrement(key)
+            self.retry_after = max(waits)
+            return False
+
+        return True
+
+    def increment(self, key, period):
+        """Add one to a counter atomically, return the new count"""
+        self.cache.add(key, 0, timeout=period * 2)
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # the key expired between add and incr
+            self.cache.set(key, 1, timeout=period * 2)
+            return 1
+
+    def decrement(self, key):
+        """Take back an increment of a rejected request"""
+        try:
+            self.cache.decr(key)
+        except ValueError:
+            pass
+
+    def get_wait(self, num, period, elapsed, current_count, previous_count):
+        """Return seconds until the weighted count drops below the limit"""
+        if current_count >= num:
+            # wait for the next window, then for enough of it to pass
+            return period - elapsed + period * (1 - num / current_count)
+
+        # the previous window fades out linearly
+        needed = 1 - (num - current_count) / previous_count
+        return max(period * needed - elapsed, 1)
+
+    def wait(self):
+        if self.retry_after is None:
+            return None
+        return math.ceil(self.retry_after)
+
+
+class WriteThrottle(SlidingWindowThrottle):
+    """Sliding window throttle that only counts writes"""
+
+    def allow_request(self, request, view):
+        if request.method in SAFE_METHODS:
+            return True
+        return super().allow_request(request, view)
@@ -1,15 +1,70 @@
 """Django admin customization"""
+from django.conf import settings
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 
 from core import models
 
 
+def estimated_count(queryset):
+    """Return the planner's row estimate of an unfiltered queryset or None"""
+    connection = connections[queryset.db]
+    query = queryset.query
+    if (
+        connection.vendor != 'postgresql'
+        or query.where
+        or query.distinct
+        or query.is_sliced
+    ):
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+
+    # reltuples is -1 until the table is first vacuumed or analyzed
+    if row is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator counting big unfiltered tables from planner statistics"""
+
+    @cached_property
+    def count(self):
+        estimate = estimated_count(self.object_list)
+        if estimate is not None and estimate >= settings.ADMIN_ESTIMATE_COUNT:
+            return estimate
+        return super().count
+
+
+class ScalableAdmin(admin.ModelAdmin):
+    """Admin whose changelist stays fast on tables with millions of rows"""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    # newest first along the primary key index, other columns are not
+    # sortable as they would need a full sort of the table
+    ordering = ['-id']
+    sortable_by = ['id']
+
+
 class UserAdmin(BaseUserAdmin):
     """Define admin pages for users"""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     ordering = ['id']
-    list_display = ['email', 'name', 'is_staff']
+    sortable_by = ['id']
+    list_display = ['id', 'email', 'name', 'is_staff']
+    list_display_links = ['email']
+    search_fields = ['^email']
     fieldsets = (
         (None, {'fields':
                     ('email', 'name', 'fullname', 'password', 'weight', 'height', 'gender', 'calorie_goal','activity_factor', 'dob')}),
@@ -42,7 +97,34 @@ class UserAdmin(BaseUserAdmin):
     )
 
 
+class RecipeAdmin(ScalableAdmin):
+    """Define admin pages for recipes"""
+    list_display = ['id', 'title', 'category', 'calories', 'user']
+    list_display_links = ['title']
+    list_select_related = ['user']
+    search_fields = ['^title']
+    autocomplete_fields = ['user']
+
+
+class FoodAdmin(ScalableAdmin):
+    """Define admin pages for foods"""
+    list_display = ['id', 'title', 'calories', 'protein', 'user']
+    list_display_links = ['title']
+    list_select_related = ['user']
+    search_fields = ['^title']
+    autocomplete_fields = ['user']
+
+
+class ActivityAdmin(ScalableAdmin):
+    """Define admin pages for activities"""
+    list_display = ['id', 'title', 'met', 'user']
+    list_display_links = ['title']
+    list_select_related = ['user']
+    search_fields = ['^title']
+    autocomplete_fields = ['user']
+
+
 admin.site.register(models.User, UserAdmin)
-admin.site.register(models.Recipe)
-admin.site.register(models.Food)
-admin.site.register(models.Activity)
+admin.site.register(models.Recipe, RecipeAdmin)
+admin.site.register(models.Food, FoodAdmin)
+admin.site.register(models.Activity, ActivityAdmin)
@@ -4,3 +4,46 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.contrib.auth.signals import user_login_failed
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_delete, post_save
+
+        from core import barcodes, changes, metrics, storage
+        from core.models import FoodBarcode
+        # registers the system checks
+        from core import checks  # noqa: F401
+
+        connection_created.connect(metrics.install_db_wrapper)
+        changes.connect()
+        # also sent for recipes deleted along with their user
+        post_delete.connect(
+            lambda sender, instance, **kwargs: storage.release(
+                instance.image.name,
+            ),
+            sender='core.Recipe',
+            weak=False,
+        )
+        # cached barcode lookups hold the food they found
+        post_save.connect(
+            lambda sender, instance, **kwargs: barcodes.invalidate(
+                FoodBarcode.objects.filter(food=instance).values_list(
+                    'code', flat=True,
+                ),
+            ),
+            sender='core.Food',
+            weak=False,
+        )
+        for signal in [post_save, post_delete]:
+            signal.connect(
+                lambda sender, instance, **kwargs: barcodes.invalidate(
+                    [instance.code],
+                ),
+                sender='core.FoodBarcode',
+                weak=False,
+            )
+        user_login_failed.connect(
+            lambda sender, **kwargs: metrics.record_auth_failure('credentials'),
+            weak=False,
+        )
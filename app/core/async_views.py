@@ -0,0 +1,60 @@
+"""Async read-only views for the catalog APIs"""
+from django.http import HttpResponse
+from django.views import View
+
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+
+from auth.async_authentication import authenticate
+
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    """Render data the same way the DRF views do"""
+    return HttpResponse(
+        JSONRenderer().render(data),
+        content_type='application/json',
+        status=status_code,
+    )
+
+
+def unauthorized():
+    """Return the response for requests without valid credentials"""
+    response = json_response(
+        {'detail': 'Authentication credentials were not provided.'},
+        status.HTTP_401_UNAUTHORIZED,
+    )
+    response['WWW-Authenticate'] = 'Token'
+    return response
+
+
+class AsyncCatalogView(View):
+    """List and retrieve catalog objects without pinning a thread"""
+    model = None
+    serializer_class = None
+    detail_serializer_class = None
+
+    async def get(self, request, pk=None):
+        """Return the list of objects or a single object"""
+        user = await authenticate(request)
+        if user is None:
+            return unauthorized()
+
+        context = {'request': request}
+        if pk is None:
+            objects = [
+                obj async for obj in self.model.objects.order_by('-id')
+            ]
+            serializer = self.serializer_class(
+                objects, many=True, context=context,
+            )
+            return json_response(serializer.data)
+
+        try:
+            obj = await self.model.objects.aget(pk=pk)
+        except self.model.DoesNotExist:
+            return json_response(
+                {'detail': 'Not found.'}, status.HTTP_404_NOT_FOUND,
+            )
+
+        serializer_class = self.detail_serializer_class or self.serializer_class
+        return json_response(serializer_class(obj, context=context).data)
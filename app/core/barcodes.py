@@ -0,0 +1,69 @@
+"""Barcode normalisation and the read-through cache of barcode lookups
+
+EAN-8, UPC-A, EAN-13 and GTIN-14 codes are stored as 14 digit GTINs, so a
+UPC-A and the EAN-13 it is printed as find the same food. Lookups are cached
+for BARCODE_CACHE_TTL and unknown codes for BARCODE_MISS_TTL, so repeated
+scans of a product missing from the catalog do not reach the database.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from core import metrics
+
+
+LENGTHS = (8, 12, 13, 14)
+
+# cached for codes no food has
+MISSING = 'missing'
+
+
+class InvalidBarcode(ValueError):
+    """The code is no valid EAN/UPC"""
+
+
+def check_digit(digits):
+    """Return the GTIN check digit of the digits before it"""
+    total = sum(
+        int(digit) * (3 if i % 2 == 0 else 1)
+        for i, digit in enumerate(reversed(digits))
+    )
+    return str(-total % 10)
+
+
+def normalise(code):
+    """Return the 14 digit GTIN of a scanned code or raise InvalidBarcode"""
+    digits = ''.join(str(code).split()).replace('-', '')
+    if not digits.isdigit() or len(digits) not in LENGTHS:
+        raise InvalidBarcode(f'{code} is no EAN/UPC code.')
+    if check_digit(digits[:-1]) != digits[-1]:
+        raise InvalidBarcode(f'{code} has a wrong check digit.')
+    return digits.zfill(14)
+
+
+def cache_key(code):
+    """Return the cache key of a normalised code"""
+    return f'barcode:{code}'
+
+
+def lookup(code, load):
+    """Return the cached result of a normalised code, or None if unknown
+
+    load(code) is called on a cache miss and returns the result to cache or
+    None when no food has the code.
+    """
+    key = cache_key(code)
+    value = cache.get(key)
+    metrics.record_cache('barcode', value is not None)
+    if value is None:
+        value = load(code)
+        if value is None:
+            cache.set(key, MISSING, settings.BARCODE_MISS_TTL)
+        else:
+            cache.set(key, value, settings.BARCODE_CACHE_TTL)
+
+    return None if value == MISSING else value
+
+
+def invalidate(codes):
+    """Drop the cached lookups of normalised codes"""
+    cache.delete_many([cache_key(code) for code in codes])
@@ -0,0 +1,67 @@
+"""Fetching many catalog objects by id in one request"""
+import functools
+
+from django.conf import settings
+
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import serializers
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+
+def parse_ids(value):
+    """Return the distinct ids of a comma separated list, in order"""
+    if not value:
+        raise ValidationError({'ids': ['This query parameter is required.']})
+    try:
+        ids = [int(pk) for pk in value.split(',')]
+    except ValueError:
+        raise ValidationError({'ids': ['Ids must be integers.']})
+
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > settings.BATCH_MAX_IDS:
+        raise ValidationError(
+            {'ids': [f'At most {settings.BATCH_MAX_IDS} ids are allowed.']},
+        )
+    return ids
+
+
+@functools.lru_cache(maxsize=None)
+def batch_serializer(serializer_class):
+    """Return a serializer for the found objects and the missing ids"""
+    name = serializer_class.__name__.removesuffix('Serializer')
+    return type(f'{name}BatchSerializer', (serializers.Serializer,), {
+        '__doc__': 'Serializer for objects fetched by id',
+        '__module__': serializer_class.__module__,
+        'results': serializer_class(many=True),
+        'missing': serializers.ListField(child=serializers.IntegerField()),
+    })
+
+
+class BatchRetrieveMixin:
+    """Retrieve several objects of a viewset with one query"""
+
+    def get_serializer_class(self):
+        if self.action == 'batch':
+            return batch_serializer(self.serializer_class)
+        return super().get_serializer_class()
+
+    @extend_schema(parameters=[OpenApiParameter(
+        'ids',
+        OpenApiTypes.STR,
+        required=True,
+        description='Comma separated ids, in the order to return them',
+    )])
+    @action(detail=False)
+    def batch(self, request):
+        """Retrieve the objects with the given ids in their order"""
+        ids = parse_ids(request.query_params.get('ids'))
+        found = self.get_queryset().in_bulk(ids)
+
+        serializer = self.get_serializer({
+            'results': [found[pk] for pk in ids if pk in found],
+            'missing': [pk for pk in ids if pk not in found],
+        })
+        return Response(serializer.data)
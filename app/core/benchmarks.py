@@ -0,0 +1,362 @@
+"""Helpers for load benchmarking the API"""
+import http.client
+import json
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+
+# words used by the search scenario
+SEARCH_TERMS = ['paine', 'lapte', 'pui', 'orez', 'mar', 'ou', 'branza']
+
+
+def percentile(samples, pct):
+    """Return the pct percentile of sorted samples (nearest rank)"""
+    if not samples:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(samples)) - 1, 0)
+    return samples[rank]
+
+
+def summarize(latencies, errors, elapsed, throttled=0):
+    """Return the statistics for a finished scenario run"""
+    latencies = sorted(latencies)
+    total = len(latencies)
+
+    return {
+        'requests': total,
+        'errors': errors,
+        'throttled': throttled,
+        'rps': round(total / elapsed, 2) if elapsed else 0.0,
+        'mean_ms': round(sum(latencies) / total * 1000, 3) if total else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def compare(report, baseline, tolerance):
+    """Return a list of regressions of report against baseline"""
+    regressions = []
+    for name, current in report['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if previous is None:
+            continue
+
+        # latency must not grow and throughput must not drop
+        # by more than the allowed tolerance
+        for key in ['p50_ms', 'p95_ms', 'p99_ms']:
+            if current[key] > previous[key] * (1 + tolerance):
+                regressions.append(
+                    f'{name}: {key} {previous[key]} -> {current[key]}'
+                )
+        if current['rps'] < previous['rps'] * (1 - tolerance):
+            regressions.append(
+                f'{name}: rps {previous["rps"]} -> {current["rps"]}'
+            )
+        if current['errors'] > previous['errors']:
+            regressions.append(
+                f'{name}: errors {previous["errors"]} -> {current["errors"]}'
+            )
+
+    return regressions
+
+
+class Client:
+    """Minimal keep-alive HTTP client, one connection per thread"""
+
+    def __init__(self, base_url, token=None, scheme='Token'):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.token = token
+        self.scheme = scheme
+        self.local = threading.local()
+
+    def connection(self):
+        """Return the connection for the current thread"""
+        if getattr(self.local, 'connection', None) is None:
+            self.local.connection = http.client.HTTPConnection(
+                self.host, self.port, timeout=30,
+            )
+        return self.local.connection
+
+    def request(self, method, path, payload=None, token=True):
+        """Send a request and return the status code and decoded body"""
+        headers = {'Accept': 'application/json'}
+        body = None
+        if payload is not None:
+            body = json.dumps(payload)
+            headers['Content-Type'] = 'application/json'
+        if token and self.token:
+            headers['Authorization'] = f'{self.scheme} {self.token}'
+
+        conn = self.connection()
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            res = conn.getresponse()
+            data = res.read()
+        except (http.client.HTTPException, OSError):
+            # drop the broken connection, next call opens a new one
+            conn.close()
+            self.local.connection = None
+            raise
+
+        return res.status, data
+
+
+def browse(client, rng, context):
+    """List the food or recipe catalog"""
+    path = rng.choice(['/api/food/foods/', '/api/recipe/recipes/'])
+    return client.request('GET', path)[0]
+
+
+def search(client, rng, context):
+    """Search the food catalog by title"""
+    term = rng.choice(SEARCH_TERMS)
+    return client.request('GET', f'/api/food/foods/?search={term}')[0]
+
+
+def login(client, rng, context):
+    """Request a new auth token"""
+    # a device of its own, so the token of the other scenarios stays valid
+    payload = {
+        'email': context['email'],
+        'password': context['password'],
+        'device': 'benchmark-login',
+    }
+    return client.request('POST', '/api/user/token/', payload, token=False)[0]
+
+
+def profile(client, rng, context):
+    """Read or update the authenticated user profile"""
+    if rng.random() < 0.5:
+        return client.request('GET', '/api/user/me/')[0]
+
+    payload = {'fullname': f'Bench User {rng.randint(0, 9999)}'}
+    return client.request('PATCH', '/api/user/me/', payload)[0]
+
+
+def browse_async(client, rng, context):
+    """List the food or recipe catalog through the async views"""
+    path = rng.choice([
+        '/api/food/async/foods/',
+        '/api/recipe/async/recipes/',
+    ])
+    return client.request('GET', path)[0]
+
+
+def profile_async(client, rng, context):
+    """Read the authenticated user profile through the async view"""
+    return client.request('GET', '/api/user/async/me/')[0]
+
+
+SCENARIOS = {
+    'browse': browse,
+    'browse-async': browse_async,
+    'search': search,
+    'login': login,
+    'profile': profile,
+    'profile-async': profile_async,
+}
+
+
+def run_scenario(scenario, client, context, requests, concurrency, seed=0):
+    """Run requests calls of scenario over concurrency threads"""
+    latencies = []
+    errors = 0
+    throttled = 0
+    lock = threading.Lock()
+
+    def worker(index, count):
+        nonlocal errors, throttled
+        rng = random.Random(seed + index)
+        local_latencies = []
+        local_errors = 0
+        local_throttled = 0
+        for _ in range(count):
+            start = time.perf_counter()
+            try:
+                status_code = scenario(client, rng, context)
+            except (http.client.HTTPException, OSError):
+                status_code = None
+            local_latencies.append(time.perf_counter() - start)
+            if status_code == 429:
+                # rejected by the rate limits, not a failure of the server
+                local_throttled += 1
+            elif status_code is None or status_code >= 400:
+                local_errors += 1
+
+        with lock:
+            latencies.extend(local_latencies)
+            errors += local_errors
+            throttled += local_throttled
+
+    # spread the requests as evenly as possible over the workers
+    shares = [
+        requests // concurrency + (1 if i < requests % concurrency else 0)
+        for i in range(concurrency)
+    ]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [
+            executor.submit(worker, i, share)
+            for i, share in enumerate(shares)
+        ]:
+            future.result()
+    elapsed = time.perf_counter() - start
+
+    return summarize(latencies, errors, elapsed, throttled)
+
+
+def timed(fn, iterations):
+    """Return the mean seconds per call of fn over iterations calls"""
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(i)
+    return (time.perf_counter() - start) / iterations
+
+
+def bench_throttle(iterations):
+    """Measure the cost of the login rate limit check per request"""
+    from rest_framework.parsers import JSONParser
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    from auth.throttling import SlidingWindowThrottle
+
+    class View:
+        throttle_scope = 'login'
+
+    factory = APIRequestFactory()
+    requests = []
+    # distinct clients, so no request is actually throttled
+    for i in range(min(iterations, 10000)):
+        request = Request(
+            factory.post(
+                '/api/user/token/',
+                {'email': f'user{i}@example.com', 'password': 'secret'},
+                format='json',
+                REMOTE_ADDR=f'10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}',
+            ),
+            parsers=[JSONParser()],
+        )
+        request.data
+        requests.append(request)
+
+    view = View()
+    count = len(requests)
+    # the loop and request lookup alone, subtracted from the result
+    baseline = timed(lambda i: requests[i % count], iterations)
+    throttle = timed(
+        lambda i: SlidingWindowThrottle().allow_request(
+            requests[i % count], view,
+        ),
+        iterations,
+    )
+
+    return {
+        'iterations': iterations,
+        'per_call_us': round(throttle * 1e6, 2),
+        'overhead_us': round((throttle - baseline) * 1e6, 2),
+    }
+
+
+def bench_signed_token(iterations):
+    """Measure the cost of verifying a signed access token"""
+    from django.contrib.auth import get_user_model
+
+    from auth.authentication import issue_access_token, verify_access_token
+
+    # never saved, verifying a token does not look the user up
+    user = get_user_model()(id=1, is_staff=True, token_generation=0)
+    tokens = [issue_access_token(user)[0] for _ in range(100)]
+
+    baseline = timed(lambda i: tokens[i % 100], iterations)
+    verify = timed(lambda i: verify_access_token(tokens[i % 100]), iterations)
+
+    return {
+        'iterations': iterations,
+        'per_call_us': round(verify * 1e6, 2),
+        'overhead_us': round((verify - baseline) * 1e6, 2),
+    }
+
+
+def bench_fixedpoint(iterations):
+    """Measure a list response of foods with Decimal and tenths nutrients
+
+    Both paths start from the text the database sends for a row, like
+    psycopg2 parses it, and end with the rendered JSON.
+    """
+    import decimal
+    import tracemalloc
+
+    from rest_framework import serializers
+    from rest_framework.renderers import JSONRenderer
+
+    from core.fields import TenthsField, TenthsSerializerField
+
+    names = ['calories', 'carbs', 'fibers', 'fat', 'protein']
+    rng = random.Random(0)
+    rows = [
+        [rng.randrange(100000) for _ in names] for _ in range(iterations)
+    ]
+    numeric = [[f'{v // 10}.{v % 10}' for v in row] for row in rows]
+    integer = [[str(v) for v in row] for row in rows]
+
+    decimal_field = serializers.DecimalField(max_digits=6, decimal_places=1)
+    model_field = TenthsField()
+    tenths_field = TenthsSerializerField()
+    renderer = JSONRenderer()
+
+    def decimals():
+        return [
+            {
+                name: decimal_field.to_representation(decimal.Decimal(text))
+                for name, text in zip(names, row)
+            }
+            for row in numeric
+        ]
+
+    def tenths():
+        return [
+            {
+                name: tenths_field.to_representation(
+                    model_field.from_db_value(int(text), None, None),
+                )
+                for name, text in zip(names, row)
+            }
+            for row in integer
+        ]
+
+    report = {'rows': iterations}
+    for label, build in [('decimal', decimals), ('tenths', tenths)]:
+        # best of three, the first run warms up the allocator
+        elapsed = min(
+            timed(lambda i: renderer.render(build()), 1) for _ in range(3)
+        )
+        tracemalloc.start()
+        data = build()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        del data
+        report[f'{label}_ms'] = round(elapsed * 1000, 3)
+        report[f'{label}_peak_kb'] = round(peak / 1024, 1)
+
+    report['saved_cpu_pct'] = round(
+        100 * (1 - report['tenths_ms'] / report['decimal_ms']), 1,
+    ) if report['decimal_ms'] else 0.0
+    report['saved_memory_pct'] = round(
+        100 * (1 - report['tenths_peak_kb'] / report['decimal_peak_kb']), 1,
+    ) if report['decimal_peak_kb'] else 0.0
+    return report
+
+
+MICROBENCHMARKS = {
+    'fixedpoint': bench_fixedpoint,
+    'signed-token': bench_signed_token,
+    'throttle': bench_throttle,
+}
@@ -0,0 +1,150 @@
+"""Change sequence of the catalog for delta syncs
+
+Saving or deleting a food, recipe or activity replaces its Change row, so
+the row ids form a monotonic sequence of the latest changes and deleted
+objects leave a tombstone. A change is only listed once it is
+CHANGES_SETTLE_SECONDS old by the database clock: sequence numbers are taken
+when a transaction writes but become visible when it commits, so a change
+committed late is still listed before any client moved past its number.
+"""
+import itertools
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import BooleanField, ExpressionWrapper, Max, Min, Q
+from django.db.models.functions import Now
+from django.db.models.signals import post_delete, post_save
+
+from core.models import Activity, Change, Food, Recipe
+
+
+KINDS = {'food': Food, 'recipe': Recipe, 'activity': Activity}
+
+
+def record(kind, object_id, deleted=False):
+    """Move an object to the end of the change sequence"""
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                Change.objects.filter(kind=kind, object_id=object_id).delete()
+                # the clock of the database, shared by every app server
+                Change.objects.create(
+                    kind=kind, object_id=object_id, deleted=deleted,
+                    changed=Now(),
+                )
+            return
+        except IntegrityError:
+            # a concurrent change of the same object inserted first
+            if attempt:
+                raise
+
+
+def record_batch(kind, object_ids):
+    """Record objects written in bulk, which sends no signals"""
+    object_ids = iter(object_ids)
+    while True:
+        batch = list(itertools.islice(object_ids, 5000))
+        if not batch:
+            break
+        with transaction.atomic():
+            Change.objects.filter(kind=kind, object_id__in=batch).delete()
+            Change.objects.bulk_create(
+                [
+                    Change(kind=kind, object_id=pk, changed=Now())
+                    for pk in batch
+                ],
+            )
+
+
+def record_inserted(kind, after_id):
+    """Record the objects inserted in bulk after an id, in two statements"""
+    model = KINDS[kind]
+    compiler = Change.objects.all().query.get_compiler(connection=connection)
+    now_sql, now_params = compiler.compile(Now())
+    quote = connection.ops.quote_name
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            'DELETE FROM {} WHERE {} = %s AND {} > %s'.format(
+                quote(Change._meta.db_table), quote('kind'),
+                quote('object_id'),
+            ),
+            [kind, after_id],
+        )
+        # numbered in id order, like record_batch does
+        cursor.execute(
+            'INSERT INTO {} ({}, {}, {}, {}) SELECT %s, {}, %s, {} '
+            'FROM {} WHERE {} > %s ORDER BY {}'.format(
+                quote(Change._meta.db_table), quote('kind'),
+                quote('object_id'), quote('deleted'), quote('changed'),
+                quote('id'), now_sql, quote(model._meta.db_table),
+                quote('id'), quote('id'),
+            ),
+            [kind, False, *now_params, after_id],
+        )
+
+
+def settled_before():
+    """Return the database time changes older than have settled"""
+    return Now() - timedelta(seconds=settings.CHANGES_SETTLE_SECONDS)
+
+
+def settled_seq():
+    """Return the sequence number up to which every change has settled"""
+    first_unsettled = Change.objects.filter(
+        changed__gt=settled_before(),
+    ).aggregate(seq=Min('seq'))['seq']
+
+    changes = Change.objects.all()
+    if first_unsettled is not None:
+        changes = changes.filter(seq__lt=first_unsettled)
+    return changes.aggregate(seq=Max('seq'))['seq'] or 0
+
+
+def since(seq, limit):
+    """Return up to limit settled changes after seq, oldest first
+
+    The batch ends before the first change that has not settled yet, the
+    client continues after the last change it got.
+    """
+    batch = (
+        Change.objects.filter(seq__gt=seq)
+        .annotate(settled=ExpressionWrapper(
+            Q(changed__lte=settled_before()), output_field=BooleanField(),
+        ))
+        .order_by('seq')[:limit]
+    )
+    return list(itertools.takewhile(lambda change: change.settled, batch))
+
+
+def objects(changes):
+    """Return the changed objects by kind, fetched with one query per kind"""
+    ids = {}
+    for change in changes:
+        if not change.deleted:
+            ids.setdefault(change.kind, []).append(change.object_id)
+
+    return {
+        kind: KINDS[kind].objects.in_bulk(object_ids)
+        for kind, object_ids in ids.items()
+    }
+
+
+def connect():
+    """Record the changes of the catalog models"""
+    for kind, model in KINDS.items():
+        post_save.connect(
+            lambda instance, kind=kind, **kwargs: record(kind, instance.pk),
+            sender=model,
+            weak=False,
+            dispatch_uid=f'changes.save.{kind}',
+        )
+        # also sent for objects deleted along with their user
+        post_delete.connect(
+            lambda instance, kind=kind, **kwargs: record(
+                kind, instance.pk, deleted=True,
+            ),
+            sender=model,
+            weak=False,
+            dispatch_uid=f'changes.delete.{kind}',
+        )
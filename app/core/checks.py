@@ -0,0 +1,30 @@
+"""System checks for the core app"""
+import json
+
+from django.core.checks import Warning, register
+
+
+@register('api', deploy=True)
+def check_schema(app_configs, **kwargs):
+    """Check the built OpenAPI schema matches the code"""
+    from core import schema
+
+    stored = schema.load()
+    if stored is None:
+        return [Warning(
+            'The OpenAPI schema was not built, it is generated on the '
+            'first request of every process.',
+            hint='Run manage.py build_schema.',
+            id='core.W001',
+        )]
+
+    # compare the serialized forms, tuples and lists differ otherwise
+    generated = json.loads(json.dumps(schema.generate()))
+    if stored != generated:
+        return [Warning(
+            'The built OpenAPI schema does not match the code.',
+            hint='Run manage.py build_schema.',
+            id='core.W002',
+        )]
+
+    return []
@@ -0,0 +1,149 @@
+"""Home screen data assembled from independent queries
+
+The parts of the dashboard do not depend on each other, so they run
+concurrently on a pool of DASHBOARD_WORKERS threads per process. The threads
+close their database connections after each part, so idle pools hold none.
+"""
+import contextvars
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection
+
+from core import metrics
+from core.models import Activity
+
+
+# multipliers of the basal metabolic rate by activity level
+ACTIVITY_FACTORS = {1: 1.2, 2: 1.375, 3: 1.55, 4: 1.725, 5: 1.9}
+
+# Mifflin-St Jeor offsets, between both when the gender is not given
+GENDER_OFFSETS = {1: 5, 2: -161}
+UNKNOWN_GENDER_OFFSET = -78
+
+# share of the daily calories and kcal per gram of each macro
+MACRO_SPLIT = {'protein': (0.2, 4), 'carbs': (0.5, 4), 'fat': (0.3, 9)}
+
+# activities of at least moderate intensity are suggested
+SUGGESTION_MIN_MET = 3
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def age(dob, today):
+    """Return the age in whole years"""
+    return today.year - dob.year - ((today.month, today.day) < (
+        dob.month, dob.day,
+    ))
+
+
+def rounded(value):
+    """Round a value to one decimal place, keeping None"""
+    return None if value is None else round(value, 1)
+
+
+def energy_targets(user, today=None):
+    """Return the daily energy and macro targets of a user
+
+    The calorie goal of the user wins over the estimated daily expenditure.
+    Estimates are None until the weight and height are known.
+    """
+    today = today or datetime.date.today()
+    # floats, also for values assigned but not read back from the database
+    weight, height = float(user.weight or 0), float(user.height or 0)
+    bmr = tdee = None
+    if weight and height:
+        bmr = (
+            10 * weight + 6.25 * height - 5 * age(user.dob, today) +
+            GENDER_OFFSETS.get(user.gender, UNKNOWN_GENDER_OFFSET)
+        )
+        tdee = bmr * ACTIVITY_FACTORS.get(user.activity_factor, 1.2)
+
+    calories = float(user.calorie_goal or 0) or tdee
+    targets = {
+        'bmr': rounded(bmr),
+        'tdee': rounded(tdee),
+        'calories': rounded(calories),
+    }
+    for name, (share, kcal_per_gram) in MACRO_SPLIT.items():
+        targets[name] = rounded(
+            calories * share / kcal_per_gram if calories else None,
+        )
+    return targets
+
+
+def suggestions(size=None):
+    """Return a few activities of moderate intensity, the gentlest first"""
+    size = size or settings.DASHBOARD_SUGGESTIONS
+    return list(
+        Activity.objects.filter(met__gte=SUGGESTION_MIN_MET)
+        .order_by('met', 'id')[:size]
+    )
+
+
+def burned(activity, weight, minutes=30):
+    """Return the kcal a user of weight burns with an activity"""
+    if not weight:
+        return None
+    return round(activity.met * float(weight) * minutes / 60, 1)
+
+
+def executor():
+    """Return the thread pool of this process, created on first use"""
+    global _executor
+    # created lazily, threads do not survive forking the workers
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.DASHBOARD_WORKERS,
+                thread_name_prefix='dashboard',
+            )
+    return _executor
+
+
+def concurrent():
+    """Return whether the parts can run on other connections"""
+    # other connections do not see the writes of an open transaction and
+    # sqlite runs one query at a time anyway
+    return (
+        settings.DASHBOARD_WORKERS > 1
+        and connection.vendor != 'sqlite'
+        and not connection.in_atomic_block
+    )
+
+
+def run(fn, counted):
+    """Call fn on a pool thread, return its result and database stats"""
+    # counted apart from the request, other parts run at the same time
+    stats = [0, 0.0] if counted else None
+    metrics.db_stats.set(stats)
+    try:
+        return fn(), stats
+    finally:
+        connection.close()
+
+
+def gather(parts):
+    """Call the independent callables of parts, return their results"""
+    if not concurrent():
+        return {name: fn() for name, fn in parts.items()}
+
+    stats = metrics.db_stats.get()
+    futures = {
+        name: executor().submit(
+            contextvars.copy_context().run, run, fn, stats is not None,
+        )
+        for name, fn in parts.items()
+    }
+
+    # the queries of the parts add to the metrics of the request
+    results = {}
+    for name, future in futures.items():
+        results[name], part_stats = future.result()
+        if part_stats is not None:
+            stats[0] += part_stats[0]
+            stats[1] += part_stats[1]
+    return results
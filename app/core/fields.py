@@ -0,0 +1,154 @@
+"""Fixed-point nutrient fields
+
+Nutrient values have one decimal place. TenthsField stores them as integers
+of tenths and reads them back as floats divided by ten, so loading and
+rendering a row creates no Decimal objects. Written values are rounded half
+to even to a tenth, like DecimalField rounds them.
+"""
+import decimal
+
+from django import forms
+from django.core import exceptions, validators
+from django.db import models
+from django.db.models import lookups
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+
+def to_tenths(value, rounding=decimal.ROUND_HALF_EVEN):
+    """Return a number as an integer of tenths, rounded half to even"""
+    if isinstance(value, int):
+        return value * 10
+    # str() keeps the shortest repr of floats, 0.1 + 0.2 is 3 tenths
+    tenths = decimal.Decimal(str(value)).scaleb(1)
+    return int(tenths.to_integral_value(rounding))
+
+
+class TenthsField(models.IntegerField):
+    """Number with one decimal place stored as an integer of tenths"""
+    description = _('Number with one decimal place')
+    default_error_messages = {
+        'invalid': _('“%(value)s” value must be a number.'),
+    }
+
+    def __init__(self, *args, max_digits=6, **kwargs):
+        self.max_digits = max_digits
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.max_digits != 6:
+            kwargs['max_digits'] = self.max_digits
+        return name, path, args, kwargs
+
+    @cached_property
+    def validators(self):
+        # the digits of a DecimalField, not the range of the column
+        limit = (10 ** self.max_digits - 1) / 10
+        return [
+            *self.default_validators,
+            *self._validators,
+            validators.MinValueValidator(-limit),
+            validators.MaxValueValidator(limit),
+        ]
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else value / 10
+
+    def to_python(self, value):
+        if value is None:
+            return value
+        try:
+            return to_tenths(value) / 10
+        except (decimal.InvalidOperation, TypeError, ValueError):
+            raise exceptions.ValidationError(
+                self.error_messages['invalid'],
+                code='invalid',
+                params={'value': value},
+            )
+
+    def get_prep_value(self, value):
+        value = models.Field.get_prep_value(self, value)
+        if value is None:
+            return None
+        try:
+            return to_tenths(value)
+        except (decimal.InvalidOperation, TypeError, ValueError) as e:
+            raise e.__class__(
+                f'Field {self.name!r} expected a number but got {value!r}.',
+            ) from e
+
+    def formfield(self, **kwargs):
+        return models.Field.formfield(self, **{
+            'form_class': forms.DecimalField,
+            'max_digits': self.max_digits,
+            'decimal_places': 1,
+            **kwargs,
+        })
+
+
+class TenthsBound:
+    """Compare tenths with a bound rounded so no matching value is lost
+
+    x >= 52.34 holds for tenths >= 524 and x > 52.34 for tenths > 523, the
+    bound is rounded up for gte and lt and down for gt and lte.
+    """
+    rounding = decimal.ROUND_CEILING
+
+    def get_prep_lookup(self):
+        if self.rhs is None or hasattr(self.rhs, 'resolve_expression'):
+            return super().get_prep_lookup()
+        try:
+            return to_tenths(self.rhs, self.rounding)
+        except (decimal.InvalidOperation, TypeError, ValueError) as e:
+            raise e.__class__(
+                f'Field {self.lhs.output_field.name!r} expected a number '
+                f'but got {self.rhs!r}.',
+            ) from e
+
+
+@TenthsField.register_lookup
+class TenthsGreaterThan(TenthsBound, lookups.GreaterThan):
+    rounding = decimal.ROUND_FLOOR
+
+
+@TenthsField.register_lookup
+class TenthsGreaterThanOrEqual(TenthsBound, lookups.GreaterThanOrEqual):
+    rounding = decimal.ROUND_CEILING
+
+
+@TenthsField.register_lookup
+class TenthsLessThan(TenthsBound, lookups.LessThan):
+    rounding = decimal.ROUND_CEILING
+
+
+@TenthsField.register_lookup
+class TenthsLessThanOrEqual(TenthsBound, lookups.LessThanOrEqual):
+    rounding = decimal.ROUND_FLOOR
+
+
+class TenthsSerializerField(serializers.DecimalField):
+    """Decimal field rendering the floats of a TenthsField as they are"""
+
+    def __init__(self, max_digits=6, decimal_places=1, **kwargs):
+        super().__init__(max_digits, decimal_places, **kwargs)
+
+    def to_representation(self, value):
+        coerce_to_string = getattr(
+            self, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING,
+        )
+        if coerce_to_string:
+            return f'{value:.{self.decimal_places}f}'
+        # JSON renders the float as DecimalField renders its Decimal
+        return float(value)
+
+
+class TenthsModelSerializerMixin:
+    """Map the TenthsFields of a model serializer to TenthsSerializerField"""
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        TenthsField: TenthsSerializerField,
+    }
@@ -0,0 +1,35 @@
+"""Password hashers running through the bounded hashing pool"""
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+)
+
+from core import hashing
+
+
+class BoundedHasherMixin:
+    """Run encode and verify through the hashing pool"""
+
+    def encode(self, password, salt, *args, **kwargs):
+        return hashing.run(
+            lambda: super(BoundedHasherMixin, self).encode(
+                password, salt, *args, **kwargs,
+            )
+        )
+
+    def verify(self, password, encoded):
+        return hashing.run(
+            lambda: super(BoundedHasherMixin, self).verify(password, encoded)
+        )
+
+
+class BoundedArgon2PasswordHasher(BoundedHasherMixin, Argon2PasswordHasher):
+    """Argon2 hasher with costs from the settings"""
+    time_cost = settings.ARGON2_TIME_COST
+    memory_cost = settings.ARGON2_MEMORY_COST
+    parallelism = settings.ARGON2_PARALLELISM
+
+
+class BoundedPBKDF2PasswordHasher(BoundedHasherMixin, PBKDF2PasswordHasher):
+    """PBKDF2 hasher kept to verify and upgrade older hashes"""
@@ -0,0 +1,89 @@
+"""Bounded execution of password hashing
+
+Hashing is CPU bound on purpose. Running it on a small pool per process
+keeps login and signup storms from taking every worker thread; calls that
+would have to wait behind too many others fail fast instead.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class HashingBusy(APIException):
+    """Raised when the hashing pool and its queue are full"""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _('Too many authentication requests, try again later.')
+    default_code = 'hashing_busy'
+    wait = 1
+
+
+class BoundedExecutor:
+    """Thread pool that rejects work beyond a fixed queue length"""
+
+    def __init__(self, max_workers, max_queue):
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='hashing',
+        )
+        self.slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self.local = threading.local()
+
+    def call(self, fn, *args):
+        """Call fn on a pool thread"""
+        self.local.inside = True
+        try:
+            return fn(*args)
+        finally:
+            self.local.inside = False
+
+    def run(self, fn, *args):
+        """Run fn in the pool and return its result"""
+        # hashers may call each other, nested calls must not wait
+        # for a pool thread they are already running on
+        if getattr(self.local, 'inside', False):
+            return fn(*args)
+
+        if not self.slots.acquire(blocking=False):
+            raise HashingBusy()
+
+        try:
+            future = self.executor.submit(self.call, fn, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda future: self.slots.release())
+
+        return future.result()
+
+
+_executor = None
+_executor_pid = None
+_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the executor of the current process"""
+    global _executor, _executor_pid
+
+    # threads do not survive a fork, every worker needs its own pool
+    if _executor_pid != os.getpid():
+        with _lock:
+            if _executor_pid != os.getpid():
+                _executor = BoundedExecutor(
+                    settings.PASSWORD_HASHING_MAX_WORKERS,
+                    settings.PASSWORD_HASHING_MAX_QUEUE,
+                )
+                _executor_pid = os.getpid()
+
+    return _executor
+
+
+def run(fn, *args):
+    """Run a hashing function through the bounded executor"""
+    return get_executor().run(fn, *args)
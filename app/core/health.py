@@ -0,0 +1,48 @@
+"""Liveness and readiness probes cheap enough to be polled constantly
+
+Readiness pings every database at most once per READINESS_TTL in each
+process, the probes in between are answered from memory.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+
+_lock = threading.Lock()
+_expires = 0.0
+_ready = False
+
+
+def ping(alias):
+    """Return whether a database answers a trivial query"""
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except DatabaseError:
+        return False
+    return True
+
+
+def is_ready():
+    """Return whether every database is reachable, cached for a short time"""
+    global _expires, _ready
+
+    if time.monotonic() < _expires:
+        return _ready
+
+    with _lock:
+        # another thread pinged while this one waited for the lock
+        if time.monotonic() >= _expires:
+            _ready = all(ping(alias) for alias in connections)
+            _expires = time.monotonic() + settings.READINESS_TTL
+    return _ready
+
+
+def reset():
+    """Forget the cached readiness, the next probe pings again"""
+    global _expires
+
+    with _lock:
+        _expires = 0.0
@@ -0,0 +1,88 @@
+"""Validate and downscale uploaded images with bounded memory
+
+Only the image header is read to validate an upload, so oversized images
+and decompression bombs are rejected before any pixel is decoded. Large
+images are decoded in draft mode, which lets the JPEG decoder scale by 1/2,
+1/4 or 1/8 while decoding, and stored downscaled.
+"""
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+
+
+class InvalidImage(Exception):
+    """The upload is not an acceptable image"""
+
+
+def open_image(file):
+    """Return the lazily loaded image of a file or raise InvalidImage"""
+    # pillow is imported on the first upload, not when workers boot
+    from PIL import Image, UnidentifiedImageError
+
+    if file.size > settings.IMAGE_UPLOAD_MAX_BYTES:
+        raise InvalidImage(
+            'The image must be smaller than {} MB.'.format(
+                settings.IMAGE_UPLOAD_MAX_BYTES // (1024 * 1024),
+            )
+        )
+
+    file.seek(0)
+    try:
+        # reads the header only
+        image = Image.open(file)
+    except Image.DecompressionBombError:
+        raise InvalidImage('The image has too many pixels.')
+    except (UnidentifiedImageError, OSError):
+        raise InvalidImage(
+            'Upload a valid image. The file you uploaded was either not an '
+            'image or a corrupted image.'
+        )
+
+    if image.format not in settings.IMAGE_UPLOAD_FORMATS:
+        image.close()
+        raise InvalidImage(f'Unsupported image format {image.format}.')
+
+    width, height = image.size
+    if width * height > settings.IMAGE_UPLOAD_MAX_PIXELS:
+        image.close()
+        raise InvalidImage('The image has too many pixels.')
+
+    return image
+
+
+def downscale(image, name, content_type):
+    """Return a temporary file with the image fitted to IMAGE_MAX_SIDE"""
+    from PIL import Image
+
+    size = (settings.IMAGE_MAX_SIDE, settings.IMAGE_MAX_SIDE)
+    image_format = image.format
+
+    # decode at the smallest scale still larger than the target
+    image.draft(image.mode, size)
+    image.thumbnail(size, Image.LANCZOS)
+
+    file = TemporaryUploadedFile(name, content_type, 0, None)
+    image.save(file, format=image_format)
+    file.size = file.tell()
+    file.seek(0)
+
+    return file
+
+
+def prepare_upload(file):
+    """Return the validated upload, downscaled if needed"""
+    image = open_image(file)
+    with image:
+        if max(image.size) <= settings.IMAGE_MAX_SIDE:
+            try:
+                image.verify()
+            except Exception:
+                raise InvalidImage('Upload a valid image.')
+            file.seek(0)
+            return file
+
+        try:
+            return downscale(
+                image, file.name, getattr(file, 'content_type', None),
+            )
+        except (OSError, SyntaxError, ValueError):
+            raise InvalidImage('Upload a valid image.')
@@ -0,0 +1,170 @@
+"""Django command to load benchmark the API"""
+import contextlib
+import json
+import threading
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import (
+    ThreadedWSGIServer,
+    WSGIRequestHandler,
+    get_internal_wsgi_application,
+)
+from django.test.utils import override_settings
+
+from core import benchmarks
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    """Request handler that does not log every request"""
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    """Django command to benchmark throughput and latency of the API"""
+    help = 'Run load scenarios against the API and report rps and latencies'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            help='Base URL of a running server where the benchmark user '
+                 'exists and rate limits are raised, by default one is '
+                 'started without rate limits',
+        )
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            choices=sorted(benchmarks.SCENARIOS),
+            help='Scenario to run, may be repeated (default: all)',
+        )
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument(
+            '--sweep',
+            help='Comma separated concurrency levels to run each scenario '
+                 'at, e.g. 1,8,32,128 to compare WSGI and ASGI scaling',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--email', default='bench@example.com')
+        parser.add_argument('--password', default='bench-pass-123')
+        parser.add_argument('--output', help='Write the JSON report here')
+        parser.add_argument(
+            '--baseline',
+            help='JSON report to compare against, regressions fail',
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.10,
+            help='Allowed relative regression against the baseline',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        levels = [options['concurrency']]
+        if options['sweep']:
+            try:
+                levels = [int(level) for level in options['sweep'].split(',')]
+            except ValueError:
+                raise CommandError('sweep must be a list of integers.')
+        if options['requests'] < 1 or min(levels) < 1:
+            raise CommandError('requests and concurrency must be positive.')
+        options['levels'] = levels
+
+        server = None
+        limits = contextlib.nullcontext()
+        base_url = options['url']
+        if not base_url:
+            # a remote server has its own database, create the user there
+            self.ensure_user(options['email'], options['password'])
+            # measure the endpoints, not the throttle turning the load away
+            limits = override_settings(RATE_LIMITS={})
+            server = self.start_server()
+            base_url = 'http://%s:%s' % server.server_address[:2]
+
+        try:
+            with limits:
+                report = self.run(base_url, options)
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        self.stdout.write(output)
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            regressions = benchmarks.compare(
+                report, baseline, options['tolerance'],
+            )
+            if regressions:
+                raise CommandError(
+                    'Performance regressions found:\n' + '\n'.join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS('No regressions found.'))
+
+    def ensure_user(self, email, password):
+        """Create the benchmark user in the local database"""
+        user_model = get_user_model()
+        if not user_model.objects.filter(email=email).exists():
+            user_model.objects.create_user(
+                email=email,
+                password=password,
+                name='bench',
+                is_staff=True,
+            )
+
+    def start_server(self):
+        """Serve the app from a background thread on a free port"""
+        server = ThreadedWSGIServer(('127.0.0.1', 0), QuietRequestHandler)
+        server.set_app(get_internal_wsgi_application())
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+
+        return server
+
+    def run(self, base_url, options):
+        """Run every selected scenario and return the report"""
+        context = {
+            'email': options['email'],
+            'password': options['password'],
+        }
+        client = benchmarks.Client(base_url)
+        status_code, body = client.request(
+            'POST', '/api/user/token/', context, token=False,
+        )
+        if status_code != 200:
+            raise CommandError(
+                f'Login of the benchmark user failed ({status_code}).'
+            )
+        client.token = json.loads(body)['token']
+
+        report = {
+            'url': base_url,
+            'requests': options['requests'],
+            'concurrency': options['levels'],
+            'seed': options['seed'],
+            'scenarios': {},
+        }
+        sweep = len(options['levels']) > 1
+        for name in options['scenario'] or sorted(benchmarks.SCENARIOS):
+            for concurrency in options['levels']:
+                key = f'{name}@{concurrency}' if sweep else name
+                self.stderr.write(f'Running {key}...')
+                report['scenarios'][key] = benchmarks.run_scenario(
+                    benchmarks.SCENARIOS[name],
+                    client,
+                    context,
+                    options['requests'],
+                    concurrency,
+                    seed=options['seed'],
+                )
+
+        return report
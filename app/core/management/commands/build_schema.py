@@ -0,0 +1,29 @@
+"""Django command to build the OpenAPI schema ahead of time"""
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import schema
+
+
+class Command(BaseCommand):
+    """Django command to write the OpenAPI schema served by the API"""
+    help = 'Generate the OpenAPI schema into OPENAPI_SCHEMA_FILE'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            help='File to write (default: OPENAPI_SCHEMA_FILE)',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        path = options['output'] or settings.OPENAPI_SCHEMA_FILE
+        if not path:
+            raise CommandError('No output file given.')
+
+        with open(path, 'w') as f:
+            json.dump(schema.generate(), f, indent=2, sort_keys=True)
+
+        self.stdout.write(self.style.SUCCESS(f'Schema written to {path}.'))
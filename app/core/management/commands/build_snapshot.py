@@ -0,0 +1,37 @@
+"""Django command to build the catalog snapshot for offline clients"""
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import snapshots
+
+
+class Command(BaseCommand):
+    """Django command to write a snapshot of the current catalog"""
+    help = 'Build the compressed catalog snapshot if the catalog changed'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Build even if the newest snapshot is current',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        latest = snapshots.latest()
+        if (
+            not options['force'] and latest is not None
+            and latest[0] >= snapshots.current_version()
+        ):
+            self.stdout.write(f'Snapshot {latest[0]} is current.')
+            return
+
+        version, digest = snapshots.build()
+        size = os.path.getsize(
+            os.path.join(settings.MEDIA_ROOT, snapshots.name(version, digest)),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Snapshot {version} written, {size / 1024:.1f} KB.'
+        ))
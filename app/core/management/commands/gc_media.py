@@ -0,0 +1,155 @@
+"""Django command to delete media files nothing references"""
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.models import Recipe
+from core.storage import delete_unreferenced
+
+
+def name_key(name):
+    """Return a compact 64 bit key of a media file name
+
+    A collision only keeps an unreferenced file, it never deletes one.
+    """
+    return int.from_bytes(
+        hashlib.blake2b(name.encode(), digest_size=8).digest(), 'big',
+    )
+
+
+def referenced_keys():
+    """Return the keys of every image a recipe refers to"""
+    names = (
+        Recipe.objects.exclude(image__isnull=True).exclude(image='')
+        .values_list('image', flat=True)
+        .iterator(chunk_size=5000)
+    )
+    return {name_key(name) for name in names}
+
+
+def walk(root, prefix=''):
+    """Yield (name, size, mtime) of the files under root, one dir at a time"""
+    try:
+        entries = list(os.scandir(root))
+    except FileNotFoundError:
+        return
+
+    for entry in entries:
+        name = f'{prefix}{entry.name}'
+        if entry.is_dir(follow_symlinks=False):
+            yield from walk(entry.path, f'{name}/')
+        elif entry.is_file(follow_symlinks=False):
+            try:
+                stat = entry.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                continue
+            yield name, stat.st_size, stat.st_mtime
+
+
+def collect(names):
+    """Delete files from a worker thread and return their sizes"""
+    try:
+        return [delete_unreferenced(name) for name in names]
+    finally:
+        # worker threads open their own connections
+        connection.close()
+
+
+class Command(BaseCommand):
+    """Django command to garbage collect orphaned media files"""
+    help = 'Delete uploaded files no recipe references any more'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=os.path.join('uploads', 'recipe'),
+            help='Directory under MEDIA_ROOT to collect',
+        )
+        parser.add_argument(
+            '--grace',
+            type=float,
+            default=24,
+            help='Hours a file is kept after it was written',
+        )
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report what would be deleted',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        if options['workers'] < 1 or options['batch_size'] < 1:
+            raise CommandError('workers and batch size must be positive.')
+
+        # files written after this were possibly not referenced yet when
+        # the references were read, so they are never collected
+        cutoff = time.time() - options['grace'] * 3600
+        referenced = referenced_keys()
+
+        prefix = options['path'].strip('/') + '/'
+        candidates = (
+            (name, size) for name, size, mtime in walk(
+                os.path.join(settings.MEDIA_ROOT, prefix), prefix,
+            )
+            if mtime < cutoff and name_key(name) not in referenced
+        )
+
+        if options['dry_run']:
+            count = reclaimed = 0
+            for name, size in candidates:
+                self.stdout.write(name)
+                count += 1
+                reclaimed += size
+            self.stdout.write(
+                f'Would delete {count} files, {reclaimed / 2**20:.1f} MB.'
+            )
+            return
+
+        count, reclaimed = self.delete(candidates, options)
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {count} files, reclaimed {reclaimed / 2**20:.1f} MB.'
+        ))
+
+    def delete(self, candidates, options):
+        """Delete the candidates in batches, return count and bytes"""
+        count = reclaimed = 0
+        names = (name for name, size in candidates)
+        executor = None
+        # sqlite has a single writer, threads would only fail on its lock
+        if options['workers'] > 1 and connection.vendor != 'sqlite':
+            executor = ThreadPoolExecutor(max_workers=options['workers'])
+
+        try:
+            while True:
+                batch = list(islice(names, options['batch_size']))
+                if not batch:
+                    break
+
+                if executor is None:
+                    sizes = map(delete_unreferenced, batch)
+                else:
+                    workers = options['workers']
+                    sizes = [
+                        size for sizes in executor.map(collect, [
+                            batch[i::workers] for i in range(workers)
+                        ])
+                        for size in sizes
+                    ]
+                for size in sizes:
+                    if size is not None:
+                        count += 1
+                        reclaimed += size
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        return count, reclaimed
@@ -0,0 +1,105 @@
+"""Django command to report the import cost of the modules loaded at boot"""
+import os
+import subprocess
+import sys
+from collections import defaultdict, namedtuple
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+ImportTime = namedtuple('ImportTime', 'name depth self_us cumulative_us')
+
+
+def parse_importtime(output):
+    """Return the ImportTime entries of python -X importtime output"""
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split(
+                '|',
+            )
+            self_us, cumulative_us = int(self_us), int(cumulative_us)
+        except ValueError:
+            # the header line
+            continue
+        # nested imports are indented by two spaces per level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append(
+            ImportTime(name.strip(), depth, self_us, cumulative_us),
+        )
+    return entries
+
+
+def profile_imports(modules):
+    """Import the modules in a fresh interpreter and return the entries"""
+    statement = '; '.join(f'import {module}' for module in modules)
+    env = dict(os.environ)
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=settings.BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode:
+        raise CommandError(result.stderr.strip().splitlines()[-1])
+
+    return parse_importtime(result.stderr)
+
+
+def total_us(entries):
+    """Return the wall time spent importing, from the top level imports"""
+    return sum(entry.cumulative_us for entry in entries if entry.depth == 0)
+
+
+class Command(BaseCommand):
+    """Django command to profile the import time of a cold start"""
+    help = 'Report the cumulative import cost per module of a cold start'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'modules',
+            nargs='*',
+            help='Modules to import (default: app.wsgi and the urls)',
+        )
+        parser.add_argument('--top', type=int, default=25)
+        parser.add_argument(
+            '--packages',
+            action='store_true',
+            help='Sum the self time per top level package instead',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        modules = options['modules'] or ['app.wsgi', settings.ROOT_URLCONF]
+        entries = profile_imports(modules)
+
+        if options['packages']:
+            packages = defaultdict(int)
+            for entry in entries:
+                packages[entry.name.partition('.')[0]] += entry.self_us
+            rows = sorted(
+                packages.items(), key=lambda item: item[1], reverse=True,
+            )
+            self.stdout.write(f'{"self ms":>10}  package')
+            for name, self_us in rows[:options['top']]:
+                self.stdout.write(f'{self_us / 1000:>10.1f}  {name}')
+        else:
+            rows = sorted(
+                entries, key=lambda entry: entry.cumulative_us, reverse=True,
+            )
+            self.stdout.write(f'{"cum ms":>10}{"self ms":>10}  module')
+            for entry in rows[:options['top']]:
+                self.stdout.write(
+                    f'{entry.cumulative_us / 1000:>10.1f}'
+                    f'{entry.self_us / 1000:>10.1f}  {entry.name}'
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {len(entries)} modules in '
+            f'{total_us(entries) / 1000:.1f} ms.'
+        ))
@@ -0,0 +1,89 @@
+"""Django command to bulk load barcodes of foods from a CSV dataset"""
+import csv
+import itertools
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core import barcodes
+from core.models import Food, FoodBarcode
+
+
+class Command(BaseCommand):
+    """Django command to load a barcode dataset"""
+    help = 'Load code,food_id rows of a CSV file (- for stdin) as barcodes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--code-column',
+            default='code',
+            help='Column holding the EAN/UPC code',
+        )
+        parser.add_argument(
+            '--food-column',
+            default='food_id',
+            help='Column holding the id of the food',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        if options['batch_size'] < 1:
+            raise CommandError('batch size must be positive.')
+
+        if options['file'] == '-':
+            self.load(sys.stdin, options)
+        else:
+            with open(options['file'], newline='') as f:
+                self.load(f, options)
+
+    def load(self, f, options):
+        """Load the rows of an open CSV file in batches"""
+        reader = csv.DictReader(f)
+        missing = {options['code_column'], options['food_column']} - set(
+            reader.fieldnames or [],
+        )
+        if missing:
+            raise CommandError(f'Missing columns: {", ".join(sorted(missing))}')
+
+        loaded = invalid = unknown = 0
+        while True:
+            rows = list(itertools.islice(reader, options['batch_size']))
+            if not rows:
+                break
+
+            # the last row of a code wins, like it would with single updates
+            codes = {}
+            for row in rows:
+                try:
+                    code = barcodes.normalise(row[options['code_column']])
+                    codes[code] = int(row[options['food_column']])
+                except (barcodes.InvalidBarcode, TypeError, ValueError):
+                    invalid += 1
+
+            foods = set(Food.objects.filter(
+                pk__in=set(codes.values()),
+            ).values_list('id', flat=True))
+            objs = [
+                FoodBarcode(code=code, food_id=food_id)
+                for code, food_id in codes.items() if food_id in foods
+            ]
+            unknown += len(codes) - len(objs)
+
+            with transaction.atomic():
+                FoodBarcode.objects.bulk_create(
+                    objs,
+                    update_conflicts=True,
+                    unique_fields=['code'],
+                    update_fields=['food'],
+                )
+            # bulk writes send no signals
+            barcodes.invalidate([obj.code for obj in objs])
+            loaded += len(objs)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Loaded {loaded} barcodes, skipped {invalid} invalid codes and '
+            f'{unknown} codes of unknown foods.'
+        ))
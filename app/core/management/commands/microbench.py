@@ -0,0 +1,39 @@
+"""Django command to run micro benchmarks"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmarks
+
+
+class Command(BaseCommand):
+    """Django command to measure the cost of single components"""
+    help = 'Measure the per call cost of components like the rate limiter'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'names',
+            nargs='*',
+            help='Benchmarks to run, one of {} (default: all)'.format(
+                ', '.join(sorted(benchmarks.MICROBENCHMARKS)),
+            ),
+        )
+        parser.add_argument('--iterations', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        names = options['names'] or sorted(benchmarks.MICROBENCHMARKS)
+        unknown = set(names) - set(benchmarks.MICROBENCHMARKS)
+        if unknown:
+            raise CommandError(
+                'Unknown benchmarks: ' + ', '.join(sorted(unknown))
+            )
+
+        report = {}
+        for name in names:
+            self.stderr.write(f'Running {name}...')
+            report[name] = benchmarks.MICROBENCHMARKS[name](
+                options['iterations'],
+            )
+
+        self.stdout.write(json.dumps(report, indent=2))
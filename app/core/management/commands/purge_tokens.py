@@ -0,0 +1,52 @@
+"""Django command to delete expired auth tokens"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import AuthToken
+
+
+class Command(BaseCommand):
+    """Django command to purge expired tokens in small batches"""
+    help = 'Delete expired auth tokens without holding long locks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0.0,
+            help='Seconds to sleep between batches',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        if options['batch_size'] < 1:
+            raise CommandError('batch size must be positive.')
+
+        now = timezone.now()
+        total = 0
+        while True:
+            # each batch is its own short transaction, rows locked by
+            # a concurrent renewal are left for the next run
+            with transaction.atomic():
+                keys = list(
+                    AuthToken.objects
+                    .select_for_update(skip_locked=True)
+                    .filter(expires__lte=now)
+                    .order_by('expires')
+                    .values_list('key', flat=True)[:options['batch_size']]
+                )
+                if not keys:
+                    break
+                deleted, _ = AuthToken.objects.filter(key__in=keys).delete()
+            total += deleted
+
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Deleted {total} expired tokens.')
+        )
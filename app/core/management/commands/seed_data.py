@@ -0,0 +1,367 @@
+"""Django command to seed the database with large synthetic datasets"""
+import csv
+import datetime
+import io
+import itertools
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models, transaction
+
+from core import changes
+from core.fields import TenthsField
+from core.models import Food, Recipe, Activity
+
+
+# food groups: (name, weight, protein, carbs, fat) with ranges per 100g
+FOOD_GROUPS = [
+    ('legume', 20, (0.5, 3.0), (2.0, 10.0), (0.0, 0.5)),
+    ('fructe', 15, (0.3, 1.5), (8.0, 20.0), (0.0, 0.5)),
+    ('cereale', 15, (7.0, 13.0), (60.0, 80.0), (1.0, 5.0)),
+    ('lactate', 10, (3.0, 25.0), (3.0, 6.0), (1.0, 30.0)),
+    ('carne', 12, (15.0, 30.0), (0.0, 1.0), (2.0, 25.0)),
+    ('peste', 6, (17.0, 25.0), (0.0, 0.5), (1.0, 15.0)),
+    ('dulciuri', 10, (2.0, 8.0), (40.0, 70.0), (10.0, 35.0)),
+    ('bauturi', 7, (0.0, 1.0), (0.0, 12.0), (0.0, 0.2)),
+    ('leguminoase', 5, (6.0, 25.0), (15.0, 60.0), (0.5, 6.0)),
+]
+
+FOOD_NAMES = {
+    'legume': ['rosii', 'castraveti', 'ardei', 'morcovi', 'cartofi', 'varza',
+               'ceapa', 'dovlecei', 'spanac', 'broccoli'],
+    'fructe': ['mar', 'banana', 'portocala', 'struguri', 'capsuni', 'para',
+               'piersica', 'cirese', 'kiwi', 'pepene'],
+    'cereale': ['paine', 'orez', 'paste', 'ovaz', 'malai', 'cornflakes',
+                'chifla', 'covrig', 'biscuiti', 'lipie'],
+    'lactate': ['lapte', 'iaurt', 'branza', 'telemea', 'cascaval', 'smantana',
+                'unt', 'kefir', 'urda', 'mozzarella'],
+    'carne': ['pui', 'porc', 'vita', 'curcan', 'sunca', 'salam', 'carnati',
+              'mici', 'parizer', 'bacon'],
+    'peste': ['somon', 'ton', 'pastrav', 'crap', 'macrou', 'sardine', 'hering',
+              'cod', 'creveti', 'calamar'],
+    'dulciuri': ['ciocolata', 'napolitane', 'prajitura', 'inghetata', 'miere',
+                 'gem', 'halva', 'cozonac', 'bomboane', 'chec'],
+    'bauturi': ['suc', 'cafea', 'ceai', 'bere', 'vin', 'limonada', 'cola',
+                'apa minerala', 'smoothie', 'socata'],
+    'leguminoase': ['fasole', 'linte', 'naut', 'mazare', 'soia', 'bob',
+                    'arahide', 'humus', 'tofu', 'edamame'],
+}
+
+FOOD_STYLES = ['', '', '', 'fiert', 'copt', 'prajit', 'la gratar', 'crud',
+               'integral', 'light', 'bio', 'de casa']
+
+BRANDS = ['', '', '', '', 'Napolact', 'Covalact', 'Boromir', 'Vel Pitar',
+          'Agricola', 'Cris-Tim', 'Fulga', 'Olympus']
+
+ESTIMATES = ['1 buc = {}g', '1 felie = {}g', '1 portie = {}g', '1 cana = {}g']
+
+RECIPE_CATEGORIES = [
+    ('Mic dejun', 25),
+    ('Pranz', 30),
+    ('Cina', 20),
+    ('Gustare', 10),
+    ('Desert', 8),
+    ('Supa', 4),
+    ('Salata', 3),
+]
+
+RECIPE_STYLES = ['cu', 'si', 'in sos de', 'umplut cu', 'pe pat de']
+
+ACTIVITIES = [
+    ('Mers pe jos', 3.5),
+    ('Alergare', 9.8),
+    ('Ciclism', 7.5),
+    ('Inot', 8.0),
+    ('Yoga', 2.5),
+    ('Fitness', 6.0),
+    ('Dans', 5.0),
+    ('Fotbal', 7.0),
+    ('Tenis', 7.3),
+    ('Drumetie', 6.0),
+    ('Schi', 7.0),
+    ('Treburi casnice', 3.0),
+]
+
+INTENSITIES = [('usor', 0.7), ('moderat', 1.0), ('intens', 1.4)]
+
+
+def cumulative(weights):
+    """Return cumulative weights for random.choices"""
+    return list(itertools.accumulate(weights))
+
+
+def tenths(value):
+    """Return a number as the integer of tenths a TenthsField stores"""
+    return round(value * 10)
+
+
+class Command(BaseCommand):
+    """Django command to generate realistic synthetic data"""
+    help = 'Generate large volumes of users, foods, recipes and activities'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--foods', type=int, default=100000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--activities', type=int, default=1000)
+        parser.add_argument('--editors', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument(
+            '--password',
+            default='seed-pass-123',
+            help='Password shared by every generated user',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        if options['editors'] < 1:
+            raise CommandError('At least one editor is required.')
+        if options['batch_size'] < 1:
+            raise CommandError('batch size must be positive.')
+
+        self.seed = options['seed']
+        self.batch_size = options['batch_size']
+        self.use_copy = connection.vendor == 'postgresql'
+
+        # hashing is slow on purpose, every generated user shares one hash
+        password = make_password(options['password'])
+
+        user_model = get_user_model()
+        first_user = (user_model.objects.order_by('-id').values_list(
+            'id', flat=True).first() or 0) + 1
+
+        self.write(user_model, self.users(
+            options['editors'], True, password, first_user,
+        ))
+        self.write(user_model, self.users(
+            options['users'], False, password,
+            first_user + options['editors'],
+        ))
+
+        # generated catalog entries are owned by the new editors
+        self.editors = list(user_model.objects.filter(email__in=[
+            f'editor{n}@seed.example.com'
+            for n in range(first_user, first_user + options['editors'])
+        ]).order_by('id').values_list('id', flat=True))
+
+        for kind, model, rows in [
+            ('food', Food, self.foods(options['foods'])),
+            ('recipe', Recipe, self.recipes(options['recipes'])),
+            ('activity', Activity, self.activities(options['activities'])),
+        ]:
+            last_id = model.objects.order_by('-id').values_list(
+                'id', flat=True,
+            ).first() or 0
+            self.write(model, rows)
+            # bulk writes send no signals, delta syncs still need the rows
+            start = time.perf_counter()
+            changes.record_inserted(kind, last_id)
+            self.stdout.write(
+                f'{kind} changes recorded in '
+                f'{time.perf_counter() - start:.1f}s'
+            )
+
+        self.stdout.write(self.style.SUCCESS('Seed data created!'))
+
+    def write(self, model, rows):
+        """Write generated rows of (field name -> stored value) in batches"""
+        start = time.perf_counter()
+        total = 0
+        rows = iter(rows)
+        columns = None
+        while True:
+            batch = list(itertools.islice(rows, self.batch_size))
+            if not batch:
+                break
+            if columns is None:
+                columns, prepare, default_values = self.columns(
+                    model, list(batch[0]),
+                )
+            values = [
+                [
+                    value if prep is None else prep(value, connection)
+                    for prep, value in zip(prepare, row.values())
+                ] + default_values
+                for row in batch
+            ]
+            with transaction.atomic():
+                if self.use_copy:
+                    self.copy(model, columns, values)
+                else:
+                    self.insert(model, columns, values)
+            total += len(batch)
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'{model._meta.verbose_name_plural}: {total} rows '
+            f'in {elapsed:.1f}s'
+        )
+
+    def columns(self, model, names):
+        """Return the columns, value preparation and defaults of the rows"""
+        given = [model._meta.get_field(name) for name in names]
+        defaults = [
+            field for field in model._meta.concrete_fields
+            if not field.primary_key and field not in given
+        ]
+        # generated as stored: nutrient values are integers of tenths
+        raw = (TenthsField, models.CharField, models.TextField)
+        prepare = [
+            None if isinstance(field, raw) else field.get_db_prep_save
+            for field in given
+        ]
+        default_values = [
+            field.get_db_prep_save(field.get_default(), connection)
+            for field in defaults
+        ]
+        return (
+            [field.column for field in given + defaults],
+            prepare,
+            default_values,
+        )
+
+    def insert(self, model, columns, values):
+        """Insert a batch of stored values with one executemany"""
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            connection.ops.quote_name(model._meta.db_table),
+            ', '.join(connection.ops.quote_name(c) for c in columns),
+            ', '.join(['%s'] * len(columns)),
+        )
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, values)
+
+    def copy(self, model, columns, values):
+        """Stream a batch of stored values into PostgreSQL with COPY"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerows(
+            [r'\N' if value is None else value for value in row]
+            for row in values
+        )
+        buffer.seek(0)
+
+        sql = r"COPY {} ({}) FROM STDIN WITH (FORMAT csv, NULL '\N')".format(
+            connection.ops.quote_name(model._meta.db_table),
+            ', '.join(connection.ops.quote_name(c) for c in columns),
+        )
+        with connection.cursor() as cursor:
+            cursor.copy_expert(sql, buffer)
+
+    def random(self, name):
+        """Return an independent random stream for one dataset"""
+        return random.Random(f'{self.seed}:{name}')
+
+    def users(self, count, is_staff, password, first_id):
+        """Generate users with plausible body measurements"""
+        rng = self.random('editors' if is_staff else 'users')
+        today = datetime.date.today()
+        kind = 'editor' if is_staff else 'user'
+        for n in range(first_id, first_id + count):
+            gender = rng.choice([1, 2])
+            height = rng.gauss(178 if gender == 1 else 165, 7)
+            bmi = min(max(rng.gauss(25, 4), 17), 40)
+            weight = bmi * (height / 100) ** 2
+            yield {
+                'email': f'{kind}{n}@seed.example.com',
+                'name': f'{kind}{n}',
+                'fullname': f'Seed {kind.title()} {n}',
+                'password': password,
+                'is_staff': is_staff,
+                'gender': gender,
+                'height': tenths(height),
+                'weight': tenths(weight),
+                'calorie_goal': tenths(rng.choice([1500, 1800, 2000, 2200,
+                                                   2500])),
+                'activity_factor': rng.choices([1, 2, 3, 4, 5],
+                                               [30, 30, 20, 15, 5])[0],
+                'dob': today - datetime.timedelta(
+                    days=int(rng.uniform(18, 70) * 365.25),
+                ),
+            }
+
+    def foods(self, count):
+        """Generate foods whose calories follow from their macros"""
+        rng = self.random('foods')
+        groups = FOOD_GROUPS
+        group_weights = cumulative([group[1] for group in groups])
+        # a few names and brands are far more common than the rest
+        name_weights = cumulative([1 / (i + 1) for i in range(10)])
+        editors = self.editors
+        for _ in range(count):
+            name, _weight, protein, carbs, fat = rng.choices(
+                groups, cum_weights=group_weights,
+            )[0]
+            noun = rng.choices(FOOD_NAMES[name], cum_weights=name_weights)[0]
+            title = ' '.join(filter(None, [
+                noun.capitalize(),
+                rng.choice(FOOD_STYLES),
+                rng.choice(BRANDS),
+            ]))
+            p = rng.uniform(*protein)
+            c = rng.uniform(*carbs)
+            f = rng.uniform(*fat)
+            estimates = ''
+            if rng.random() < 0.6:
+                estimates = rng.choice(ESTIMATES).format(
+                    rng.choice([15, 30, 50, 100, 150, 200, 250]),
+                )
+            yield {
+                'user_id': rng.choice(editors),
+                'title': title,
+                'calories': tenths((4 * p + 4 * c + 9 * f) *
+                                   rng.uniform(0.95, 1.05)),
+                'carbs': tenths(c),
+                'fibers': tenths(c * rng.uniform(0.0, 0.15)),
+                'fat': tenths(f),
+                'protein': tenths(p),
+                'estimates': estimates,
+            }
+
+    def recipes(self, count):
+        """Generate recipes with skewed categories and prep times"""
+        rng = self.random('recipes')
+        categories = [category for category, _ in RECIPE_CATEGORIES]
+        category_weights = cumulative(
+            [weight for _, weight in RECIPE_CATEGORIES]
+        )
+        nouns = [noun for names in FOOD_NAMES.values() for noun in names]
+        editors = self.editors
+        for _ in range(count):
+            main, side = rng.sample(nouns, 2)
+            p = rng.uniform(5, 50)
+            c = rng.uniform(5, 120)
+            f = rng.uniform(2, 50)
+            yield {
+                'user_id': rng.choice(editors),
+                'title': f'{main.capitalize()} {rng.choice(RECIPE_STYLES)} '
+                         f'{side}',
+                'category': rng.choices(
+                    categories, cum_weights=category_weights,
+                )[0],
+                'time_minutes': int(min(max(rng.lognormvariate(3.3, 0.6), 5),
+                                        240)),
+                'calories': tenths(4 * p + 4 * c + 9 * f),
+                'protein': tenths(p),
+                'carbs': tenths(c),
+                'fibers': tenths(c * rng.uniform(0.02, 0.2)),
+                'fat': tenths(f),
+                'description': f'Reteta de {main} cu {side}.',
+                'ingredients': f'{main}, {side}',
+            }
+
+    def activities(self, count):
+        """Generate activities around known MET values"""
+        rng = self.random('activities')
+        editors = self.editors
+        for n in range(count):
+            title, met = ACTIVITIES[n % len(ACTIVITIES)]
+            intensity, factor = rng.choice(INTENSITIES)
+            yield {
+                'user_id': rng.choice(editors),
+                'title': f'{title} {intensity}',
+                'met': tenths(met * factor),
+            }
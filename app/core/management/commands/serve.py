@@ -0,0 +1,168 @@
+"""Django command to serve the app in production"""
+import os
+import shutil
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from gunicorn.app.base import BaseApplication
+
+from core import snapshots, trending, warmup
+
+
+def cpu_count():
+    """Return the number of CPUs this process may run on"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def post_worker_init(worker):
+    """Open the database connections before the worker takes requests"""
+    warmup.warm_db()
+
+
+def worker_exit(server, worker):
+    """Write the usage counters a worker still holds"""
+    trending.flush()
+
+
+def child_exit(server, worker):
+    """Drop the metric files of a dead worker"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
+
+
+class Application(BaseApplication):
+    """Gunicorn application serving the preloaded Django app"""
+
+    def __init__(self, loader, options):
+        self.loader = loader
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return self.loader()
+
+
+class Command(BaseCommand):
+    """Django command to serve the app with preforked workers"""
+    help = 'Serve the app with gunicorn, preloaded and warmed up'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bind', default='0.0.0.0:8000')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Worker processes (default: 2 x CPUs + 1)',
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=1,
+            help='Threads per worker, more than one uses gthread workers',
+        )
+        parser.add_argument(
+            '--asgi',
+            action='store_true',
+            help='Serve app.asgi with uvicorn workers',
+        )
+        parser.add_argument(
+            '--max-requests',
+            type=int,
+            default=1000,
+            help='Recycle a worker after this many requests, 0 disables',
+        )
+        parser.add_argument('--max-requests-jitter', type=int, default=100)
+        parser.add_argument('--timeout', type=int, default=30)
+        parser.add_argument('--graceful-timeout', type=int, default=30)
+        parser.add_argument('--keepalive', type=int, default=5)
+        parser.add_argument(
+            '--no-warmup',
+            action='store_true',
+            help='Skip warming up the app before forking',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        self.prepare_metrics_dir()
+        # partial files of snapshot builds killed with a previous server
+        snapshots.remove_stale_tmp()
+
+        # the app is loaded once in the master and shared copy-on-write
+        # with the workers; SIGHUP restarts the workers gracefully
+        gunicorn_options = self.gunicorn_options(options)
+        self.stdout.write(
+            'Serving on {bind} with {workers} workers x {threads} threads'
+            .format(**gunicorn_options)
+        )
+        Application(
+            lambda: self.load_app(options), gunicorn_options,
+        ).run()
+
+    def gunicorn_options(self, options):
+        """Return the gunicorn settings for the command options"""
+        workers = options['workers'] or cpu_count() * 2 + 1
+        threads = options['threads']
+        if options['asgi']:
+            worker_class = 'uvicorn.workers.UvicornWorker'
+        elif threads > 1:
+            worker_class = 'gthread'
+        else:
+            worker_class = 'sync'
+
+        gunicorn_options = {
+            'bind': options['bind'],
+            'workers': workers,
+            'threads': threads,
+            'worker_class': worker_class,
+            'preload_app': True,
+            'max_requests': options['max_requests'],
+            'max_requests_jitter': options['max_requests_jitter'],
+            'timeout': options['timeout'],
+            'graceful_timeout': options['graceful_timeout'],
+            'keepalive': options['keepalive'],
+            'worker_exit': worker_exit,
+            'child_exit': child_exit,
+            'accesslog': '-',
+        }
+        # sync workers serve requests on the thread opening the connections,
+        # gthread and ASGI workers open one per request thread instead
+        if worker_class == 'sync':
+            gunicorn_options['post_worker_init'] = post_worker_init
+        # heartbeat files on a tmpfs avoid blocking on a slow disk
+        if os.path.isdir('/dev/shm'):
+            gunicorn_options['worker_tmp_dir'] = '/dev/shm'
+
+        return gunicorn_options
+
+    def load_app(self, options):
+        """Load and warm up the app in the master process"""
+        if options['asgi']:
+            from app.asgi import application
+        else:
+            from app.wsgi import application
+
+        if not options['no_warmup']:
+            warmup.warm_up()
+
+        # connections must not be shared with the forked workers
+        connections.close_all()
+
+        return application
+
+    def prepare_metrics_dir(self):
+        """Start with an empty directory for multiprocess metrics"""
+        path = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+        if not path:
+            return
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
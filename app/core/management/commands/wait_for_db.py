@@ -1,25 +1,94 @@
 """Django command to wait for the database to be available"""
+import random
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 from psycopg2 import OperationalError as Psycopg2Error
 
+from django.db import connections
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+
+
+def backoff(attempt, interval, max_interval):
+    """Return the jittered delay before the next probe"""
+    delay = min(max_interval, interval * 2 ** attempt)
+    # jitter spreads the probes of containers started at the same time
+    return delay * random.uniform(0.5, 1)
 
 
 class Command(BaseCommand):
     """Django command to wait for database"""
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            action='append',
+            dest='databases',
+            help='Database alias to wait for, can be repeated '
+                 '(default: default)',
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=60,
+            help='Seconds to wait before giving up',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0.1,
+            help='Seconds before the first retry, doubled on every retry',
+        )
+        parser.add_argument(
+            '--max-interval',
+            type=float,
+            default=2,
+            help='Longest pause between two probes',
+        )
+
     def handle(self, *args, **options):
         """Entrypoint for command"""
+        aliases = options['databases'] or ['default']
+        deadline = time.monotonic() + options['timeout']
+
         self.stdout.write('Wait for database...')
-        db_up = False
-        while db_up is False:
-            try:
-                self.check(databases=['default'])
-                db_up = True
-            except (Psycopg2Error, OperationalError):
-                self.stdout.write('Database unavailable, waiting 1 second...')
-                time.sleep(1)
+        if len(aliases) == 1:
+            self.wait(aliases[0], deadline, options)
+        else:
+            with ThreadPoolExecutor(max_workers=len(aliases)) as executor:
+                list(executor.map(
+                    lambda alias: self.wait(alias, deadline, options),
+                    aliases,
+                ))
 
         self.stdout.write(self.style.SUCCESS('Database available!'))
+
+    def wait(self, alias, deadline, options):
+        """Probe a database until it is available or the deadline passed"""
+        attempt = 0
+        try:
+            while True:
+                try:
+                    self.check(databases=[alias])
+                    return
+                except (Psycopg2Error, OperationalError):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise CommandError(
+                            f'Database {alias} unavailable after '
+                            f'{options["timeout"]:g} seconds.'
+                        )
+
+                    delay = min(remaining, backoff(
+                        attempt, options['interval'], options['max_interval'],
+                    ))
+                    self.stdout.write(
+                        f'Database {alias} unavailable, '
+                        f'waiting {delay:.2f} seconds...'
+                    )
+                    time.sleep(delay)
+                    attempt += 1
+        finally:
+            # connections are per thread, do not leave them open
+            connections[alias].close()
@@ -0,0 +1,186 @@
+"""Serve media files without streaming them through the workers
+
+With MEDIA_SENDFILE set, Django only decides whether a file may be served and
+hands the transfer to the web server with X-Accel-Redirect (nginx) or
+X-Sendfile (apache). Otherwise the file is returned with a FileResponse that
+servers supporting wsgi.file_wrapper send with sendfile().
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+
+
+# files are never rewritten under the same name
+CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    """The requested range lies outside the file"""
+
+
+def parse_range(header, size):
+    """Return the inclusive (start, end) of a single byte range or None
+
+    Multiple ranges and malformed headers are ignored, the whole file is
+    served instead as allowed by RFC 9110.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if match is None:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+
+    if not first:
+        # suffix range, the last bytes of the file
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable()
+
+    return start, end
+
+
+class FileRange:
+    """File object limited to a byte range of an open file
+
+    fileno() is kept, so sendfile capable servers send the range from the
+    current offset up to the Content-Length without reading it in Python.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def media_path(name):
+    """Return the absolute path of a media file or raise Http404"""
+    try:
+        return safe_join(settings.MEDIA_ROOT, name)
+    except (SuspiciousFileOperation, ValueError):
+        raise Http404()
+
+
+def content_type(name):
+    """Return the content type of a file name"""
+    return mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+
+def sendfile_response(name, path, etag=None):
+    """Return an empty response telling the web server to send the file"""
+    response = HttpResponse(content_type=content_type(name))
+    if settings.MEDIA_SENDFILE == 'nginx':
+        response['X-Accel-Redirect'] = (
+            settings.MEDIA_SENDFILE_PREFIX + quote(name)
+        )
+    elif settings.MEDIA_SENDFILE == 'apache':
+        response['X-Sendfile'] = path
+    else:
+        raise ValueError(
+            f'Unknown MEDIA_SENDFILE {settings.MEDIA_SENDFILE!r}.'
+        )
+    if etag is not None:
+        response['ETag'] = etag
+    response['Cache-Control'] = CACHE_CONTROL
+
+    return response
+
+
+def file_response(request, name, path, etag=None):
+    """Return the file honouring If-None-Match, If-Modified-Since and Range"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        raise Http404()
+    if not os.path.isfile(path):
+        raise Http404()
+
+    last_modified = http_date(stat.st_mtime)
+    since = parse_http_date_safe(
+        request.headers.get('If-Modified-Since', ''),
+    )
+    if_none_match = request.headers.get('If-None-Match')
+    # If-Modified-Since is ignored when If-None-Match is sent
+    if if_none_match is not None:
+        not_modified = etag is not None and etag in parse_etags(if_none_match)
+    else:
+        not_modified = since is not None and int(stat.st_mtime) <= since
+    if not_modified:
+        response = HttpResponse(status=304)
+        response['Last-Modified'] = last_modified
+        if etag is not None:
+            response['ETag'] = etag
+        response['Cache-Control'] = CACHE_CONTROL
+        return response
+
+    # a range of a file changed since is stale, send the whole file
+    header = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    if if_range is not None and if_range not in (last_modified, etag):
+        header = None
+
+    try:
+        byte_range = parse_range(header, stat.st_size)
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return response
+
+    file = open(path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type(name))
+        response['Content-Length'] = stat.st_size
+    else:
+        start, end = byte_range
+        response = FileResponse(
+            FileRange(file, start, end - start + 1),
+            status=206,
+            content_type=content_type(name),
+        )
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+
+    response['Accept-Ranges'] = 'bytes'
+    response['Last-Modified'] = last_modified
+    if etag is not None:
+        response['ETag'] = etag
+    response['Cache-Control'] = CACHE_CONTROL
+
+    return response
+
+
+def serve(request, name, etag=None):
+    """Return a response serving the media file name"""
+    path = media_path(name)
+    if settings.MEDIA_SENDFILE:
+        return sendfile_response(name, path, etag)
+    return file_response(request, name, path, etag)
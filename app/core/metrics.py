@@ -0,0 +1,115 @@
+"""Prometheus metrics for the API
+
+When PROMETHEUS_MULTIPROC_DIR is set every worker process writes its
+samples to memory mapped files in that directory and the metrics view
+aggregates all of them, so the numbers cover the whole server.
+"""
+import ipaddress
+import os
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+
+
+REQUEST_LATENCY = Histogram(
+    'api_request_duration_seconds',
+    'Request latency by view and action',
+    ['view', 'action'],
+)
+RESPONSES = Counter(
+    'api_responses_total',
+    'Responses by view, action and status code',
+    ['view', 'action', 'status'],
+)
+DB_QUERIES = Counter(
+    'api_db_queries_total',
+    'Database queries executed by view',
+    ['view'],
+)
+DB_DURATION = Histogram(
+    'api_db_duration_seconds',
+    'Time spent in the database per request',
+    ['view'],
+    buckets=(.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5),
+)
+CACHE_REQUESTS = Counter(
+    'api_cache_requests_total',
+    'Cache lookups by cache and result',
+    ['cache', 'result'],
+)
+AUTH_FAILURES = Counter(
+    'api_auth_failures_total',
+    'Failed authentication attempts by reason',
+    ['reason'],
+)
+
+# database usage of the request being handled: [queries, seconds]
+db_stats = ContextVar('db_stats', default=None)
+
+
+def record_cache(cache, hit):
+    """Count a cache lookup"""
+    CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def record_auth_failure(reason):
+    """Count a failed authentication"""
+    AUTH_FAILURES.labels(reason).inc()
+
+
+def db_wrapper(execute, sql, params, many, context):
+    """Database execute wrapper adding to the current request stats"""
+    stats = db_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats[0] += 1
+        stats[1] += time.perf_counter() - start
+
+
+def install_db_wrapper(sender, connection, **kwargs):
+    """Track queries of every new database connection"""
+    if db_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(db_wrapper)
+
+
+def is_allowed(request):
+    """Return whether a request may read the metrics"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_staff:
+        return True
+
+    # the scraper connects directly, forwarded addresses are not trusted
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network.strip(), strict=False)
+        for network in settings.METRICS_ALLOWED_NETWORKS if network.strip()
+    )
+
+
+def render():
+    """Return the metrics in the Prometheus text format"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return generate_latest(registry), CONTENT_TYPE_LATEST
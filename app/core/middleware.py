@@ -0,0 +1,48 @@
+"""Middleware for the API"""
+import time
+
+from django.utils.deprecation import MiddlewareMixin
+
+from core import metrics
+
+
+class MetricsMiddleware(MiddlewareMixin):
+    """Record latency, status codes and database usage per view"""
+
+    def process_request(self, request):
+        request._metrics_start = time.perf_counter()
+        request._metrics_view = 'unmatched'
+        request._metrics_action = request.method.lower()
+        request._metrics_db = [0, 0.0]
+        metrics.db_stats.set(request._metrics_db)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_view = request.resolver_match.view_name
+
+        # viewsets map http methods to actions like list or retrieve
+        actions = getattr(view_func, 'actions', None)
+        if actions:
+            request._metrics_action = actions.get(
+                request.method.lower(), request._metrics_action,
+            )
+
+    def process_response(self, request, response):
+        start = getattr(request, '_metrics_start', None)
+        if start is None:
+            return response
+
+        view = request._metrics_view
+        action = request._metrics_action
+        queries, db_time = request._metrics_db
+
+        metrics.REQUEST_LATENCY.labels(view, action).observe(
+            time.perf_counter() - start
+        )
+        metrics.RESPONSES.labels(view, action, response.status_code).inc()
+        metrics.DB_QUERIES.labels(view).inc(queries)
+        metrics.DB_DURATION.labels(view).observe(db_time)
+        if response.status_code == 401:
+            metrics.record_auth_failure('unauthenticated')
+        metrics.db_stats.set(None)
+
+        return response
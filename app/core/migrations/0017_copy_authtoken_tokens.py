@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-18 23:42
+
+from django.conf import settings
+from django.db import migrations
+from django.utils import timezone
+
+
+def copy_tokens(apps, schema_editor):
+    """Keep issued tokens working, they expire after one full lifetime"""
+    Token = apps.get_model('authtoken', 'Token')
+    AuthToken = apps.get_model('core', 'AuthToken')
+    expires = timezone.now() + settings.AUTH_TOKEN_TTL
+
+    AuthToken.objects.bulk_create(
+        [
+            AuthToken(key=token.key, user_id=token.user_id, expires=expires)
+            for token in Token.objects.iterator()
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_authtoken'),
+        ('authtoken', '0003_tokenproxy'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_tokens, migrations.RunPython.noop),
+    ]
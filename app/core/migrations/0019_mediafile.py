@@ -0,0 +1,54 @@
+# Generated by Django 4.2.30 on 2026-10-18 23:48
+
+import os
+
+import core.models
+import core.storage
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_references(apps, schema_editor):
+    """Track the images uploaded before content addressing"""
+    Recipe = apps.get_model('core', 'Recipe')
+    MediaFile = apps.get_model('core', 'MediaFile')
+
+    images = (
+        Recipe.objects.exclude(image__isnull=True).exclude(image='')
+        .values('image').annotate(references=Count('id'))
+    )
+    media_files = []
+    for row in images.iterator():
+        path = os.path.join(settings.MEDIA_ROOT, row['image'])
+        media_files.append(MediaFile(
+            name=row['image'],
+            size=os.path.getsize(path) if os.path.exists(path) else 0,
+            references=row['references'],
+        ))
+    MediaFile.objects.bulk_create(media_files, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_token_generation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaFile',
+            fields=[
+                ('name', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('size', models.PositiveBigIntegerField()),
+                ('references', models.PositiveIntegerField(default=0)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(null=True, storage=core.storage.ContentAddressedStorage(), upload_to=core.models.recipe_image_file_path),
+        ),
+        migrations.RunPython(count_references, migrations.RunPython.noop),
+    ]
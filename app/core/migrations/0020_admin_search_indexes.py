@@ -0,0 +1,48 @@
+# Generated by Django 4.2.30 on 2026-10-19 00:12
+
+from django.db import migrations
+
+
+# prefix searches of the admin run UPPER(column::text) LIKE 'TERM%', which
+# postgres can only answer from an index on the same expression
+SEARCH_INDEXES = [
+    ('core_user_email_prefix', 'core_user', 'email'),
+    ('core_recipe_title_prefix', 'core_recipe', 'title'),
+    ('core_food_title_prefix', 'core_food', 'title'),
+    ('core_activity_title_prefix', 'core_activity', 'title'),
+]
+
+
+def create_indexes(apps, schema_editor):
+    """Create the expression indexes of the admin searches"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    quote = schema_editor.quote_name
+    for name, table, column in SEARCH_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {quote(name)} ON {quote(table)} '
+            f'(UPPER({quote(column)}::text) text_pattern_ops)'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    """Drop the expression indexes of the admin searches"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for name, table, column in SEARCH_INDEXES:
+        schema_editor.execute(
+            f'DROP INDEX IF EXISTS {schema_editor.quote_name(name)}'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_mediafile'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-19 00:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_recentlist'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FoodBarcode',
+            fields=[
+                ('code', models.CharField(max_length=14, primary_key=True, serialize=False)),
+                ('food', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='barcodes', to='core.food')),
+            ],
+        ),
+    ]
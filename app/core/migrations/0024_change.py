@@ -0,0 +1,50 @@
+# Generated by Django 4.2.30 on 2026-10-19 00:10
+
+import itertools
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def record_catalog(apps, schema_editor):
+    """Record the existing catalog as changed, so a first sync gets it"""
+    Change = apps.get_model('core', 'Change')
+    for kind, model_name in [
+        ('food', 'Food'), ('recipe', 'Recipe'), ('activity', 'Activity'),
+    ]:
+        model = apps.get_model('core', model_name)
+        ids = model.objects.order_by('id').values_list(
+            'id', flat=True,
+        ).iterator(chunk_size=5000)
+        while True:
+            batch = list(itertools.islice(ids, 5000))
+            if not batch:
+                break
+            Change.objects.bulk_create(
+                [Change(kind=kind, object_id=pk) for pk in batch],
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_foodbarcode'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('seq', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(max_length=16)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted', models.BooleanField(default=False)),
+                ('changed', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='change',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='core_change_unique_object'),
+        ),
+        migrations.RunPython(record_catalog, migrations.RunPython.noop),
+    ]
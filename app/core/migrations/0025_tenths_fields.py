@@ -0,0 +1,73 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:40
+
+from decimal import Decimal
+
+import core.fields
+from django.db import migrations, models
+from django.db.models import F
+
+
+# nutrient fields stored as integers of tenths from here on
+FIELDS = {
+    'user': ['calorie_goal', 'weight', 'height'],
+    'recipe': ['calories', 'protein', 'carbs', 'fibers', 'fat'],
+    'food': ['calories', 'carbs', 'fibers', 'fat', 'protein'],
+    'activity': ['met'],
+}
+
+# user measurements are optional and default to zero
+OPTIONAL = {'user'}
+
+
+def decimal_field(model_name, max_digits):
+    """Return the decimal column a field has before it holds tenths"""
+    if model_name in OPTIONAL:
+        return models.DecimalField(
+            blank=True, decimal_places=1, default=Decimal('0.0'),
+            max_digits=max_digits,
+        )
+    return models.DecimalField(decimal_places=1, max_digits=max_digits)
+
+
+def tenths_field(model_name):
+    """Return the final integer field"""
+    if model_name in OPTIONAL:
+        return core.fields.TenthsField(blank=True, default=0.0)
+    return core.fields.TenthsField()
+
+
+def scale(factor):
+    """Return a function multiplying every field by factor"""
+    def run(apps, schema_editor):
+        for model_name, names in FIELDS.items():
+            model = apps.get_model('core', model_name)
+            model.objects.update(**{
+                name: F(name) * factor for name in names
+            })
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_change'),
+    ]
+
+    # one more digit first, so the values fit once multiplied by ten
+    operations = [
+        migrations.AlterField(
+            model_name=model_name,
+            name=name,
+            field=decimal_field(model_name, 7),
+        )
+        for model_name, names in FIELDS.items() for name in names
+    ] + [
+        migrations.RunPython(scale(10), scale(Decimal('0.1'))),
+    ] + [
+        migrations.AlterField(
+            model_name=model_name,
+            name=name,
+            field=tenths_field(model_name),
+        )
+        for model_name, names in FIELDS.items() for name in names
+    ]
@@ -1,29 +1,25 @@
 """Database Models"""
-import uuid
 import os
 import datetime
+import secrets
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
     PermissionsMixin,
 )
 from django.core.validators import RegexValidator
+from django.utils import timezone
 
-from decimal import Decimal
+from core.fields import TenthsField
+from core.storage import content_storage
 
 def recipe_image_file_path(instance, filename):
     """Generate filepath for new recipe image"""
 
-    # get file extension
-    ext = os.path.splitext(filename)[1]
-
-    # create random uuid filename
-    filename = f'{uuid.uuid4()}{ext}'
-
-    # return path
+    # the storage renames the file after the hash of its content
     return os.path.join('uploads', 'recipe', filename)
 
 class UserManager(BaseUserManager):
@@ -67,30 +63,18 @@ class User(AbstractBaseUser, PermissionsMixin):
     )
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
-    calorie_goal = models.DecimalField(
-        max_digits=6,
-        decimal_places=1,
-        blank=True,
-        default=Decimal('0.0'),
-    )
-    weight = models.DecimalField(
-        max_digits=6,
-        decimal_places=1,
-        blank=True,
-        default=Decimal('0.0'),
-    )
-    height = models.DecimalField(
-        max_digits=6,
-        decimal_places=1,
-        blank=True,
-        default=Decimal('0.0'),
-    )
+    calorie_goal = TenthsField(blank=True, default=0.0)
+    weight = TenthsField(blank=True, default=0.0)
+    height = TenthsField(blank=True, default=0.0)
     gender = models.IntegerField(default=3)
 
     activity_factor = models.IntegerField(default=1)
 
     dob = models.DateField(default=datetime.date.today)
 
+    # bumped to revoke the signed access and refresh tokens of the user
+    token_generation = models.PositiveIntegerField(default=0)
+
     objects = UserManager()
 
     USERNAME_FIELD = 'email'
@@ -104,18 +88,29 @@ class Recipe(models.Model):
     title = models.CharField(max_length=255)
     category = models.CharField(max_length=255)
     time_minutes = models.IntegerField()
-    calories = models.DecimalField(max_digits=6, decimal_places=1)
-    protein = models.DecimalField(max_digits=6, decimal_places=1)
-    carbs = models.DecimalField(max_digits=6, decimal_places=1)
-    fibers = models.DecimalField(max_digits=6, decimal_places=1)
-    fat = models.DecimalField(max_digits=6, decimal_places=1)
+    calories = TenthsField()
+    protein = TenthsField()
+    carbs = TenthsField()
+    fibers = TenthsField()
+    fat = TenthsField()
     description = models.TextField(blank=True)
     ingredients = models.TextField(blank=True)
-    image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    image = models.ImageField(
+        null=True,
+        upload_to=recipe_image_file_path,
+        storage=content_storage,
+        db_index=True,
+    )
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # the image reference is counted in the transaction of the row, so
+        # a failed save does not leak it
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class Food(models.Model):
     """Food object"""
@@ -124,16 +119,46 @@ class Food(models.Model):
         on_delete=models.CASCADE,
     )
     title = models.CharField(max_length=255)
-    calories = models.DecimalField(max_digits=6, decimal_places=1)
-    carbs = models.DecimalField(max_digits=6, decimal_places=1)
-    fibers = models.DecimalField(max_digits=6, decimal_places=1)
-    fat = models.DecimalField(max_digits=6, decimal_places=1)
-    protein = models.DecimalField(max_digits=6, decimal_places=1)
+    calories = TenthsField()
+    carbs = TenthsField()
+    fibers = TenthsField()
+    fat = TenthsField()
+    protein = TenthsField()
     estimates = models.CharField(max_length=255, blank=True)
+    # uses weighted by their recency, maintained by core.trending
+    trending_score = models.FloatField(default=0, db_index=True, editable=False)
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # the score is only written by core.trending, saving a loaded food
+        # must not overwrite the uses flushed since it was read
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'trending_score'
+            ]
+        super().save(*args, **kwargs)
+
+
+class TrendingEpoch(models.Model):
+    """Time the stored trending scores are weighted from, one row"""
+    started = models.DateTimeField()
+
+
+class FoodBarcode(models.Model):
+    """EAN/UPC code of a food, normalised to a 14 digit GTIN by core.barcodes"""
+    code = models.CharField(max_length=14, primary_key=True)
+    food = models.ForeignKey(
+        Food,
+        on_delete=models.CASCADE,
+        related_name='barcodes',
+    )
+
+    def __str__(self):
+        return self.code
+
 
 class Activity(models.Model):
     """Activity object"""
@@ -145,7 +170,112 @@ class Activity(models.Model):
         on_delete=models.CASCADE,
     )
     title = models.CharField(max_length=255)
-    met = models.DecimalField(max_digits=6, decimal_places=1)
+    met = TenthsField()
 
     def __str__(self):
         return self.title
+
+
+def generate_token_key():
+    """Generate a random auth token key"""
+    return secrets.token_hex(20)
+
+
+class AuthTokenManager(models.Manager):
+    """Manager for auth tokens"""
+
+    def issue(self, user, device=''):
+        """Replace the token of a user device and return the new one"""
+        with transaction.atomic():
+            # concurrent logins of the user wait for each other here
+            # instead of both inserting a token for the device
+            User.objects.select_for_update().filter(pk=user.pk).first()
+            self.filter(user=user, device=device).delete()
+
+            return self.create(
+                user=user,
+                device=device,
+                expires=timezone.now() + settings.AUTH_TOKEN_TTL,
+                generation=user.token_generation,
+            )
+
+
+class AuthToken(models.Model):
+    """Expiring auth token of a user on one device"""
+    key = models.CharField(
+        max_length=40,
+        primary_key=True,
+        default=generate_token_key,
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='auth_tokens',
+    )
+    device = models.CharField(max_length=64, blank=True, default='')
+    created = models.DateTimeField(auto_now_add=True)
+    expires = models.DateTimeField(db_index=True)
+    generation = models.PositiveIntegerField(default=0)
+
+    objects = AuthTokenManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'device'],
+                name='unique_auth_token_device',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user} ({self.device or "default"})'
+
+
+class MediaFile(models.Model):
+    """Content addressed media file shared by the objects referencing it"""
+    name = models.CharField(max_length=255, primary_key=True)
+    size = models.PositiveBigIntegerField()
+    references = models.PositiveIntegerField(default=0)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+
+class RecentList(models.Model):
+    """Foods and recipes a user used lately, saved from core.recent"""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    # [kind, id, uses] entries, the most recently used first
+    items = models.JSONField(default=list)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return str(self.user)
+
+
+class Change(models.Model):
+    """Latest change of a catalog object, maintained by core.changes
+
+    Every change replaces the row of the object, so seq grows with every
+    change and a deleted object keeps a tombstone row.
+    """
+    seq = models.BigAutoField(primary_key=True)
+    kind = models.CharField(max_length=16)
+    object_id = models.BigIntegerField()
+    deleted = models.BooleanField(default=False)
+    changed = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['kind', 'object_id'],
+                name='core_change_unique_object',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.seq} {self.kind} {self.object_id}'
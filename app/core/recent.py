@@ -0,0 +1,111 @@
+"""Recently and frequently used foods and recipes of each user
+
+The list of a user lives in the cache as at most RECENT_SIZE [kind, id, uses]
+entries, the most recently used first. It is saved to the database every
+RECENT_SAVE_EVERY uses and read back when the cache lost it, so only the
+uses since the last save can be lost.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from core import metrics
+
+from core.models import Food, Recipe, RecentList
+
+
+KINDS = {'food': Food, 'recipe': Recipe}
+
+
+def cache_key(user_id):
+    """Return the cache key of the list of a user"""
+    return f'recent:{user_id}'
+
+
+def load(user_id):
+    """Return the cached list of a user, read from the database if needed"""
+    data = cache.get(cache_key(user_id))
+    metrics.record_cache('recent', data is not None)
+    if data is None:
+        items = RecentList.objects.filter(user_id=user_id).values_list(
+            'items', flat=True,
+        ).first()
+        data = {'items': items or [], 'unsaved': 0}
+    return data
+
+
+def evict(items):
+    """Drop the least used entry of the least recently used half"""
+    tail = len(items) - max(1, settings.RECENT_SIZE // 2)
+    victim = min(range(tail, len(items)), key=lambda i: items[i][2])
+    del items[victim]
+
+
+def record(user_id, kind, obj_id):
+    """Move a food or recipe to the front of the list of a user"""
+    data = load(user_id)
+    items = data['items']
+
+    uses = 0
+    for i, (item_kind, item_id, item_uses) in enumerate(items):
+        if item_kind == kind and item_id == obj_id:
+            uses = item_uses
+            del items[i]
+            break
+    items.insert(0, [kind, obj_id, uses + 1])
+    while len(items) > settings.RECENT_SIZE:
+        evict(items)
+
+    data['unsaved'] += 1
+    if data['unsaved'] >= settings.RECENT_SAVE_EVERY:
+        RecentList.objects.update_or_create(
+            user_id=user_id, defaults={'items': items},
+        )
+        data['unsaved'] = 0
+
+    cache.set(cache_key(user_id), data, settings.RECENT_CACHE_TTL)
+
+
+def lists(user_id, size=None):
+    """Return the recent and the frequent objects of a user
+
+    Every entry is a (kind, object, uses) tuple. The objects of each kind are
+    fetched with a single in_bulk query.
+    """
+    size = size or settings.RECENT_LIST_SIZE
+    items = load(user_id)['items']
+    recent = items[:size]
+    frequent = sorted(items, key=lambda item: item[2], reverse=True)[:size]
+
+    objects = {}
+    for kind, model in KINDS.items():
+        ids = {
+            item_id for item_kind, item_id, _ in recent + frequent
+            if item_kind == kind
+        }
+        if ids:
+            objects[kind] = model.objects.only(
+                'id', 'title', 'calories',
+            ).in_bulk(ids)
+
+    def hydrate(entries):
+        return [
+            (kind, objects[kind][item_id], uses)
+            for kind, item_id, uses in entries
+            if item_id in objects.get(kind, {})
+        ]
+
+    return hydrate(recent), hydrate(frequent)
+
+
+def entries(items):
+    """Return the (kind, object, uses) tuples of lists() as dicts"""
+    return [
+        {
+            'type': kind,
+            'id': obj.id,
+            'title': obj.title,
+            'calories': obj.calories,
+            'uses': uses,
+        }
+        for kind, obj, uses in items
+    ]
@@ -0,0 +1,93 @@
+"""OpenAPI schema generated once per process and served from memory
+
+The schema is read from OPENAPI_SCHEMA_FILE when it was built ahead of time
+with the build_schema command, otherwise it is generated on first use.
+Every format is rendered and gzipped once, requests only pick the bytes.
+"""
+import gzip
+import hashlib
+import json
+import threading
+
+from django.conf import settings
+
+
+FORMATS = {
+    'yaml': 'application/vnd.oai.openapi; charset=utf-8',
+    'json': 'application/vnd.oai.openapi+json',
+}
+
+_lock = threading.Lock()
+_schema = None
+_documents = {}
+
+
+class Document:
+    """Rendered schema with its compressed body and ETag"""
+
+    def __init__(self, content, content_type):
+        self.content = content
+        self.content_type = content_type
+        self.gzipped = gzip.compress(content, mtime=0)
+        self.etag = '"{}"'.format(hashlib.sha256(content).hexdigest()[:32])
+
+
+def generate():
+    """Return the schema generated from the code"""
+    # registers the schema extensions of the auth classes on first use
+    from auth.schema import SchemaGenerator
+
+    return SchemaGenerator().get_schema(request=None, public=True)
+
+
+def load():
+    """Return the stored schema or None if it was not built"""
+    path = settings.OPENAPI_SCHEMA_FILE
+    if not path:
+        return None
+
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def get_schema():
+    """Return the schema, loaded or generated once per process"""
+    global _schema
+
+    if _schema is None:
+        with _lock:
+            if _schema is None:
+                _schema = load() or generate()
+    return _schema
+
+
+def render(schema, fmt):
+    """Return the schema rendered in a format"""
+    from drf_spectacular.renderers import (
+        OpenApiJsonRenderer,
+        OpenApiYamlRenderer,
+    )
+
+    renderer = OpenApiJsonRenderer() if fmt == 'json' else OpenApiYamlRenderer()
+    return renderer.render(schema, renderer_context={})
+
+
+def get_document(fmt):
+    """Return the rendered schema document of a format"""
+    document = _documents.get(fmt)
+    if document is None:
+        document = Document(render(get_schema(), fmt), FORMATS[fmt])
+        _documents[fmt] = document
+    return document
+
+
+def reset():
+    """Forget the schema, it is built again on next use"""
+    global _schema
+
+    with _lock:
+        _schema = None
+        _documents.clear()
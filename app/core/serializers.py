@@ -0,0 +1,31 @@
+"""Serializers for the core views"""
+from rest_framework import serializers
+
+from activity.serializers import ActivitySerializer
+from food.serializers import FoodDetailSerializer
+from recipe.serializers import RecipeDetailSerializer
+
+
+# full representation of each kind of catalog object
+CATALOG_SERIALIZERS = {
+    'food': FoodDetailSerializer,
+    'recipe': RecipeDetailSerializer,
+    'activity': ActivitySerializer,
+}
+
+
+class ChangeSerializer(serializers.Serializer):
+    """Serializer for a changed or deleted catalog object"""
+    seq = serializers.IntegerField()
+    type = serializers.ChoiceField(choices=['food', 'recipe', 'activity'])
+    id = serializers.IntegerField()
+    deleted = serializers.BooleanField()
+    # the object as its detail endpoint returns it, absent when deleted
+    data = serializers.DictField(required=False)
+
+
+class ChangesSerializer(serializers.Serializer):
+    """Serializer for a batch of catalog changes"""
+    changes = ChangeSerializer(many=True)
+    next = serializers.IntegerField()
+    more = serializers.BooleanField()
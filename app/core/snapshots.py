@@ -0,0 +1,207 @@
+"""Compressed snapshots of the catalog for the first sync of offline clients
+
+A snapshot is a gzipped NDJSON file: a header line with the catalog version,
+the sequence number up to which every change has settled, then one line per
+food, recipe and activity. Clients download it once and continue with the changes since its
+version. Snapshots are named by version and a hash of their content and are
+never rewritten, so they are served as immutable files with both as ETag,
+also when a snapshot of the same version is built again. A stale snapshot
+is rebuilt on request at most once per SNAPSHOT_REBUILD_INTERVAL, a
+scheduled build_snapshot keeps it current in between.
+"""
+import gzip
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+
+from rest_framework.utils.encoders import JSONEncoder
+
+from core.changes import KINDS, settled_seq
+
+
+logger = logging.getLogger(__name__)
+
+NAME_RE = re.compile(r'^catalog-(\d+)-([0-9a-f]{16})\.ndjson\.gz$')
+TMP_SUFFIX = '.tmp'
+BUILDING_KEY = 'catalog:snapshot:building'
+REBUILD_KEY = 'catalog:snapshot:rebuilt'
+
+
+def current_version():
+    """Return the version a snapshot of the catalog gets now
+
+    Changes of transactions still committing may take lower sequence
+    numbers, only the settled changes are covered, like changes.since does.
+    """
+    return settled_seq()
+
+
+def snapshot_dir():
+    """Return the directory holding the snapshots"""
+    return os.path.join(settings.MEDIA_ROOT, settings.SNAPSHOT_DIR)
+
+
+def name(version, digest):
+    """Return the media name of a snapshot"""
+    return f'{settings.SNAPSHOT_DIR}/catalog-{version}-{digest}.ndjson.gz'
+
+
+def stored():
+    """Return (version, digest) of the stored snapshots, newest first"""
+    try:
+        entries = list(os.scandir(snapshot_dir()))
+    except FileNotFoundError:
+        return []
+
+    found = []
+    for entry in entries:
+        match = NAME_RE.match(entry.name)
+        if not match:
+            continue
+        try:
+            # of two builds of a version the later one wins
+            mtime = entry.stat().st_mtime_ns
+        except FileNotFoundError:
+            continue
+        found.append((int(match.group(1)), mtime, match.group(2)))
+
+    return [(version, digest) for version, _, digest in sorted(
+        found, reverse=True,
+    )]
+
+
+def latest():
+    """Return (version, digest) of the newest snapshot or None"""
+    snapshots = stored()
+    return snapshots[0] if snapshots else None
+
+
+def file_digest(path):
+    """Return the short SHA-256 hex digest of a file"""
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()[:16]
+
+
+def remove_stale_tmp():
+    """Delete the partial files of builds that died, return their count"""
+    # younger files may belong to a build still running
+    cutoff = time.time() - settings.SNAPSHOT_BUILD_TIMEOUT
+    removed = 0
+    try:
+        entries = list(os.scandir(snapshot_dir()))
+    except FileNotFoundError:
+        return removed
+
+    for entry in entries:
+        try:
+            if (
+                entry.name.endswith(TMP_SUFFIX) and
+                entry.stat().st_mtime < cutoff
+            ):
+                os.unlink(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def lines(version):
+    """Yield the encoded lines of a snapshot"""
+    from core.serializers import CATALOG_SERIALIZERS
+
+    encoder = JSONEncoder(separators=(',', ':'))
+    yield encoder.encode({
+        'version': version, 'created': timezone.now().isoformat(),
+    })
+    for kind, model in KINDS.items():
+        serializer_class = CATALOG_SERIALIZERS[kind]
+        for obj in model.objects.order_by('id').iterator(chunk_size=2000):
+            yield encoder.encode({
+                'type': kind, 'data': serializer_class(obj).data,
+            })
+
+
+def build():
+    """Write the snapshot of the current catalog, return (version, digest)"""
+    # taken first, changes made while writing are synced again afterwards
+    version = current_version()
+    directory = snapshot_dir()
+    os.makedirs(directory, exist_ok=True)
+    remove_stale_tmp()
+
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=TMP_SUFFIX)
+    try:
+        with os.fdopen(fd, 'wb') as f, gzip.GzipFile(
+            fileobj=f, mode='wb', compresslevel=6, mtime=0,
+        ) as gz:
+            for line in lines(version):
+                gz.write(line.encode())
+                gz.write(b'\n')
+        os.chmod(tmp, 0o644)
+        digest = file_digest(tmp)
+        os.replace(
+            tmp, os.path.join(settings.MEDIA_ROOT, name(version, digest)),
+        )
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+    # a rebuild of the version replaces its snapshot, older versions are
+    # kept for a while for resumed downloads
+    snapshots = stored()
+    replaced = [
+        snapshot for snapshot in snapshots
+        if snapshot[0] == version and snapshot[1] != digest
+    ]
+    kept = [snapshot for snapshot in snapshots if snapshot not in replaced]
+    for old in replaced + kept[settings.SNAPSHOT_KEEP:]:
+        try:
+            os.unlink(os.path.join(settings.MEDIA_ROOT, name(*old)))
+        except FileNotFoundError:
+            pass
+
+    return version, digest
+
+
+def build_in_background():
+    """Start building a snapshot unless a build is running already"""
+    # the cache is shared by the workers, only one of them builds
+    if not cache.add(BUILDING_KEY, 1, timeout=settings.SNAPSHOT_BUILD_TIMEOUT):
+        return False
+
+    def run():
+        try:
+            build()
+        except Exception:
+            logger.exception('Could not build the catalog snapshot')
+        finally:
+            cache.delete(BUILDING_KEY)
+            connection.close()
+
+    threading.Thread(target=run, name='catalog-snapshot', daemon=True).start()
+    return True
+
+
+def ensure_current():
+    """Return the newest snapshot, building a newer one if stale"""
+    snapshot = latest()
+    if snapshot is None:
+        build_in_background()
+    elif snapshot[0] < current_version() and cache.add(
+        REBUILD_KEY, 1, timeout=settings.SNAPSHOT_REBUILD_INTERVAL,
+    ):
+        # every catalog change makes it stale, rebuild once in a while
+        build_in_background()
+    return snapshot
@@ -0,0 +1,157 @@
+"""Content addressed storage for uploaded media
+
+Files are named by the SHA-256 of their content, so a name always refers to
+the same bytes and can be cached forever. Every stored file has a MediaFile
+row counting the objects referencing it: storing content that already
+exists only increments the count, releasing it decrements the count. Files
+without references are deleted later by the gc_media command.
+"""
+import hashlib
+import os
+
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadhandler import (
+    MemoryFileUploadHandler,
+    TemporaryFileUploadHandler,
+)
+from django.db import transaction
+from django.db.models import F
+
+
+CHUNK_SIZE = 64 * 1024
+
+
+def file_digest(file):
+    """Return the SHA-256 hex digest of a file
+
+    Uploads hashed while they were received are not read again.
+    """
+    digest = getattr(file, 'content_hash', None)
+    if digest:
+        return digest
+
+    hasher = hashlib.sha256()
+    file.seek(0)
+    for chunk in file.chunks(CHUNK_SIZE):
+        hasher.update(chunk)
+    file.seek(0)
+
+    return hasher.hexdigest()
+
+
+class HashingUploadHandlerMixin:
+    """Hash an upload while it is received by the handler storing it"""
+
+    def new_file(self, *args, **kwargs):
+        # set first, the memory handler stops the chain by raising
+        self.hasher = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        data = super().receive_data_chunk(raw_data, start)
+        # the chunk was kept by this handler, not passed on
+        if data is None:
+            self.hasher.update(raw_data)
+        return data
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.content_hash = self.hasher.hexdigest()
+        return file
+
+
+class HashingMemoryFileUploadHandler(
+    HashingUploadHandlerMixin, MemoryFileUploadHandler,
+):
+    """Keep small uploads in memory and hash them"""
+
+
+class HashingTemporaryFileUploadHandler(
+    HashingUploadHandlerMixin, TemporaryFileUploadHandler,
+):
+    """Stream large uploads to a temporary file and hash them"""
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage naming and deduplicating files by content"""
+
+    def content_name(self, name, content):
+        """Return the content addressed name of a file"""
+        directory, filename = os.path.split(name)
+        ext = os.path.splitext(filename)[1].lower()
+        digest = file_digest(content)
+
+        return os.path.join(directory, digest[:2], f'{digest}{ext}')
+
+    def save(self, name, content, max_length=None):
+        from core.models import MediaFile
+
+        if name is None:
+            name = content.name
+        name = self.content_name(name, content)
+
+        # a savepoint in the transaction saving the model, the reference is
+        # rolled back with it
+        with transaction.atomic():
+            # the row lock orders uploads and gc_media on the same content
+            MediaFile.objects.select_for_update().get_or_create(
+                name=name, defaults={'size': content.size},
+            )
+            if not self.exists(name):
+                super()._save(name, content)
+            MediaFile.objects.filter(name=name).update(
+                references=F('references') + 1,
+            )
+
+        return name
+
+    def get_available_name(self, name, max_length=None):
+        # equal names hold equal content, the file is never renamed
+        return name
+
+
+def release(name):
+    """Drop one reference to a stored file"""
+    from core.models import MediaFile
+
+    if not name:
+        return
+
+    MediaFile.objects.filter(name=name, references__gt=0).update(
+        references=F('references') - 1,
+    )
+
+
+def delete_unreferenced(name, storage=None):
+    """Delete a stored file no object references and return its size
+
+    The MediaFile row is locked, created if missing, while the references
+    are checked again, so an upload of the same content either waits for
+    the delete and writes the file again or is seen as a reference. None
+    is returned for files still referenced.
+    """
+    from core.models import MediaFile, Recipe
+
+    storage = storage or content_storage
+    with transaction.atomic():
+        media_file, _ = MediaFile.objects.select_for_update().get_or_create(
+            name=name, defaults={'size': 0},
+        )
+        if (
+            media_file.references > 0 or
+            Recipe.objects.filter(image=name).exists()
+        ):
+            return None
+
+        try:
+            size = storage.size(name)
+            storage.delete(name)
+        except FileNotFoundError:
+            size = 0
+        media_file.delete()
+
+    return size
+
+
+content_storage = ContentAddressedStorage()
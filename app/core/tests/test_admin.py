@@ -1,9 +1,33 @@
 """Tests for the Django admin"""
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.test import Client
 
+from core.admin import estimated_count
+from core.models import Food
+
+
+def create_foods(user, count):
+    """Create foods of a user"""
+    Food.objects.bulk_create([
+        Food(
+            user=user,
+            title=f'Food {i}',
+            calories=Decimal('100'),
+            carbs=Decimal('10'),
+            fibers=Decimal('1'),
+            fat=Decimal('5'),
+            protein=Decimal('8'),
+        )
+        for i in range(count)
+    ])
+
 
 class AdminSiteTests(TestCase):
     """Tests for Django admin"""
@@ -44,3 +68,57 @@ class AdminSiteTests(TestCase):
         res = self.client.get(url)
 
         self.assertEqual(res.status_code, 200)
+
+    def test_food_changelist_queries(self):
+        """Test the owners of listed foods are fetched with the foods"""
+        url = reverse('admin:core_food_changelist')
+        create_foods(self.user, 2)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(url)
+
+        create_foods(self.user, 20)
+        with CaptureQueriesContext(connection) as many:
+            res = self.client.get(url)
+
+        self.assertEqual(len(many), len(few))
+        self.assertContains(res, self.user.email)
+        self.assertIsNone(res.context['cl'].full_result_count)
+
+    def test_food_search(self):
+        """Test foods are searched by title prefix"""
+        create_foods(self.user, 12)
+
+        res = self.client.get(
+            reverse('admin:core_food_changelist'), {'q': '"food 1"'},
+        )
+
+        self.assertEqual(res.context['cl'].result_count, 3)
+
+    @patch('core.admin.estimated_count', return_value=2_000_000)
+    def test_food_changelist_estimated_count(self, patched_estimate):
+        """Test big tables are counted from the planner estimate"""
+        create_foods(self.user, 3)
+
+        res = self.client.get(reverse('admin:core_food_changelist'))
+
+        self.assertEqual(res.context['cl'].result_count, 2_000_000)
+        self.assertContains(res, 'Food 2')
+
+    def test_estimated_count_unfiltered_only(self):
+        """Test filtered querysets and other databases are counted exactly"""
+        self.assertIsNone(estimated_count(Food.objects.filter(title='x')))
+        self.assertIsNone(estimated_count(Food.objects.all()))
+
+    def test_user_autocomplete(self):
+        """Test owners are picked with an autocomplete widget"""
+        res = self.client.get(reverse('admin:autocomplete'), {
+            'app_label': 'core',
+            'model_name': 'food',
+            'field_name': 'user',
+            'term': 'user@',
+        })
+
+        results = res.json()['results']
+        self.assertEqual(results, [
+            {'id': str(self.user.id), 'text': self.user.email},
+        ])
@@ -0,0 +1,29 @@
+"""Tests for barcode normalisation"""
+from django.test import SimpleTestCase
+
+from core import barcodes
+
+
+class NormaliseTests(SimpleTestCase):
+    """Test normalising scanned codes"""
+
+    def test_codes_padded_to_gtin(self):
+        """Test every EAN/UPC length is stored as a 14 digit GTIN"""
+        self.assertEqual(barcodes.normalise('96385074'), '00000096385074')
+        self.assertEqual(barcodes.normalise('4006381333931'), '04006381333931')
+        self.assertEqual(
+            barcodes.normalise('4006-3813 33931'), '04006381333931',
+        )
+
+    def test_upc_matches_ean(self):
+        """Test a UPC-A and its EAN-13 form are the same code"""
+        self.assertEqual(
+            barcodes.normalise('036000291452'),
+            barcodes.normalise('0036000291452'),
+        )
+
+    def test_invalid_codes_rejected(self):
+        """Test wrong lengths, letters and check digits are rejected"""
+        for code in ['12345', '40063813339x1', '4006381333932']:
+            with self.assertRaises(barcodes.InvalidBarcode):
+                barcodes.normalise(code)
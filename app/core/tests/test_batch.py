@@ -0,0 +1,101 @@
+"""Tests for fetching catalog objects by id"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Activity, Food, Recipe
+
+
+FOODS_BATCH_URL = reverse('food:food-batch')
+RECIPES_BATCH_URL = reverse('recipe:recipe-batch')
+ACTIVITIES_BATCH_URL = reverse('activity:activity-batch')
+
+
+def create_food(user, title):
+    """Create and return a food"""
+    return Food.objects.create(
+        user=user, title=title, calories=52, carbs=14, fibers=2.4, fat=0.2,
+        protein=0.3,
+    )
+
+
+class BatchRetrieveTests(TestCase):
+    """Test the batch endpoints of the catalog viewsets"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='batch@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.foods = [create_food(self.user, f'Food {n}') for n in range(3)]
+
+    def test_requested_order(self):
+        """Test objects are returned in the order of the ids"""
+        ids = [self.foods[2].id, self.foods[0].id, self.foods[1].id]
+
+        with self.assertNumQueries(1):
+            res = self.client.get(
+                FOODS_BATCH_URL, {'ids': ','.join(map(str, ids))},
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([food['id'] for food in res.data['results']], ids)
+        self.assertIn('protein', res.data['results'][0])
+        self.assertEqual(res.data['missing'], [])
+
+    def test_missing_and_duplicate_ids(self):
+        """Test unknown ids are reported and duplicates returned once"""
+        food = self.foods[0]
+        unknown = self.foods[2].id + 100
+
+        res = self.client.get(
+            FOODS_BATCH_URL, {'ids': f'{food.id},{unknown},{food.id}'},
+        )
+
+        self.assertEqual(
+            [item['id'] for item in res.data['results']], [food.id],
+        )
+        self.assertEqual(res.data['missing'], [unknown])
+
+    @override_settings(BATCH_MAX_IDS=2)
+    def test_id_count_capped(self):
+        """Test requests for too many ids are rejected"""
+        res = self.client.get(FOODS_BATCH_URL, {'ids': '1,2,3'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('ids', res.data)
+
+    def test_invalid_ids(self):
+        """Test ids must be a list of integers"""
+        for ids in ['', '1,a', '1,,2']:
+            res = self.client.get(FOODS_BATCH_URL, {'ids': ids})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_recipes_and_activities(self):
+        """Test recipes and activities are fetched by id as well"""
+        recipe = Recipe.objects.create(
+            user=self.user, title='Supa', category='Supe', time_minutes=20,
+            calories=120, protein=4, carbs=15, fibers=2, fat=3,
+        )
+        activity = Activity.objects.create(
+            user=self.user, title='Alergare', met=7,
+        )
+
+        res = self.client.get(RECIPES_BATCH_URL, {'ids': str(recipe.id)})
+        self.assertEqual(res.data['results'][0]['title'], 'Supa')
+        self.assertIn('description', res.data['results'][0])
+
+        res = self.client.get(ACTIVITIES_BATCH_URL, {'ids': str(activity.id)})
+        self.assertEqual(res.data['results'][0]['met'], 7.0)
+
+    def test_auth_required(self):
+        """Test the batch endpoints require authentication"""
+        res = APIClient().get(FOODS_BATCH_URL, {'ids': '1'})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
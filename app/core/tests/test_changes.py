@@ -0,0 +1,170 @@
+"""Tests for the delta sync of the catalog"""
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import changes
+from core.models import Activity, Change, Food
+
+
+CHANGES_URL = reverse('changes')
+
+
+def create_food(user, title='Mar'):
+    """Create and return a food"""
+    return Food.objects.create(
+        user=user,
+        title=title,
+        calories=Decimal('52'),
+        carbs=Decimal('14'),
+        fibers=Decimal('2.4'),
+        fat=Decimal('0.2'),
+        protein=Decimal('0.3'),
+    )
+
+
+@override_settings(CHANGES_SETTLE_SECONDS=0)
+class ChangesApiTests(TestCase):
+    """Test the changes endpoint"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='sync@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def sync(self, since, **params):
+        """Return the changes after a sequence number"""
+        res = self.client.get(CHANGES_URL, {'since': since, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_auth_required(self):
+        """Test changes are only listed to users"""
+        res = APIClient().get(CHANGES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_only_changes_since(self):
+        """Test a sync returns only what changed after its sequence"""
+        apple = create_food(self.user)
+        create_food(self.user, 'Para')
+        cursor = self.sync(0)['next']
+
+        apple.title = 'Mar rosu'
+        apple.save()
+        Activity.objects.create(user=self.user, title='Inot', met=8)
+        data = self.sync(cursor)
+
+        self.assertEqual(
+            [(c['type'], c['data']['title']) for c in data['changes']],
+            [('food', 'Mar rosu'), ('activity', 'Inot')],
+        )
+        self.assertFalse(data['more'])
+        self.assertEqual(self.sync(data['next'])['changes'], [])
+
+    def test_delete_tombstone(self):
+        """Test deletes are synced as tombstones"""
+        apple = create_food(self.user)
+        cursor = self.sync(0)['next']
+
+        apple_id = apple.id
+        apple.delete()
+        data = self.sync(cursor)
+
+        self.assertEqual(data['changes'], [{
+            'seq': data['next'],
+            'type': 'food',
+            'id': apple_id,
+            'deleted': True,
+        }])
+        self.assertEqual(Change.objects.filter(object_id=apple_id).count(), 1)
+
+    def test_bounded_batches(self):
+        """Test changes are paged with a query per kind"""
+        for n in range(5):
+            create_food(self.user, f'Food {n}')
+
+        with self.assertNumQueries(2):
+            first = self.sync(0, limit=3)
+        second = self.sync(first['next'], limit=3)
+
+        self.assertEqual(len(first['changes']), 3)
+        self.assertTrue(first['more'])
+        self.assertEqual(len(second['changes']), 2)
+
+    @override_settings(CHANGES_SETTLE_SECONDS=5)
+    def test_recent_changes_held_back(self):
+        """Test changes are listed once they settled"""
+        create_food(self.user)
+
+        self.assertEqual(self.sync(0)['changes'], [])
+        Change.objects.update(changed=timezone.now() - timedelta(seconds=6))
+        self.assertEqual(len(self.sync(0)['changes']), 1)
+
+    @override_settings(CHANGES_SETTLE_SECONDS=5)
+    def test_batch_ends_at_unsettled_change(self):
+        """Test settled changes after an unsettled one are held back"""
+        foods = [create_food(self.user, f'Food {n}') for n in range(3)]
+        old = timezone.now() - timedelta(seconds=6)
+        Change.objects.exclude(object_id=foods[1].id).update(changed=old)
+
+        data = self.sync(0)
+
+        self.assertEqual([c['id'] for c in data['changes']], [foods[0].id])
+        self.assertFalse(data['more'])
+
+    def test_stamped_by_database(self):
+        """Test changes are stamped with the clock of the database"""
+        app_time = timezone.now() - timedelta(hours=1)
+
+        # an app server with a clock an hour behind
+        with patch.object(
+            Change._meta.get_field('changed'), 'get_default',
+            return_value=app_time,
+        ):
+            create_food(self.user)
+
+        self.assertGreater(
+            Change.objects.get().changed, timezone.now() - timedelta(minutes=1),
+        )
+
+    def test_record_inserted(self):
+        """Test rows inserted after an id are recorded in id order"""
+        before = create_food(self.user, 'Before')
+        foods = Food.objects.bulk_create([
+            Food(
+                user=self.user, title=f'Food {n}', calories=1, carbs=1,
+                fibers=1, fat=1, protein=1,
+            )
+            for n in range(3)
+        ])
+
+        changes.record_inserted('food', before.id)
+
+        self.assertEqual(
+            [c['id'] for c in self.sync(0)['changes']],
+            [before.id] + [food.id for food in foods],
+        )
+
+    def test_record_batch(self):
+        """Test rows written in bulk are recorded once each"""
+        foods = [create_food(self.user, f'Food {n}') for n in range(3)]
+
+        changes.record_batch('food', [food.id for food in foods])
+
+        self.assertEqual(Change.objects.filter(kind='food').count(), 3)
+        self.assertEqual(
+            [c['id'] for c in self.sync(0)['changes']],
+            [food.id for food in foods],
+        )
@@ -1,12 +1,40 @@
 """Test custom Django commands"""
-
+import copy
+import json
+import os
+import time
+from datetime import timedelta
+import tempfile
+from io import StringIO
 from unittest.mock import patch
 
 from psycopg2 import OperationalError as Psycopg2Error
 
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase
+from django.urls import get_resolver
+from django.utils import timezone
+
+from core import benchmarks, warmup
+from core.management.commands import serve
+from core import barcodes
+from core.models import (
+    Activity,
+    AuthToken,
+    Change,
+    Food,
+    FoodBarcode,
+    MediaFile,
+    Recipe,
+)
+from core.storage import content_storage, release
+from food.views import FoodViewSet
 
 @patch("core.management.commands.wait_for_db.Command.check")
 class CommandTests(SimpleTestCase):
@@ -31,3 +59,443 @@ class CommandTests(SimpleTestCase):
 
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=['default'])
+
+    @patch('time.sleep')
+    def test_wait_for_db_backoff(self, patched_sleep, patched_check):
+        """Test the pauses grow from a short first retry to the maximum"""
+        patched_check.side_effect = [OperationalError] * 8 + [True]
+
+        call_command('wait_for_db', stdout=StringIO())
+
+        delays = [call.args[0] for call in patched_sleep.call_args_list]
+        self.assertLessEqual(delays[0], 0.1)
+        self.assertTrue(all(delay <= 2 for delay in delays))
+        self.assertGreaterEqual(delays[-1], 1)
+
+    def test_wait_for_db_timeout(self, patched_check):
+        """Test waiting gives up at the deadline"""
+        patched_check.side_effect = OperationalError
+
+        with self.assertRaisesMessage(CommandError, 'default unavailable'):
+            call_command('wait_for_db', '--timeout', '0', stdout=StringIO())
+
+        patched_check.assert_called_once_with(databases=['default'])
+
+    @patch('core.management.commands.wait_for_db.connections')
+    @patch('time.sleep')
+    def test_wait_for_db_aliases(
+        self, patched_sleep, patched_conns, patched_check,
+    ):
+        """Test every database alias is waited for"""
+        patched_check.side_effect = [OperationalError, True, True]
+
+        call_command(
+            'wait_for_db', '--database', 'default', '--database', 'replica',
+            stdout=StringIO(),
+        )
+
+        self.assertEqual(patched_check.call_count, 3)
+        patched_check.assert_any_call(databases=['replica'])
+
+
+class BenchmarkCommandTests(TestCase):
+    """Test the benchmark command"""
+
+    def setUp(self):
+        self.report = {
+            'scenarios': {
+                'browse': {
+                    'requests': 100,
+                    'errors': 0,
+                    'rps': 200.0,
+                    'mean_ms': 5.0,
+                    'p50_ms': 4.0,
+                    'p95_ms': 9.0,
+                    'p99_ms': 12.0,
+                },
+            },
+        }
+
+    def test_percentile(self):
+        """Test percentiles use the nearest rank"""
+        samples = list(range(1, 101))
+
+        self.assertEqual(benchmarks.percentile(samples, 50), 50)
+        self.assertEqual(benchmarks.percentile(samples, 95), 95)
+        self.assertEqual(benchmarks.percentile(samples, 99), 99)
+        self.assertEqual(benchmarks.percentile([], 99), 0.0)
+
+    def test_compare_detects_regressions(self):
+        """Test latency and throughput regressions are reported"""
+        current = copy.deepcopy(self.report)
+        current['scenarios']['browse']['p95_ms'] = 20.0
+        current['scenarios']['browse']['rps'] = 100.0
+
+        regressions = benchmarks.compare(current, self.report, 0.1)
+
+        self.assertEqual(len(regressions), 2)
+
+    def test_compare_within_tolerance(self):
+        """Test small changes are not regressions"""
+        current = copy.deepcopy(self.report)
+        current['scenarios']['browse']['p95_ms'] = 9.5
+
+        self.assertEqual(benchmarks.compare(current, self.report, 0.1), [])
+
+    @patch('core.management.commands.benchmark.Command.run')
+    def test_benchmark_fails_on_regression(self, patched_run):
+        """Test the command fails loudly against a faster baseline"""
+        current = copy.deepcopy(self.report)
+        current['scenarios']['browse']['p99_ms'] = 50.0
+        patched_run.return_value = current
+
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as baseline:
+            json.dump(self.report, baseline)
+            baseline.flush()
+
+            with self.assertRaises(CommandError):
+                call_command(
+                    'benchmark',
+                    url='http://localhost:8000',
+                    baseline=baseline.name,
+                    stdout=StringIO(),
+                )
+
+        # the remote server has its own benchmark user
+        self.assertFalse(
+            get_user_model().objects.filter(email='bench@example.com').exists()
+        )
+
+    @patch('core.management.commands.benchmark.Command.run')
+    def test_benchmark_creates_local_user(self, patched_run):
+        """Test the user is created for the server the command starts"""
+        limits = []
+        patched_run.side_effect = lambda *args: (
+            limits.append(settings.RATE_LIMITS) or self.report
+        )
+
+        call_command('benchmark', stdout=StringIO())
+
+        self.assertTrue(
+            get_user_model().objects.filter(email='bench@example.com').exists()
+        )
+        # the local server does not throttle the load
+        self.assertEqual(limits, [{}])
+        self.assertIn('login', settings.RATE_LIMITS)
+
+
+class SeedDataCommandTests(TestCase):
+    """Test the seed_data command"""
+
+    def seed(self, **options):
+        """Run the command with small volumes"""
+        defaults = {
+            'users': 5,
+            'foods': 50,
+            'recipes': 20,
+            'activities': 10,
+            'editors': 2,
+            'batch_size': 16,
+            'stdout': StringIO(),
+        }
+        defaults.update(options)
+        call_command('seed_data', **defaults)
+
+    def test_seed_data_creates_rows(self):
+        """Test every model gets the requested number of rows"""
+        self.seed()
+
+        self.assertEqual(get_user_model().objects.count(), 7)
+        self.assertEqual(Food.objects.count(), 50)
+        self.assertEqual(Recipe.objects.count(), 20)
+        self.assertEqual(Activity.objects.count(), 10)
+        self.assertEqual(
+            get_user_model().objects.filter(is_staff=True).count(), 2
+        )
+        self.assertFalse(Food.objects.exclude(user__is_staff=True).exists())
+
+    def test_seeded_rows_recorded_as_changes(self):
+        """Test delta syncs see the rows written in bulk"""
+        self.seed()
+
+        self.assertEqual(Change.objects.filter(kind='food').count(), 50)
+        self.assertEqual(Change.objects.count(), 80)
+
+    def test_seed_data_is_deterministic(self):
+        """Test the same seed generates the same catalog"""
+        self.seed(seed=7)
+        first = list(Food.objects.order_by('id').values_list(
+            'title', 'calories', 'protein',
+        ))
+        Food.objects.all().delete()
+
+        self.seed(seed=7, users=0)
+        second = list(Food.objects.order_by('id').values_list(
+            'title', 'calories', 'protein',
+        ))
+
+        self.assertEqual(first, second)
+
+    def test_seeded_calories_follow_macros(self):
+        """Test food energy is consistent with its macros"""
+        self.seed()
+
+        for food in Food.objects.all():
+            energy = 4 * food.protein + 4 * food.carbs + 9 * food.fat
+            self.assertAlmostEqual(
+                float(food.calories), float(energy), delta=float(energy) * 0.1 + 1,
+            )
+
+
+class ServeCommandTests(SimpleTestCase):
+    """Test the serve command"""
+
+    def options(self, **options):
+        """Return the default command options"""
+        defaults = {
+            'bind': '0.0.0.0:8000',
+            'workers': None,
+            'threads': 1,
+            'asgi': False,
+            'max_requests': 1000,
+            'max_requests_jitter': 100,
+            'timeout': 30,
+            'graceful_timeout': 30,
+            'keepalive': 5,
+            'no_warmup': False,
+        }
+        defaults.update(options)
+        return defaults
+
+    @patch('core.management.commands.serve.cpu_count', return_value=4)
+    def test_workers_from_cpu_count(self, patched_cpu_count):
+        """Test the worker count is derived from the CPUs"""
+        options = serve.Command().gunicorn_options(self.options())
+
+        self.assertEqual(options['workers'], 9)
+        self.assertEqual(options['worker_class'], 'sync')
+        self.assertTrue(options['preload_app'])
+        self.assertEqual(options['max_requests'], 1000)
+        self.assertIs(options['post_worker_init'], serve.post_worker_init)
+
+    def test_worker_class(self):
+        """Test threads and ASGI select the worker class"""
+        command = serve.Command()
+
+        threaded = command.gunicorn_options(self.options(threads=4))
+        asgi = command.gunicorn_options(self.options(asgi=True))
+
+        self.assertEqual(threaded['worker_class'], 'gthread')
+        self.assertEqual(asgi['worker_class'], 'uvicorn.workers.UvicornWorker')
+        self.assertNotIn('post_worker_init', threaded)
+        self.assertNotIn('post_worker_init', asgi)
+
+    @patch('core.management.commands.serve.connections')
+    @patch('core.warmup.warm_up')
+    def test_app_warmed_up_before_fork(self, patched_warm_up, patched_conns):
+        """Test the app is warmed up and connections closed in the master"""
+        application = serve.Command().load_app(self.options())
+
+        self.assertTrue(callable(application))
+        patched_warm_up.assert_called_once()
+        patched_conns.close_all.assert_called_once()
+
+    @patch('core.management.commands.serve.Application.run')
+    def test_serve_runs_gunicorn(self, patched_run):
+        """Test the command starts gunicorn"""
+        call_command('serve', workers=2, stdout=StringIO())
+
+        patched_run.assert_called_once()
+
+
+class WarmupTests(SimpleTestCase):
+    """Test warming up the app"""
+
+    def test_warm_up(self):
+        """Test every project view is imported and the urls resolved"""
+        views = warmup.warm_urls()
+
+        self.assertIn(FoodViewSet, views)
+        self.assertTrue(get_resolver()._populated)
+
+
+class MicrobenchCommandTests(SimpleTestCase):
+    """Test the microbench command"""
+
+    def test_throttle_benchmark(self):
+        """Test the rate limiter cost is reported"""
+        out = StringIO()
+
+        call_command(
+            'microbench', 'throttle', iterations=50, stdout=out, stderr=out,
+        )
+
+        self.assertIn('"per_call_us"', out.getvalue())
+
+    def test_fixedpoint_benchmark(self):
+        """Test the cost of Decimal and tenths nutrients is reported"""
+        out = StringIO()
+
+        call_command(
+            'microbench', 'fixedpoint', iterations=50, stdout=out, stderr=out,
+        )
+
+        self.assertIn('"saved_cpu_pct"', out.getvalue())
+        self.assertIn('"tenths_peak_kb"', out.getvalue())
+
+    def test_unknown_benchmark(self):
+        """Test unknown benchmark names are rejected"""
+        with self.assertRaises(CommandError):
+            call_command('microbench', 'nope', stdout=StringIO())
+
+
+class PurgeTokensCommandTests(TestCase):
+    """Test the purge_tokens command"""
+
+    def test_purge_expired_tokens(self):
+        """Test expired tokens are deleted in batches, live ones kept"""
+        user = get_user_model().objects.create_user(email='user@example.com')
+        expired = timezone.now() - timedelta(minutes=1)
+        for i in range(5):
+            AuthToken.objects.create(
+                user=user, device=f'old{i}', expires=expired,
+            )
+        live = AuthToken.objects.issue(user)
+
+        out = StringIO()
+        call_command('purge_tokens', batch_size=2, stdout=out)
+
+        self.assertEqual(list(AuthToken.objects.all()), [live])
+        self.assertIn('Deleted 5', out.getvalue())
+
+
+class GcMediaCommandTests(TestCase):
+    """Test the gc_media command"""
+
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.settings = self.settings(MEDIA_ROOT=self.media_root.name)
+        self.settings.enable()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+        )
+
+    def tearDown(self):
+        self.settings.disable()
+        self.media_root.cleanup()
+
+    def store(self, content, age_hours=48):
+        """Store a file and backdate it"""
+        name = content_storage.save(
+            'uploads/recipe/image.jpg', ContentFile(content),
+        )
+        mtime = time.time() - age_hours * 3600
+        os.utime(content_storage.path(name), (mtime, mtime))
+        return name
+
+    def create_recipe(self, image):
+        """Create a recipe referencing an image"""
+        return Recipe.objects.create(
+            user=self.user,
+            title='Sample recipe',
+            category='Supe',
+            time_minutes=5,
+            calories=1,
+            protein=1,
+            carbs=1,
+            fibers=1,
+            fat=1,
+            image=image,
+        )
+
+    def test_delete_unreferenced_files(self):
+        """Test only old files no recipe refers to are deleted"""
+        kept = self.store(b'kept')
+        self.create_recipe(kept)
+        orphan = self.store(b'orphan')
+        release(orphan)
+        recent = self.store(b'recent', age_hours=1)
+        release(recent)
+
+        out = StringIO()
+        call_command('gc_media', workers=1, stdout=out)
+
+        self.assertTrue(content_storage.exists(kept))
+        self.assertTrue(content_storage.exists(recent))
+        self.assertFalse(content_storage.exists(orphan))
+        self.assertFalse(MediaFile.objects.filter(name=orphan).exists())
+        self.assertIn('Deleted 1 files', out.getvalue())
+
+    def test_counted_reference_kept(self):
+        """Test files with references not saved yet are kept"""
+        name = self.store(b'uploading')
+
+        call_command('gc_media', workers=1, stdout=StringIO())
+
+        self.assertTrue(content_storage.exists(name))
+
+    def test_dry_run(self):
+        """Test a dry run only lists the files"""
+        orphan = self.store(b'orphan')
+        release(orphan)
+
+        out = StringIO()
+        call_command('gc_media', dry_run=True, stdout=out)
+
+        self.assertTrue(content_storage.exists(orphan))
+        self.assertIn(orphan, out.getvalue())
+
+
+class LoadBarcodesCommandTests(TestCase):
+    """Test loading barcode datasets"""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            email='barcodes@example.com',
+            password='testpass123',
+        )
+        macros = {
+            'calories': 1, 'carbs': 1, 'fibers': 1, 'fat': 1, 'protein': 1,
+        }
+        self.milk = Food.objects.create(user=user, title='Lapte', **macros)
+        self.bread = Food.objects.create(user=user, title='Paine', **macros)
+
+    def load(self, rows, **options):
+        """Load CSV rows from a temporary file and return the output"""
+        out = StringIO()
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as f:
+            f.write('code,food_id\n')
+            f.writelines(f'{code},{food_id}\n' for code, food_id in rows)
+            f.flush()
+            call_command('load_barcodes', f.name, stdout=out, **options)
+        return out.getvalue()
+
+    def test_load_barcodes(self):
+        """Test valid codes of known foods are loaded normalised"""
+        out = self.load([
+            ('036000291452', self.milk.id),
+            ('4006381333931', self.bread.id),
+            ('4006381333932', self.bread.id),
+            ('96385074', self.bread.id + 100),
+        ], batch_size=2)
+
+        self.assertEqual(
+            dict(FoodBarcode.objects.values_list('code', 'food_id')),
+            {
+                '00036000291452': self.milk.id,
+                '04006381333931': self.bread.id,
+            },
+        )
+        self.assertIn('Loaded 2 barcodes, skipped 1 invalid codes and 1', out)
+
+    def test_load_barcodes_reassigns(self):
+        """Test loading a known code moves it and drops its cached lookup"""
+        FoodBarcode.objects.create(code='04006381333931', food=self.milk)
+        cache.set(barcodes.cache_key('04006381333931'), {'id': self.milk.id})
+
+        self.load([('4006381333931', self.bread.id)])
+
+        self.assertEqual(
+            FoodBarcode.objects.get(code='04006381333931').food, self.bread,
+        )
+        self.assertIsNone(cache.get(barcodes.cache_key('04006381333931')))
@@ -0,0 +1,116 @@
+"""Tests for assembling the dashboard"""
+import datetime
+import threading
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from core import dashboard
+from core.models import Activity
+
+
+class EnergyTargetsTests(SimpleTestCase):
+    """Test the daily targets derived from the profile"""
+
+    def user(self, **fields):
+        """Return a profile with the given fields"""
+        return SimpleNamespace(**{
+            'weight': 60.0, 'height': 165.0, 'gender': 2,
+            'activity_factor': 1, 'calorie_goal': 0.0,
+            'dob': datetime.date(1996, 6, 1), **fields,
+        })
+
+    def test_estimates(self):
+        """Test the expenditure follows the profile and activity level"""
+        today = datetime.date(2026, 5, 31)
+
+        targets = dashboard.energy_targets(self.user(), today)
+
+        # Mifflin-St Jeor: 600 + 1031.25 - 5 * 29 - 161
+        self.assertEqual(targets['bmr'], 1325.2)
+        self.assertEqual(targets['tdee'], 1590.3)
+        self.assertEqual(targets['carbs'], round(1590.3 * 0.5 / 4, 1))
+
+    def test_unknown_gender(self):
+        """Test profiles without a gender get the mean offset"""
+        today = datetime.date(2026, 6, 1)
+
+        female = dashboard.energy_targets(self.user(), today)
+        unknown = dashboard.energy_targets(self.user(gender=3), today)
+
+        self.assertEqual(unknown['bmr'], female['bmr'] + 83)
+
+
+class GatherTests(SimpleTestCase):
+    """Test running the parts of the dashboard"""
+
+    def parts(self):
+        """Return parts reporting the thread they ran on"""
+        return {
+            name: lambda: threading.current_thread().name
+            for name in ['profile', 'recent']
+        }
+
+    def test_inline(self):
+        """Test the parts run on the request thread when not concurrent"""
+        with patch('core.dashboard.concurrent', return_value=False):
+            results = dashboard.gather(self.parts())
+
+        name = threading.current_thread().name
+        self.assertEqual(results, {'profile': name, 'recent': name})
+
+    def test_thread_pool(self):
+        """Test the parts run on the pool of the process"""
+        with patch('core.dashboard.concurrent', return_value=True):
+            results = dashboard.gather(self.parts())
+
+        self.assertEqual(set(results), {'profile', 'recent'})
+        for name in results.values():
+            self.assertTrue(name.startswith('dashboard'))
+
+    def test_not_in_transaction(self):
+        """Test open transactions keep the parts on their connection"""
+        with override_settings(DASHBOARD_WORKERS=4), \
+                patch('core.dashboard.connection') as connection:
+            connection.vendor = 'postgresql'
+            connection.in_atomic_block = True
+            self.assertFalse(dashboard.concurrent())
+
+            connection.in_atomic_block = False
+            self.assertTrue(dashboard.concurrent())
+
+        with override_settings(DASHBOARD_WORKERS=1):
+            self.assertFalse(dashboard.concurrent())
+
+
+class GatherQueriesTests(TransactionTestCase):
+    """Test the parts querying the database on the pool"""
+
+    def test_queries_on_pool(self):
+        """Test the parts query on their own connections, closed after"""
+        user = get_user_model().objects.create_user(
+            email='user@example.com', password='testpass123',
+        )
+        for met in [2.0, 3.5, 8.0]:
+            Activity.objects.create(user=user, title=f'MET {met}', met=met)
+
+        def part():
+            return dashboard.suggestions(), connections['default']
+
+        closed = []
+        with patch('core.dashboard.concurrent', return_value=True), \
+                patch.object(
+                    type(connections['default']), 'close',
+                    autospec=True, side_effect=closed.append,
+                ):
+            results = dashboard.gather({'profile': part, 'recent': part})
+
+        for suggestions, wrapper in results.values():
+            self.assertEqual(
+                [activity.met for activity in suggestions], [3.5, 8.0],
+            )
+            self.assertIsNot(wrapper, connections['default'])
+            self.assertIn(wrapper, closed)
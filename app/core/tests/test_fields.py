@@ -0,0 +1,132 @@
+"""Tests for the fixed-point nutrient fields"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from rest_framework import serializers
+
+from core.fields import TenthsField, to_tenths
+from core.models import Food
+from food.serializers import FoodDetailSerializer
+
+
+class ToTenthsTests(SimpleTestCase):
+    """Test converting numbers to tenths"""
+
+    def test_numbers(self):
+        """Test ints, floats, decimals and strings are converted"""
+        self.assertEqual(to_tenths(52), 520)
+        self.assertEqual(to_tenths(0.1 + 0.2), 3)
+        self.assertEqual(to_tenths(Decimal('241.2')), 2412)
+        self.assertEqual(to_tenths('-8.3'), -83)
+
+    def test_rounding(self):
+        """Test values are rounded half to even like DecimalField"""
+        self.assertEqual(to_tenths(Decimal('680.35')), 6804)
+        self.assertEqual(to_tenths(Decimal('680.45')), 6804)
+        self.assertEqual(to_tenths(Decimal('18.34')), 183)
+
+    def test_form_field(self):
+        """Test admin forms edit the value as a decimal"""
+        formfield = TenthsField().formfield()
+
+        self.assertEqual(formfield.clean('52.3'), Decimal('52.3'))
+        self.assertEqual(formfield.decimal_places, 1)
+
+
+class TenthsFieldTests(TestCase):
+    """Test storing and serializing nutrient values as tenths"""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(email='t@example.com')
+        self.food = Food.objects.create(
+            user=user,
+            title='Mar',
+            calories=Decimal('52.35'),
+            carbs=14,
+            fibers=2.4,
+            fat='0.2',
+            protein=Decimal('0.3'),
+        )
+
+    def test_stored_as_tenths(self):
+        """Test the column holds integers and reads back as floats"""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT calories, carbs, fibers FROM core_food WHERE id = %s',
+                [self.food.id],
+            )
+            self.assertEqual(cursor.fetchone(), (524, 140, 24))
+
+        self.food.refresh_from_db()
+        self.assertEqual(self.food.calories, 52.4)
+        self.assertIsInstance(self.food.fat, float)
+
+    def test_lookups(self):
+        """Test lookups compare values, not tenths"""
+        self.assertTrue(Food.objects.filter(calories__gt=52.3).exists())
+        self.assertFalse(Food.objects.filter(calories__gt='52.4').exists())
+        self.assertTrue(Food.objects.filter(fibers=Decimal('2.4')).exists())
+
+        # calories are 52.4, bounds are not rounded to whole numbers
+        matches = {
+            'calories__gte': [52.3, 52.4, 52.35],
+            'calories__lt': [52.5, 52.41, Decimal('52.45')],
+            'calories__gt': [52.3, 52.39],
+            'calories__lte': [52.4, 52.45],
+        }
+        misses = {
+            'calories__gte': [52.5, 52.41],
+            'calories__lt': [52.4, 52.35],
+            'calories__gt': [52.4, 52.45],
+            'calories__lte': [52.3, 52.39],
+        }
+        for lookup, values in matches.items():
+            for value in values:
+                with self.subTest(lookup=lookup, value=value):
+                    self.assertTrue(
+                        Food.objects.filter(**{lookup: value}).exists(),
+                    )
+        for lookup, values in misses.items():
+            for value in values:
+                with self.subTest(lookup=lookup, value=value):
+                    self.assertFalse(
+                        Food.objects.filter(**{lookup: value}).exists(),
+                    )
+
+    def test_serializer(self):
+        """Test values render as numbers with one decimal place"""
+        food = Food.objects.get(pk=self.food.pk)
+
+        data = FoodDetailSerializer(food).data
+
+        self.assertEqual(data['calories'], 52.4)
+        self.assertEqual(data['carbs'], 14.0)
+        self.assertIsInstance(data['carbs'], float)
+        # mapped by the serializers of the app only
+        self.assertNotIn(
+            TenthsField, serializers.ModelSerializer.serializer_field_mapping,
+        )
+
+    @override_settings(REST_FRAMEWORK={'COERCE_DECIMAL_TO_STRING': True})
+    def test_serializer_strings(self):
+        """Test values render as strings when decimals are coerced"""
+        food = Food.objects.get(pk=self.food.pk)
+
+        data = FoodDetailSerializer(food).data
+
+        self.assertEqual(data['calories'], '52.4')
+
+    def test_serializer_validation(self):
+        """Test input is validated like a DecimalField"""
+        serializer = FoodDetailSerializer(data={
+            'title': 'Para', 'calories': '57.25', 'carbs': '15',
+            'fibers': '3.1', 'fat': '0.1', 'protein': '1000000',
+        })
+
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(
+            set(serializer.errors), {'calories', 'protein'},
+        )
@@ -0,0 +1,100 @@
+"""Tests for bounded password hashing"""
+import threading
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import hashing
+
+
+class BoundedExecutorTests(SimpleTestCase):
+    """Test the bounded executor"""
+
+    def test_run_returns_result(self):
+        """Test work runs on the pool and returns its result"""
+        executor = hashing.BoundedExecutor(1, 0)
+
+        name = executor.run(lambda: threading.current_thread().name)
+
+        self.assertTrue(name.startswith('hashing'))
+
+    def test_nested_run_does_not_deadlock(self):
+        """Test work started from the pool runs inline"""
+        executor = hashing.BoundedExecutor(1, 0)
+
+        result = executor.run(lambda: executor.run(lambda: 'inner'))
+
+        self.assertEqual(result, 'inner')
+
+    def test_full_queue_rejected(self):
+        """Test work is rejected once workers and queue are full"""
+        executor = hashing.BoundedExecutor(1, 1)
+        release = threading.Event()
+        started = threading.Event()
+
+        def block():
+            started.set()
+            release.wait(5)
+
+        runners = [
+            threading.Thread(target=executor.run, args=(block,))
+            for _ in range(2)
+        ]
+        for runner in runners:
+            runner.start()
+        started.wait(5)
+
+        with self.assertRaises(hashing.HashingBusy):
+            executor.run(lambda: None)
+
+        release.set()
+        for runner in runners:
+            runner.join(5)
+        self.assertIsNone(executor.run(lambda: None))
+
+
+class PasswordHashingTests(TestCase):
+    """Test hashing of user passwords"""
+
+    def test_new_passwords_use_argon2(self):
+        """Test new users get an argon2 hash"""
+        user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+
+        self.assertTrue(user.password.startswith('argon2'))
+
+    def test_hash_upgraded_on_login(self):
+        """Test an old PBKDF2 hash is replaced after a successful login"""
+        user = get_user_model().objects.create_user(email='user@example.com')
+        user.password = make_password('testpass123', hasher='pbkdf2_sha256')
+        user.save()
+
+        res = APIClient().post(reverse('user:token'), {
+            'email': 'user@example.com',
+            'password': 'testpass123',
+        })
+
+        user.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(user.password.startswith('argon2'))
+
+    @patch('core.hashing.BoundedExecutor.run')
+    def test_login_when_hashing_busy(self, patched_run):
+        """Test logins fail fast with 503 when the pool is saturated"""
+        patched_run.side_effect = hashing.HashingBusy()
+
+        res = APIClient().post(reverse('user:token'), {
+            'email': 'user@example.com',
+            'password': 'testpass123',
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(res['Retry-After'], '1')
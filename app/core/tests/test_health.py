@@ -0,0 +1,59 @@
+"""Tests for the health and readiness endpoints"""
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+
+from core import health
+
+
+HEALTHZ_URL = reverse('healthz')
+READYZ_URL = reverse('readyz')
+
+
+class HealthzTests(SimpleTestCase):
+    """Test the liveness endpoint"""
+
+    def test_healthz(self):
+        """Test liveness is reported without touching the database"""
+        res = self.client.get(HEALTHZ_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.content, b'ok')
+
+
+@override_settings(READINESS_TTL=60)
+class ReadyzTests(TestCase):
+    """Test the readiness endpoint"""
+
+    def setUp(self):
+        health.reset()
+
+    def tearDown(self):
+        health.reset()
+
+    def test_readyz_cached(self):
+        """Test the database is pinged once per TTL"""
+        with self.assertNumQueries(1):
+            first = self.client.get(READYZ_URL)
+            second = self.client.get(READYZ_URL)
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+
+    @override_settings(READINESS_TTL=0)
+    def test_readyz_expired(self):
+        """Test the database is pinged again once the TTL passed"""
+        with self.assertNumQueries(2):
+            self.client.get(READYZ_URL)
+            self.client.get(READYZ_URL)
+
+    @patch('core.health.ping', return_value=False)
+    def test_readyz_database_down(self, patched_ping):
+        """Test an unreachable database makes the app unready"""
+        res = self.client.get(READYZ_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(res['Cache-Control'], 'no-store')
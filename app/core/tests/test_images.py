@@ -0,0 +1,149 @@
+"""Tests for validating uploaded images"""
+import io
+import os
+import struct
+import subprocess
+import sys
+import tempfile
+import zlib
+from unittest import skipUnless
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+
+from PIL import Image
+
+from core import images
+
+
+# downscales a JPEG and prints the peak memory growth in KiB, VmHWM is
+# used as ru_maxrss keeps the peak of the parent process across exec
+MEASURE_SCRIPT = '''
+import sys
+
+import django
+django.setup()
+
+from django.conf import settings
+from django.core.files import File
+
+from core import images
+
+settings.IMAGE_MAX_SIDE = int(sys.argv[2])
+
+
+def peak_kib():
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1])
+
+
+before = peak_kib()
+with open(sys.argv[1], 'rb') as f:
+    result = images.prepare_upload(File(f, name='large.jpg'))
+    result.close()
+print(peak_kib() - before)
+'''
+
+
+def image_upload(size, image_format='JPEG', name='image.jpg'):
+    """Return an uploaded image file"""
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color=(200, 50, 50)).save(buffer, image_format)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+def png_header(width, height):
+    """Return a PNG declaring a size but holding no pixel data"""
+    def chunk(kind, data):
+        crc = zlib.crc32(kind + data)
+        return struct.pack('>I', len(data)) + kind + data + struct.pack(
+            '>I', crc,
+        )
+
+    ihdr = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', ihdr) + chunk(b'IEND', b'')
+
+
+@override_settings(IMAGE_MAX_SIDE=64)
+class PrepareUploadTests(SimpleTestCase):
+    """Test validating and downscaling uploads"""
+
+    def test_small_image_unchanged(self):
+        """Test images within the limits are stored as uploaded"""
+        upload = image_upload((32, 16))
+
+        result = images.prepare_upload(upload)
+
+        self.assertIs(result, upload)
+
+    def test_large_image_downscaled(self):
+        """Test large images are fitted to the maximum side"""
+        result = images.prepare_upload(image_upload((640, 320)))
+
+        with Image.open(result) as image:
+            self.assertEqual(image.size, (64, 32))
+            self.assertEqual(image.format, 'JPEG')
+        self.assertEqual(result.name, 'image.jpg')
+
+    def test_decompression_bomb_rejected(self):
+        """Test images with too many pixels are rejected from the header"""
+        upload = SimpleUploadedFile('bomb.png', png_header(60000, 60000))
+
+        with self.assertRaisesMessage(images.InvalidImage, 'too many pixels'):
+            images.prepare_upload(upload)
+
+    @override_settings(IMAGE_UPLOAD_MAX_BYTES=1024)
+    def test_oversize_file_rejected(self):
+        """Test files over the size limit are rejected unread"""
+        upload = SimpleUploadedFile('large.jpg', b'\xff' * 2048)
+
+        with self.assertRaisesMessage(images.InvalidImage, 'smaller than'):
+            images.prepare_upload(upload)
+
+    def test_not_an_image_rejected(self):
+        """Test files that are no image are rejected"""
+        upload = SimpleUploadedFile('image.jpg', b'not an image')
+
+        with self.assertRaises(images.InvalidImage):
+            images.prepare_upload(upload)
+
+    def test_unsupported_format_rejected(self):
+        """Test only the allowed formats are accepted"""
+        upload = image_upload((8, 8), 'BMP', name='image.bmp')
+
+        with self.assertRaisesMessage(images.InvalidImage, 'BMP'):
+            images.prepare_upload(upload)
+
+
+@skipUnless(os.path.exists('/proc/self/status'), 'needs /proc')
+class PeakMemoryTests(SimpleTestCase):
+    """Test downscaling keeps memory bounded"""
+
+    def test_downscale_peak_memory(self):
+        """Test a large JPEG is downscaled without a full decode"""
+        # just below IMAGE_UPLOAD_MAX_PIXELS
+        width, height = 5600, 4200
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as f:
+            Image.new('RGB', (width, height), color=(10, 120, 30)).save(
+                f, 'JPEG',
+            )
+            f.flush()
+
+            # a fresh process, so earlier tests do not set the peak
+            result = subprocess.run(
+                [sys.executable, '-c', MEASURE_SCRIPT, f.name, '512'],
+                cwd=settings.BASE_DIR,
+                env=os.environ,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+
+        growth_kib = int(result.stdout.strip().splitlines()[-1])
+        # pillow holds RGB as 4 bytes per pixel, a full decode needs 90 MB
+        full_decode_kib = width * height * 4 // 1024
+        # draft mode decodes at 1/8 scale here
+        self.assertLess(growth_kib, full_decode_kib / 8)
@@ -0,0 +1,161 @@
+"""Tests for serving media files"""
+import os
+import tempfile
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+
+from rest_framework import status
+
+from core import media
+from core.models import Recipe
+
+
+CONTENT = bytes(range(256)) * 4
+
+
+def media_url(name):
+    """Return the URL of a media file"""
+    return reverse('media', args=[name])
+
+
+class ParseRangeTests(TestCase):
+    """Test parsing Range headers"""
+
+    def test_ranges(self):
+        """Test single byte ranges are resolved against the size"""
+        self.assertEqual(media.parse_range('bytes=0-9', 100), (0, 9))
+        self.assertEqual(media.parse_range('bytes=90-', 100), (90, 99))
+        self.assertEqual(media.parse_range('bytes=-10', 100), (90, 99))
+        self.assertEqual(media.parse_range('bytes=50-500', 100), (50, 99))
+
+    def test_ignored(self):
+        """Test malformed and multiple ranges are ignored"""
+        self.assertIsNone(media.parse_range(None, 100))
+        self.assertIsNone(media.parse_range('bytes=0-1,5-6', 100))
+        self.assertIsNone(media.parse_range('items=0-1', 100))
+
+    def test_not_satisfiable(self):
+        """Test ranges outside the file are rejected"""
+        with self.assertRaises(media.RangeNotSatisfiable):
+            media.parse_range('bytes=100-', 100)
+        with self.assertRaises(media.RangeNotSatisfiable):
+            media.parse_range('bytes=-0', 100)
+
+
+class MediaViewTests(TestCase):
+    """Test the media view"""
+
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.settings = override_settings(
+            MEDIA_ROOT=self.media_root.name,
+            MEDIA_SENDFILE='',
+        )
+        self.settings.enable()
+
+        self.name = 'uploads/recipe/image.jpg'
+        path = os.path.join(self.media_root.name, self.name)
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as f:
+            f.write(CONTENT)
+        self.mtime = os.stat(path).st_mtime
+
+        user = get_user_model().objects.create_user(email='user@example.com')
+        Recipe.objects.create(
+            user=user,
+            title='Sample recipe',
+            category='Supe',
+            time_minutes=5,
+            calories=Decimal('1'),
+            protein=Decimal('1'),
+            carbs=Decimal('1'),
+            fibers=Decimal('1'),
+            fat=Decimal('1'),
+            image=self.name,
+        )
+
+    def tearDown(self):
+        self.settings.disable()
+        self.media_root.cleanup()
+
+    def test_serve_file(self):
+        """Test the file is served with far future caching"""
+        res = self.client.get(media_url(self.name))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(res.streaming_content), CONTENT)
+        self.assertEqual(res['Content-Type'], 'image/jpeg')
+        self.assertEqual(res['Content-Length'], str(len(CONTENT)))
+        self.assertIn('immutable', res['Cache-Control'])
+        self.assertEqual(res['Accept-Ranges'], 'bytes')
+
+    def test_range(self):
+        """Test a byte range is served partially"""
+        res = self.client.get(
+            media_url(self.name), HTTP_RANGE='bytes=10-19',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b''.join(res.streaming_content), CONTENT[10:20])
+        self.assertEqual(res['Content-Length'], '10')
+        self.assertEqual(
+            res['Content-Range'], f'bytes 10-19/{len(CONTENT)}',
+        )
+
+    def test_range_not_satisfiable(self):
+        """Test a range past the end of the file is rejected"""
+        res = self.client.get(
+            media_url(self.name), HTTP_RANGE='bytes=5000-',
+        )
+
+        self.assertEqual(
+            res.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+        )
+
+    def test_not_modified(self):
+        """Test If-Modified-Since returns 304 for unchanged files"""
+        res = self.client.get(
+            media_url(self.name),
+            HTTP_IF_MODIFIED_SINCE=http_date(self.mtime),
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_unreferenced_file_not_found(self):
+        """Test files no recipe refers to are not served"""
+        Recipe.objects.update(image=None)
+
+        res = self.client.get(media_url(self.name))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_write_not_allowed(self):
+        """Test only GET and HEAD are allowed"""
+        res = self.client.post(media_url(self.name))
+
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def test_x_accel_redirect(self):
+        """Test nginx is told to send the file"""
+        with override_settings(MEDIA_SENDFILE='nginx'):
+            res = self.client.get(media_url(self.name))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.content, b'')
+        self.assertEqual(
+            res['X-Accel-Redirect'], '/protected-media/' + self.name,
+        )
+
+    def test_x_sendfile(self):
+        """Test apache is told to send the file"""
+        with override_settings(MEDIA_SENDFILE='apache'):
+            res = self.client.get(media_url(self.name))
+
+        self.assertEqual(
+            res['X-Sendfile'],
+            os.path.join(self.media_root.name, self.name),
+        )
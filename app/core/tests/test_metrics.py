@@ -0,0 +1,153 @@
+"""Tests for the metrics endpoint"""
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from prometheus_client import REGISTRY
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import dashboard, metrics, trending
+
+
+METRICS_URL = reverse('metrics')
+
+
+def sample(name, **labels):
+    """Return the current value of a metric sample"""
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class MetricsTests(TestCase):
+    """Test recording and exposing metrics"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+
+    def test_metrics_text_format(self):
+        """Test the endpoint returns the Prometheus text format"""
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        self.assertIn(b'api_request_duration_seconds', res.content)
+
+    def test_request_latency_and_queries_recorded(self):
+        """Test a request records its view, action, status and queries"""
+        labels = {'view': 'food:food-list', 'action': 'list'}
+        before = sample('api_request_duration_seconds_count', **labels)
+        before_ok = sample('api_responses_total', status='200', **labels)
+        before_queries = sample('api_db_queries_total', view='food:food-list')
+
+        self.client.force_authenticate(self.user)
+        self.client.get(reverse('food:food-list'))
+
+        self.assertEqual(
+            sample('api_request_duration_seconds_count', **labels),
+            before + 1,
+        )
+        self.assertEqual(
+            sample('api_responses_total', status='200', **labels),
+            before_ok + 1,
+        )
+        self.assertGreater(
+            sample('api_db_queries_total', view='food:food-list'),
+            before_queries,
+        )
+
+    def test_auth_failures_recorded(self):
+        """Test failed logins and unauthenticated calls are counted"""
+        before = sample('api_auth_failures_total', reason='credentials')
+        before_anon = sample(
+            'api_auth_failures_total', reason='unauthenticated',
+        )
+
+        self.client.post(reverse('user:token'), {
+            'email': 'user@example.com',
+            'password': 'wrong-password',
+        })
+        self.client.get(reverse('food:food-list'))
+
+        self.assertEqual(
+            sample('api_auth_failures_total', reason='credentials'),
+            before + 1,
+        )
+        self.assertEqual(
+            sample('api_auth_failures_total', reason='unauthenticated'),
+            before_anon + 1,
+        )
+
+    def test_multiprocess_aggregation(self):
+        """Test metrics are collected from the shared directory if set"""
+        with tempfile.TemporaryDirectory() as path:
+            with patch.dict('os.environ', {'PROMETHEUS_MULTIPROC_DIR': path}):
+                with patch(
+                    'core.metrics.multiprocess.MultiProcessCollector'
+                ) as collector:
+                    res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        collector.assert_called_once()
+
+    def test_remote_scrapers_forbidden(self):
+        """Test only allowed networks and staff users read the metrics"""
+        res = self.client.get(METRICS_URL, REMOTE_ADDR='203.0.113.9')
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        with override_settings(METRICS_ALLOWED_NETWORKS=['203.0.113.0/24']):
+            res = self.client.get(METRICS_URL, REMOTE_ADDR='203.0.113.9')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        staff = get_user_model().objects.create_user(
+            email='staff@example.com', password='testpass123', is_staff=True,
+        )
+        self.client.force_login(staff)
+        res = self.client.get(METRICS_URL, REMOTE_ADDR='203.0.113.9')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_cache_lookups_recorded(self):
+        """Test cache hits and misses are counted per cache"""
+        cache.clear()
+        before_miss = sample(
+            'api_cache_requests_total', cache='trending', result='miss',
+        )
+        before_hit = sample(
+            'api_cache_requests_total', cache='trending', result='hit',
+        )
+
+        trending.top_foods()
+        trending.top_foods()
+
+        self.assertEqual(
+            sample('api_cache_requests_total', cache='trending', result='miss'),
+            before_miss + 1,
+        )
+        self.assertEqual(
+            sample('api_cache_requests_total', cache='trending', result='hit'),
+            before_hit + 1,
+        )
+
+    def test_pool_queries_counted(self):
+        """Test the dashboard threads add to the stats of the request"""
+        def query():
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+
+        stats = [0, 0.0]
+        token = metrics.db_stats.set(stats)
+        try:
+            with patch('core.dashboard.concurrent', return_value=True):
+                dashboard.gather({'profile': query, 'recent': query})
+        finally:
+            metrics.db_stats.reset(token)
+
+        self.assertEqual(stats[0], 2)
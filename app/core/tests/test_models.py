@@ -1,11 +1,16 @@
 """Tests for models"""
-from unittest.mock import patch
+import hashlib
+import os
+import tempfile
 from decimal import Decimal
 
+from django.core.files.base import ContentFile
+from django.db import IntegrityError
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
 from core import models
+from core.storage import content_storage, release
 
 
 class ModelTests(TestCase):
@@ -74,19 +79,63 @@ class ModelTests(TestCase):
 
         self.assertEqual(str(recipe), recipe.title)
 
-    @patch('core.models.uuid.uuid4')
-    def test_recipe_file_name_uuid(self, mock_uuid):
-        """Test generating image path"""
-        # create a test uuid
-        uuid = 'test-uuid'
-        mock_uuid.return_value = uuid
+    def test_recipe_file_name_content_hash(self):
+        """Test generating image path from the image content"""
+        content = b'image content'
+        digest = hashlib.sha256(content).hexdigest()
 
-        # generate path to uploaded image
-        file_path = models.recipe_image_file_path(None, 'example.jpg')
+        with tempfile.TemporaryDirectory() as media_root:
+            with self.settings(MEDIA_ROOT=media_root):
+                file_path = models.recipe_image_file_path(None, 'Example.JPG')
+                name = content_storage.save(file_path, ContentFile(content))
 
         # check if image is stored in expected path and
-        # name matches the uuid
-        self.assertEqual(file_path, f'uploads/recipe/{uuid}.jpg')
+        # name matches the content hash
+        self.assertEqual(name, f'uploads/recipe/{digest[:2]}/{digest}.jpg')
+
+    def test_recipe_image_deduplicated(self):
+        """Test identical images are stored once and reference counted"""
+        with tempfile.TemporaryDirectory() as media_root:
+            with self.settings(MEDIA_ROOT=media_root):
+                first = content_storage.save(
+                    'uploads/recipe/a.jpg', ContentFile(b'same'),
+                )
+                second = content_storage.save(
+                    'uploads/recipe/b.jpg', ContentFile(b'same'),
+                )
+                files = [
+                    name for _, _, names in os.walk(media_root)
+                    for name in names
+                ]
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(files), 1)
+        media_file = models.MediaFile.objects.get(name=first)
+        self.assertEqual(media_file.references, 2)
+
+        release(first)
+        media_file.refresh_from_db()
+        self.assertEqual(media_file.references, 1)
+
+    def test_failed_recipe_save_keeps_no_reference(self):
+        """Test the image reference is rolled back with the recipe"""
+        recipe = models.Recipe(
+            title='Sample recipe',
+            time_minutes=5,
+            calories=1,
+            protein=1,
+            carbs=1,
+            fibers=1,
+            fat=1,
+            image=ContentFile(b'image', name='a.jpg'),
+        )
+        with tempfile.TemporaryDirectory() as media_root:
+            with self.settings(MEDIA_ROOT=media_root):
+                # no user, the insert fails after the image was stored
+                with self.assertRaises(IntegrityError):
+                    recipe.save()
+
+        self.assertFalse(models.MediaFile.objects.exists())
 
 
     def test_create_food(self):
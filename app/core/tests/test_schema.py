@@ -0,0 +1,94 @@
+"""Tests for the precomputed OpenAPI schema"""
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+
+from core import checks, schema
+
+
+SCHEMA_URL = reverse('api-schema')
+
+
+class SchemaViewTests(SimpleTestCase):
+    """Test serving the schema"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'openapi.json')
+        self.settings = override_settings(OPENAPI_SCHEMA_FILE=self.path)
+        self.settings.enable()
+        schema.reset()
+
+    def tearDown(self):
+        schema.reset()
+        self.settings.disable()
+        self.tmpdir.cleanup()
+
+    def test_generated_once(self):
+        """Test the schema is generated on first use only"""
+        with patch('core.schema.generate', wraps=schema.generate) as gen:
+            first = self.client.get(SCHEMA_URL)
+            second = self.client.get(SCHEMA_URL, {'format': 'json'})
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertIn(b'openapi: 3.0.3', first.content)
+        self.assertEqual(json.loads(second.content)['openapi'], '3.0.3')
+        self.assertEqual(gen.call_count, 1)
+
+    def test_etag_not_modified(self):
+        """Test a matching If-None-Match returns 304"""
+        res = self.client.get(SCHEMA_URL)
+
+        cached = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(cached.content, b'')
+
+    def test_gzip(self):
+        """Test clients accepting gzip get the compressed schema"""
+        plain = self.client.get(SCHEMA_URL)
+
+        res = self.client.get(SCHEMA_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(res.content), plain.content)
+        self.assertIn('Accept-Encoding', res['Vary'])
+
+    def test_built_schema_served(self):
+        """Test a built schema is served without generating it"""
+        call_command('build_schema', stdout=StringIO())
+        schema.reset()
+
+        with patch('core.schema.generate') as gen:
+            res = self.client.get(SCHEMA_URL, HTTP_ACCEPT='application/json')
+
+        gen.assert_not_called()
+        self.assertIn('/api/food/foods/', json.loads(res.content)['paths'])
+
+    def test_check_schema(self):
+        """Test the check reports a missing or stale schema"""
+        self.assertEqual(checks.check_schema(None)[0].id, 'core.W001')
+
+        call_command('build_schema', stdout=StringIO())
+        self.assertEqual(checks.check_schema(None), [])
+
+        with open(self.path, 'w') as f:
+            json.dump({'openapi': '3.0.3', 'paths': {}}, f)
+        self.assertEqual(checks.check_schema(None)[0].id, 'core.W002')
+
+    def test_auth_extensions_registered(self):
+        """Test the generated schema describes the custom auth classes"""
+        generated = schema.generate()
+
+        self.assertIn(
+            'signedTokenAuth', generated['components']['securitySchemes'],
+        )
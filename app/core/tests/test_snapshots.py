@@ -0,0 +1,238 @@
+"""Tests for the catalog snapshots"""
+import gzip
+import json
+import os
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import changes, snapshots
+from core.models import Activity, Change, Food
+
+
+SNAPSHOT_URL = reverse('catalog-snapshot')
+
+
+class SnapshotTests(TestCase):
+    """Test building and downloading catalog snapshots"""
+
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.TemporaryDirectory()
+        self.settings = override_settings(
+            MEDIA_ROOT=self.media_root.name,
+            MEDIA_SENDFILE='',
+            CHANGES_SETTLE_SECONDS=0,
+        )
+        self.settings.enable()
+
+        self.user = get_user_model().objects.create_user(
+            email='snapshot@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.food = Food.objects.create(
+            user=self.user,
+            title='Mar',
+            calories=Decimal('52'),
+            carbs=Decimal('14'),
+            fibers=Decimal('2.4'),
+            fat=Decimal('0.2'),
+            protein=Decimal('0.3'),
+        )
+        Activity.objects.create(user=self.user, title='Alergare', met=7)
+
+    def tearDown(self):
+        self.settings.disable()
+        self.media_root.cleanup()
+
+    def read(self, version, digest):
+        """Return the decoded lines of a stored snapshot"""
+        path = os.path.join(
+            self.media_root.name, snapshots.name(version, digest),
+        )
+        with gzip.open(path, 'rt') as f:
+            return [json.loads(line) for line in f]
+
+    def test_build(self):
+        """Test a snapshot holds the header and every catalog object"""
+        version, digest = snapshots.build()
+
+        header, *rows = self.read(version, digest)
+        self.assertEqual(version, snapshots.current_version())
+        self.assertEqual(header['version'], version)
+        self.assertEqual(
+            [(row['type'], row['data']['title']) for row in rows],
+            [('food', 'Mar'), ('activity', 'Alergare')],
+        )
+        self.assertEqual(rows[0]['data']['id'], self.food.id)
+        self.assertEqual(snapshots.latest(), (version, digest))
+
+    def test_old_snapshots_pruned(self):
+        """Test only the newest SNAPSHOT_KEEP snapshots are kept"""
+        built = []
+        for title in ['Para', 'Prune', 'Piersica']:
+            Food.objects.filter(pk=self.food.pk).update(title=title)
+            self.food.save()
+            built.append(snapshots.build())
+
+        self.assertEqual(snapshots.stored(), built[:0:-1])
+
+    def test_forced_rebuild_replaces_snapshot(self):
+        """Test a rebuild of the same version gets a new ETag"""
+        version, digest = snapshots.build()
+        # written without a change, only a forced rebuild picks it up
+        Food.objects.filter(pk=self.food.pk).update(title='Para')
+
+        call_command('build_snapshot', force=True, stdout=StringIO())
+
+        rebuilt = snapshots.latest()
+        self.assertEqual(rebuilt[0], version)
+        self.assertNotEqual(rebuilt[1], digest)
+        self.assertEqual(snapshots.stored(), [rebuilt])
+        res = self.client.get(SNAPSHOT_URL, HTTP_IF_NONE_MATCH=(
+            f'"{version}-{digest}"'
+        ))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_stale_tmp_files_removed(self):
+        """Test partial files of dead builds are removed, running ones kept"""
+        directory = snapshots.snapshot_dir()
+        os.makedirs(directory)
+        stale = os.path.join(directory, 'dead.tmp')
+        running = os.path.join(directory, 'running.tmp')
+        for path in [stale, running]:
+            open(path, 'wb').close()
+        old = time.time() - settings.SNAPSHOT_BUILD_TIMEOUT - 1
+        os.utime(stale, (old, old))
+
+        self.assertEqual(snapshots.remove_stale_tmp(), 1)
+        self.assertFalse(os.path.exists(stale))
+        self.assertTrue(os.path.exists(running))
+
+    def test_unavailable_while_building(self):
+        """Test the first download waits for the snapshot to be built"""
+        with patch('core.snapshots.build_in_background') as build:
+            res = self.client.get(SNAPSHOT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertIn('Retry-After', res)
+        build.assert_called_once()
+
+    def test_download(self):
+        """Test the snapshot is served with its version and hash as ETag"""
+        version, digest = snapshots.build()
+
+        with patch('core.snapshots.build_in_background') as build:
+            res = self.client.get(SNAPSHOT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/gzip')
+        self.assertEqual(res['ETag'], f'"{version}-{digest}"')
+        self.assertEqual(res['X-Catalog-Version'], str(version))
+        self.assertIn('no-cache', res['Cache-Control'])
+        content = b''.join(res.streaming_content)
+        self.assertEqual(json.loads(gzip.decompress(content).split(b'\n')[0])[
+            'version'
+        ], version)
+        build.assert_not_called()
+
+    def test_stale_snapshot_rebuilt(self):
+        """Test the stale snapshot is served while a newer one is built"""
+        version, digest = snapshots.build()
+        self.food.save()
+
+        with patch('core.snapshots.build_in_background') as build:
+            res = self.client.get(SNAPSHOT_URL)
+
+        self.assertEqual(res['ETag'], f'"{version}-{digest}"')
+        build.assert_called_once()
+
+    def test_stale_rebuild_rate_limited(self):
+        """Test requests rebuild a stale snapshot once per interval"""
+        snapshots.build()
+
+        with patch('core.snapshots.build_in_background') as build:
+            self.food.save()
+            self.client.get(SNAPSHOT_URL)
+            self.food.save()
+            self.client.get(SNAPSHOT_URL)
+
+        build.assert_called_once()
+
+    @override_settings(CHANGES_SETTLE_SECONDS=5)
+    def test_version_settled(self):
+        """Test a snapshot covers only the changes that settled"""
+        old = timezone.now() - timedelta(seconds=6)
+        Change.objects.update(changed=old)
+        self.food.save()
+
+        version, _ = snapshots.build()
+
+        # the food change may still be preceded by one committing late
+        self.assertEqual(version, Change.objects.get(kind='activity').seq)
+        Change.objects.update(changed=old)
+        self.assertEqual(
+            [change.object_id for change in changes.since(version, 10)],
+            [self.food.id],
+        )
+
+    def test_not_modified(self):
+        """Test clients holding the snapshot get 304"""
+        version, digest = snapshots.build()
+
+        res = self.client.get(
+            SNAPSHOT_URL, HTTP_IF_NONE_MATCH=f'"{version}-{digest}"',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_resume(self):
+        """Test a download resumes with If-Range while the snapshot is same"""
+        version, digest = snapshots.build()
+        size = os.path.getsize(os.path.join(
+            self.media_root.name, snapshots.name(version, digest),
+        ))
+
+        res = self.client.get(
+            SNAPSHOT_URL, HTTP_RANGE='bytes=10-',
+            HTTP_IF_RANGE=f'"{version}-{digest}"',
+        )
+        self.assertEqual(res.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(res['Content-Range'], f'bytes 10-{size - 1}/{size}')
+
+        res = self.client.get(
+            SNAPSHOT_URL, HTTP_RANGE='bytes=10-', HTTP_IF_RANGE='"0"',
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_auth_required(self):
+        """Test snapshots are only served to users"""
+        res = APIClient().get(SNAPSHOT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_command_skips_current(self):
+        """Test the command builds only when the catalog changed"""
+        out = StringIO()
+        call_command('build_snapshot', stdout=out)
+        call_command('build_snapshot', stdout=out)
+
+        self.assertIn('is current', out.getvalue())
+        self.assertEqual(len(snapshots.stored()), 1)
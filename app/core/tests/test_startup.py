@@ -0,0 +1,74 @@
+"""Tests for the cold start import cost"""
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from core.management.commands import import_profile
+
+
+# generous, the import time of app.wsgi and the urls is about 0.5s
+COLD_START_BUDGET_MS = 1200
+
+# loaded on first use only; django.contrib.admin itself is an installed app
+# and always imported, only the ModelAdmin registrations are deferred
+LAZY_MODULES = [
+    'PIL.Image',
+    'core.admin',
+    'django.contrib.auth.admin',
+    'drf_spectacular.generators',
+    'drf_spectacular.views',
+]
+
+IMPORTTIME_OUTPUT = '''\
+import time: self [us] | cumulative | imported package
+import time:       100 |        100 |     django.utils
+import time:       200 |        300 |   django.http
+import time:        50 |        350 | app.wsgi
+import time:        20 |         20 | app.urls
+'''
+
+
+class ImportProfileTests(SimpleTestCase):
+    """Test profiling the imports"""
+
+    def test_parse_importtime(self):
+        """Test the nesting and times are parsed"""
+        entries = import_profile.parse_importtime(IMPORTTIME_OUTPUT)
+
+        self.assertEqual(
+            entries[0], import_profile.ImportTime('django.utils', 2, 100, 100),
+        )
+        self.assertEqual([entry.depth for entry in entries], [2, 1, 0, 0])
+        self.assertEqual(import_profile.total_us(entries), 370)
+
+    def test_command_packages(self):
+        """Test the self time is summed per package"""
+        entries = import_profile.parse_importtime(IMPORTTIME_OUTPUT)
+        out = StringIO()
+
+        with patch.object(
+            import_profile, 'profile_imports', return_value=entries,
+        ):
+            call_command('import_profile', '--packages', stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[1].split(), ['0.3', 'django'])
+        self.assertEqual(lines[2].split(), ['0.1', 'app'])
+        self.assertIn('Imported 4 modules in 0.4 ms.', lines[-1])
+
+
+class ColdStartTests(SimpleTestCase):
+    """Test the cost of booting a worker"""
+
+    def test_cold_start_budget(self):
+        """Test app admins, Pillow and schema code stay lazy, within budget"""
+        entries = import_profile.profile_imports(['app.wsgi', 'app.urls'])
+
+        imported = {entry.name for entry in entries}
+        for module in LAZY_MODULES:
+            self.assertNotIn(module, imported)
+        self.assertLess(
+            import_profile.total_us(entries) / 1000, COLD_START_BUDGET_MS,
+        )
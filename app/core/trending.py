@@ -0,0 +1,177 @@
+"""Food usage counters coalesced in memory and flushed in batches
+
+Every process counts uses in memory and writes them with a few batched
+UPDATEs at most once per TRENDING_FLUSH_INTERVAL, from a background thread,
+so a popular food is not a hot row and no request waits for the write.
+Scores decay with a half-life of TRENDING_HALF_LIFE without rewriting old
+rows: a use adds 2 ** (age of the epoch in half-lives), so every later use
+weighs more and the stored scores rank foods by their decayed score. Once
+the epoch is TRENDING_RENORMALIZE_AFTER half-lives old it is moved to the
+present and the stored scores are divided by the weight it had, before
+the weights leave the float range. The top foods are read from the score
+index after a flush and kept in the cache.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Case, F, FloatField, Value, When
+from django.utils import timezone
+
+from core import metrics
+from core.models import Food, TrendingEpoch
+
+
+logger = logging.getLogger(__name__)
+
+TOP_KEY = 'food:trending'
+BATCH_SIZE = 500
+
+_lock = threading.Lock()
+_pending = Counter()
+_flushed_at = time.monotonic()
+_flushing = False
+
+
+def epoch(lock=False):
+    """Return the time the stored scores are weighted from"""
+    queryset = TrendingEpoch.objects
+    if lock:
+        queryset = queryset.select_for_update()
+    row, _ = queryset.get_or_create(
+        pk=1, defaults={'started': settings.TRENDING_EPOCH},
+    )
+    return row.started
+
+
+def weight(now=None, started=None):
+    """Return the weight of a use at a time, doubling every half-life"""
+    age = (now or timezone.now()) - (started or epoch())
+    return 2.0 ** (age / settings.TRENDING_HALF_LIFE)
+
+
+def renormalize(started, now):
+    """Move the epoch to now, rescaling the stored scores, return it"""
+    scale = weight(now, started)
+    Food.objects.filter(trending_score__gt=0).update(
+        trending_score=F('trending_score') / scale,
+    )
+    TrendingEpoch.objects.filter(pk=1).update(started=now)
+    logger.info('Moved the trending epoch to %s', now.isoformat())
+    return now
+
+
+def record(food_id):
+    """Count a use of a food, written with the next flush"""
+    global _flushing
+
+    with _lock:
+        _pending[food_id] += 1
+        due = not _flushing and (
+            time.monotonic() - _flushed_at >= settings.TRENDING_FLUSH_INTERVAL
+        )
+        if due:
+            _flushing = True
+
+    if due:
+        threading.Thread(
+            target=flush_in_background, name='trending-flush', daemon=True,
+        ).start()
+
+
+def flush_in_background():
+    """Flush from a thread of its own, one at a time per process"""
+    global _flushing
+
+    try:
+        flush()
+    finally:
+        # the thread opened its own connection
+        connection.close()
+        with _lock:
+            _flushing = False
+
+
+def flush():
+    """Write the pending uses and refresh the top foods"""
+    global _flushed_at
+
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+        _flushed_at = time.monotonic()
+    if not pending:
+        return 0
+
+    # a stable order keeps concurrent flushes from deadlocking
+    ids = sorted(pending)
+    try:
+        with transaction.atomic():
+            # the epoch row lock keeps flushes out of a renormalization
+            now = timezone.now()
+            started = epoch(lock=True)
+            if now - started >= (
+                settings.TRENDING_HALF_LIFE *
+                settings.TRENDING_RENORMALIZE_AFTER
+            ):
+                started = renormalize(started, now)
+
+            use_weight = weight(now, started)
+            for start in range(0, len(ids), BATCH_SIZE):
+                batch = ids[start:start + BATCH_SIZE]
+                Food.objects.filter(pk__in=batch).update(
+                    trending_score=F('trending_score') + Case(
+                        *[
+                            When(pk=pk, then=Value(pending[pk] * use_weight))
+                            for pk in batch
+                        ],
+                        default=Value(0.0),
+                        output_field=FloatField(),
+                    ),
+                )
+        refresh_top()
+    except DatabaseError:
+        logger.exception('Could not flush %d food counters', len(pending))
+        # kept for the next flush
+        with _lock:
+            _pending.update(pending)
+        return 0
+
+    return len(pending)
+
+
+def refresh_top():
+    """Read the top foods from the score index into the cache"""
+    ids = list(
+        Food.objects.filter(trending_score__gt=0)
+        .order_by('-trending_score')
+        .values_list('id', flat=True)[:settings.TRENDING_SIZE]
+    )
+    cache.set(TOP_KEY, ids, timeout=None)
+    return ids
+
+
+def top_foods():
+    """Return the trending foods, most used first"""
+    ids = cache.get(TOP_KEY)
+    metrics.record_cache('trending', ids is not None)
+    if ids is None:
+        ids = refresh_top()
+
+    foods = Food.objects.in_bulk(ids)
+    return [foods[pk] for pk in ids if pk in foods]
+
+
+def reset():
+    """Drop the pending uses and the cached top foods"""
+    global _flushed_at, _flushing
+
+    with _lock:
+        _pending.clear()
+        _flushed_at = time.monotonic()
+        _flushing = False
+    cache.delete(TOP_KEY)
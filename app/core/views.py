@@ -0,0 +1,175 @@
+"""Views for the core app"""
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from django.views.decorators.http import require_safe
+
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from rest_framework import generics, permissions
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from auth.authentication import (
+    ExpiringTokenAuthentication,
+    SignedTokenAuthentication,
+)
+from core import changes, health, media, metrics, schema, snapshots
+from core.models import Recipe
+from core.serializers import CATALOG_SERIALIZERS, ChangesSerializer
+
+_docs_view = None
+
+
+def metrics_view(request):
+    """Expose the metrics in the Prometheus text format"""
+    if not metrics.is_allowed(request):
+        return HttpResponse(status=403)
+    data, content_type = metrics.render()
+    return HttpResponse(data, content_type=content_type)
+
+
+def healthz_view(request):
+    """Report the process is alive, without any I/O"""
+    return HttpResponse('ok', content_type='text/plain')
+
+
+def readyz_view(request):
+    """Report whether the databases are reachable"""
+    if health.is_ready():
+        response = HttpResponse('ok', content_type='text/plain')
+    else:
+        response = HttpResponse(
+            'database unavailable', content_type='text/plain', status=503,
+        )
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+@require_safe
+def media_view(request, path):
+    """Serve an uploaded file that is still referenced by a recipe"""
+    if not Recipe.objects.filter(image=path).exists():
+        raise Http404()
+
+    return media.serve(request, path)
+
+
+@require_safe
+def schema_view(request):
+    """Serve the precomputed OpenAPI schema as YAML or JSON"""
+    fmt = request.GET.get('format')
+    if fmt not in schema.FORMATS:
+        accept = request.headers.get('Accept', '')
+        fmt = 'json' if 'json' in accept else 'yaml'
+    document = schema.get_document(fmt)
+
+    if document.etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponse(status=304)
+    elif 'gzip' in request.headers.get('Accept-Encoding', ''):
+        response = HttpResponse(
+            document.gzipped, content_type=document.content_type,
+        )
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(
+            document.content, content_type=document.content_type,
+        )
+
+    response['ETag'] = document.etag
+    response['Cache-Control'] = 'public, max-age=300'
+    patch_vary_headers(response, ['Accept', 'Accept-Encoding'])
+
+    return response
+
+
+def docs_view(request, *args, **kwargs):
+    """Serve the Swagger UI, drf-spectacular is imported on first use"""
+    global _docs_view
+
+    if _docs_view is None:
+        from drf_spectacular.views import SpectacularSwaggerView
+
+        _docs_view = SpectacularSwaggerView.as_view(url_name='api-schema')
+    return _docs_view(request, *args, **kwargs)
+
+
+class ChangesView(generics.GenericAPIView):
+    """List the catalog changes after a sequence number"""
+    serializer_class = ChangesSerializer
+    authentication_classes = [
+        ExpiringTokenAuthentication,
+        SignedTokenAuthentication,
+    ]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        """Return a batch of changes and the sequence number to continue"""
+        try:
+            since = int(request.query_params.get('since', 0))
+            limit = int(
+                request.query_params.get('limit', settings.CHANGES_PAGE_SIZE)
+            )
+        except ValueError:
+            raise ValidationError('since and limit must be integers.')
+        if since < 0 or limit < 1:
+            raise ValidationError('since and limit must be positive.')
+        limit = min(limit, settings.CHANGES_PAGE_SIZE)
+
+        batch = changes.since(since, limit)
+        objects = changes.objects(batch)
+        context = {'request': request}
+        results = []
+        for change in batch:
+            obj = objects.get(change.kind, {}).get(change.object_id)
+            entry = {
+                'seq': change.seq,
+                'type': change.kind,
+                'id': change.object_id,
+                # objects deleted since are listed again by their tombstone
+                'deleted': change.deleted or obj is None,
+            }
+            if obj is not None:
+                entry['data'] = CATALOG_SERIALIZERS[change.kind](
+                    obj, context=context,
+                ).data
+            results.append(entry)
+
+        serializer = self.get_serializer({
+            'changes': results,
+            'next': batch[-1].seq if batch else since,
+            'more': len(batch) == limit,
+        })
+        return Response(serializer.data)
+
+
+class SnapshotView(APIView):
+    """Download the newest compressed snapshot of the catalog"""
+    authentication_classes = [
+        ExpiringTokenAuthentication,
+        SignedTokenAuthentication,
+    ]
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(responses={(200, 'application/gzip'): OpenApiTypes.BINARY})
+    def get(self, request):
+        """Return the snapshot, resumable with Range and If-Range"""
+        snapshot = snapshots.ensure_current()
+        if snapshot is None:
+            # the first snapshot is being built
+            response = HttpResponse(status=503)
+            response['Retry-After'] = '30'
+            return response
+
+        version, digest = snapshot
+        response = media.serve(
+            request, snapshots.name(version, digest),
+            etag=f'"{version}-{digest}"',
+        )
+        response['Content-Type'] = 'application/gzip'
+        response['X-Catalog-Version'] = version
+        # the url serves newer snapshots later, revalidate with the ETag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
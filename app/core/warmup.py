@@ -0,0 +1,63 @@
+"""Warm up lazily initialised parts of the app before serving traffic"""
+import logging
+
+from django.conf import settings
+from django.db import connections
+from django.urls import get_resolver, URLPattern, URLResolver
+from django.utils import translation
+
+
+logger = logging.getLogger(__name__)
+
+
+def iter_views(patterns):
+    """Yield the view classes of the url patterns"""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_views(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            view_class = getattr(pattern.callback, 'cls', None) or getattr(
+                pattern.callback, 'view_class', None,
+            )
+            if view_class is not None:
+                yield view_class
+
+
+def warm_urls():
+    """Import every view, and its serializers, and build the url lookups"""
+    resolver = get_resolver()
+    views = set(iter_views(resolver.url_patterns))
+    resolver.reverse_dict
+    for namespace in resolver.namespace_dict:
+        resolver.namespace_dict[namespace][1].reverse_dict
+
+    return views
+
+
+def warm_schema():
+    """Load and render the OpenAPI schema once"""
+    from core import schema
+
+    for fmt in schema.FORMATS:
+        schema.get_document(fmt)
+
+
+def warm_translations():
+    """Load the translation catalogs of the default language"""
+    translation.activate(settings.LANGUAGE_CODE)
+    translation.gettext('Unable to authenticate with provided credentials')
+    translation.deactivate()
+
+
+def warm_up():
+    """Warm up everything that can be shared between workers"""
+    warm_translations()
+    views = warm_urls()
+    warm_schema()
+    logger.info('Warmed up %d views', len(views))
+
+
+def warm_db():
+    """Open the database connections of the current thread"""
+    for alias in connections:
+        connections[alias].ensure_connection()
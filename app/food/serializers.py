@@ -1,10 +1,11 @@
 """Serializers for food APIs"""
 from rest_framework import serializers
 
+from core.fields import TenthsModelSerializerMixin
 from core.models import Food
 
 
-class FoodSerializer(serializers.ModelSerializer):
+class FoodSerializer(TenthsModelSerializerMixin, serializers.ModelSerializer):
     """Serializer for foods"""
 
     class Meta:
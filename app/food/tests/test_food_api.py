@@ -1,14 +1,25 @@
 """Tests for food APIs"""
+from datetime import timedelta
 from decimal import Decimal
+from unittest.mock import patch
 
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Food
+from auth.authentication import issue_access_token
+from core import trending
+from core.models import AuthToken, Food, FoodBarcode
 
 from food.serializers import (
     FoodSerializer,
@@ -17,6 +28,8 @@ from food.serializers import (
 
 
 FOODS_URL = reverse('food:food-list')
+TRENDING_URL = reverse('food:food-trending')
+ASYNC_FOODS_URL = reverse('food:async-food-list')
 
 
 def detail_url(food_id):
@@ -24,6 +37,11 @@ def detail_url(food_id):
     return reverse('food:food-detail', args=[food_id])
 
 
+def barcode_url(code):
+    """Create and return a barcode lookup URL"""
+    return reverse('food:food-barcode', args=[code])
+
+
 def create_food(user, **params):
     """Create and return a sample food"""
     defaults = {
@@ -87,6 +105,18 @@ class PrivateFoodAPITests(TestCase):
         self.assertEqual(res.data, serializer.data)
 
 
+    def test_search_foods(self):
+        """Test searching foods by the start of their title"""
+        create_food(user=self.user, title='Paine alba')
+        create_food(user=self.user, title='Lapte')
+        create_food(user=self.user, title='Branza de paine')
+
+        res = self.client.get(FOODS_URL, {'search': 'paine'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([food['title'] for food in res.data], ['Paine alba'])
+
+
     def test_get_food_detail(self):
         """Test get food detail"""
         food = create_food(user=self.user)
@@ -102,11 +132,11 @@ class PrivateFoodAPITests(TestCase):
         """Test creating food"""
         payload = {
             'title': 'Sample food title',
-            'calories': Decimal('241.2'),
-            'carbs': Decimal('36.2'),
-            'fibers': Decimal('1'),
-            'fat': Decimal('8.3'),
-            'protein': Decimal('5.6'),
+            'calories': 241.2,
+            'carbs': 36.2,
+            'fibers': 1.0,
+            'fat': 8.3,
+            'protein': 5.6,
         }
         res = self.client.post(FOODS_URL, payload)
 
@@ -119,7 +149,7 @@ class PrivateFoodAPITests(TestCase):
 
     def test_partial_update(self):
         """Test partial update of a food"""
-        original_carbs = Decimal('36.2')
+        original_carbs = 36.2
         food = create_food(
             user=self.user,
             title='Sample food title',
@@ -151,11 +181,11 @@ class PrivateFoodAPITests(TestCase):
         )
         payload = {
             'title': 'New food title',
-            'calories': Decimal('2410.2'),
-            'carbs': Decimal('360.2'),
-            'fibers': Decimal('100'),
-            'fat': Decimal('80.3'),
-            'protein': Decimal('50.6'),
+            'calories': 2410.2,
+            'carbs': 360.2,
+            'fibers': 100.0,
+            'fat': 80.3,
+            'protein': 50.6,
         }
         url = detail_url(food.id)
         res= self.client.put(url, payload)
@@ -195,3 +225,278 @@ class PrivateFoodAPITests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
         self.assertFalse(Food.objects.filter(id=food.id).exists())
+
+
+class AsyncFoodAPITests(TestCase):
+    """Test the async read-only food API"""
+
+    def setUp(self):
+        self.user = create_user(
+            email='email@example.com',
+            password='testpass123',
+        )
+        self.token = AuthToken.objects.issue(self.user)
+        self.headers = {'Authorization': f'Token {self.token.key}'}
+
+    async def test_auth_required(self):
+        """Test a valid token is required"""
+        res = await self.async_client.get(ASYNC_FOODS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_revoked_token(self):
+        """Test a token is rejected once the tokens of its user are revoked"""
+        self.user.token_generation += 1
+        await self.user.asave()
+
+        res = await self.async_client.get(ASYNC_FOODS_URL, headers=self.headers)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_list_matches_sync_view(self):
+        """Test the async list returns the same data as the sync list"""
+        await sync_to_async(create_food)(user=self.user, title='Paine')
+        await sync_to_async(create_food)(user=self.user, title='Lapte')
+
+        res = await self.async_client.get(ASYNC_FOODS_URL, headers=self.headers)
+        sync_res = await self.async_client.get(FOODS_URL, headers=self.headers)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), sync_res.json())
+        self.assertEqual(res.json()[0]['title'], 'Lapte')
+
+    async def test_detail(self):
+        """Test the async detail view returns a food or 404"""
+        food = await sync_to_async(create_food)(user=self.user)
+        url = reverse('food:async-food-detail', args=[food.id])
+
+        res = await self.async_client.get(url, headers=self.headers)
+        missing = await self.async_client.get(
+            reverse('food:async-food-detail', args=[food.id + 1]),
+            headers=self.headers,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()['carbs'], 36.2)
+        self.assertEqual(missing.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(AUTH_SIGNED_TOKENS=True)
+class SignedTokenFoodAPITests(TestCase):
+    """Test the food API with signed access tokens"""
+
+    def setUp(self):
+        self.user = create_user(
+            email='staff@example.com',
+            password='testpass123',
+            is_staff=True,
+        )
+        self.client = APIClient()
+        access = issue_access_token(self.user)[0]
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+
+    def test_staff_write_without_user_lookup(self):
+        """Test staff writes are authorised without loading the user"""
+        food = create_food(user=self.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.delete(detail_url(food.id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        user_table = get_user_model()._meta.db_table
+        for query in queries:
+            self.assertNotIn(f'FROM "{user_table}"', query['sql'])
+
+    def test_non_staff_write_forbidden(self):
+        """Test the staff flag of the token is enforced"""
+        user = create_user(email='user@example.com', password='testpass123')
+        access = issue_access_token(user)[0]
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+
+        res = self.client.post(FOODS_URL, {'title': 'Paine'})
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+@override_settings(TRENDING_FLUSH_INTERVAL=3600)
+class TrendingFoodAPITests(TestCase):
+    """Test the trending foods"""
+
+    def setUp(self):
+        trending.reset()
+        self.user = create_user(
+            email='trending@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        trending.reset()
+
+    def test_uses_coalesced(self):
+        """Test uses are written in one batch when flushed"""
+        food = create_food(user=self.user)
+        for _ in range(3):
+            self.client.get(detail_url(food.id))
+
+        food.refresh_from_db()
+        self.assertEqual(food.trending_score, 0)
+
+        now = timezone.now()
+        with CaptureQueriesContext(connection) as queries, patch(
+            'core.trending.timezone.now', return_value=now,
+        ):
+            self.assertEqual(trending.flush(), 1)
+
+        updates = [q for q in queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        food.refresh_from_db()
+        self.assertEqual(food.trending_score, 3 * trending.weight(now))
+
+    def test_trending_most_used_first(self):
+        """Test trending lists the most used foods from the cache"""
+        rare = create_food(user=self.user, title='Rare')
+        popular = create_food(user=self.user, title='Popular')
+        create_food(user=self.user, title='Unused')
+        for food_id in [rare.id, popular.id, popular.id]:
+            trending.record(food_id)
+        trending.flush()
+
+        with self.assertNumQueries(1):
+            res = self.client.get(TRENDING_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [food['title'] for food in res.data], ['Popular', 'Rare'],
+        )
+
+    def test_old_uses_decay(self):
+        """Test recent uses outweigh more uses from weeks ago"""
+        old = create_food(user=self.user, title='Old')
+        new = create_food(user=self.user, title='New')
+        now = timezone.now()
+
+        with patch('core.trending.timezone.now', return_value=now):
+            for _ in range(3):
+                trending.record(old.id)
+            trending.flush()
+        # two half-lives later a use weighs four times as much
+        with patch(
+            'core.trending.timezone.now', return_value=now + timedelta(days=14),
+        ):
+            trending.record(new.id)
+            trending.flush()
+
+        res = self.client.get(TRENDING_URL)
+
+        self.assertEqual([food['title'] for food in res.data], ['New', 'Old'])
+
+    def test_epoch_renormalized(self):
+        """Test an old epoch is moved forward and the scores rescaled"""
+        old = create_food(user=self.user, title='Old')
+        new = create_food(user=self.user, title='New')
+        start = trending.epoch()
+        trending.record(old.id)
+        trending.record(old.id)
+        with patch('core.trending.timezone.now', return_value=start):
+            trending.flush()
+
+        later = start + settings.TRENDING_HALF_LIFE * 65
+        with patch('core.trending.timezone.now', return_value=later):
+            trending.record(new.id)
+            trending.flush()
+
+        self.assertEqual(trending.epoch(), later)
+        old.refresh_from_db()
+        new.refresh_from_db()
+        self.assertEqual(new.trending_score, 1)
+        self.assertAlmostEqual(old.trending_score, 2 / 2 ** 65)
+
+    def test_save_keeps_score(self):
+        """Test saving a loaded food does not overwrite flushed uses"""
+        food = create_food(user=self.user)
+        trending.record(food.id)
+        trending.flush()
+
+        # loaded before the flush, like a serializer updating it
+        food.title = 'Renamed'
+        food.save()
+
+        food.refresh_from_db()
+        self.assertEqual(food.title, 'Renamed')
+        self.assertGreater(food.trending_score, 0)
+
+    @override_settings(TRENDING_FLUSH_INTERVAL=0)
+    @patch('core.trending.flush')
+    @patch('core.trending.threading.Thread')
+    def test_flush_in_background(self, patched_thread, patched_flush):
+        """Test a due flush runs on a thread, not in the request"""
+        food = create_food(user=self.user)
+
+        self.client.get(detail_url(food.id))
+        self.client.get(detail_url(food.id))
+
+        patched_flush.assert_not_called()
+        # a second flush is not started while one runs
+        patched_thread.assert_called_once()
+        patched_thread.return_value.start.assert_called_once_with()
+
+
+@override_settings(TRENDING_FLUSH_INTERVAL=3600)
+class BarcodeFoodAPITests(TestCase):
+    """Test looking up foods by barcode"""
+
+    def setUp(self):
+        cache.clear()
+        trending.reset()
+        self.user = create_user(
+            email='scanner@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.food = create_food(user=self.user, title='Lapte')
+        FoodBarcode.objects.create(code='05941234000013', food=self.food)
+
+    def tearDown(self):
+        trending.reset()
+
+    def test_lookup_cached(self):
+        """Test a scanned code is answered from the cache after one lookup"""
+        res = self.client.get(barcode_url('5941234000013'))
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(barcode_url('5941234000013'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['title'], 'Lapte')
+        self.assertEqual(cached.data, res.data)
+
+    def test_miss_cached(self):
+        """Test unknown codes are cached until a food gets the code"""
+        res = self.client.get(barcode_url('4006381333931'))
+        with self.assertNumQueries(0):
+            self.client.get(barcode_url('4006381333931'))
+
+        FoodBarcode.objects.create(code='04006381333931', food=self.food)
+        found = self.client.get(barcode_url('4006381333931'))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(found.status_code, status.HTTP_200_OK)
+
+    def test_food_update_invalidates(self):
+        """Test edits of a food are not hidden by the cache"""
+        self.client.get(barcode_url('5941234000013'))
+
+        self.food.title = 'Lapte batut'
+        self.food.save()
+        res = self.client.get(barcode_url('5941234000013'))
+
+        self.assertEqual(res.data['title'], 'Lapte batut')
+
+    def test_invalid_code(self):
+        """Test codes with a wrong check digit are rejected"""
+        res = self.client.get(barcode_url('5941234000018'))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -16,4 +16,14 @@ app_name = 'food'
 
 urlpatterns = [
     path('', include(router.urls)),
+    path(
+        'async/foods/',
+        views.FoodAsyncView.as_view(),
+        name='async-food-list',
+    ),
+    path(
+        'async/foods/<int:pk>/',
+        views.FoodAsyncView.as_view(),
+        name='async-food-detail',
+    ),
 ]
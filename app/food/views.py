@@ -1,31 +1,91 @@
 """Views for the food APIs"""
-from rest_framework import viewsets
-from rest_framework.authentication import TokenAuthentication
+from rest_framework import filters, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
 from auth import custom_permissions
+from auth.authentication import (
+    ExpiringTokenAuthentication,
+    SignedTokenAuthentication,
+)
+from auth.throttling import WriteThrottle
 
+from core import barcodes, recent, trending
+from core.async_views import AsyncCatalogView
+from core.batch import BatchRetrieveMixin
 from core.models import Food
 
 from food import serializers
 
 
-class FoodViewSet(viewsets.ModelViewSet):
+class FoodViewSet(BatchRetrieveMixin, viewsets.ModelViewSet):
     """View for manage food APIs"""
     serializer_class = serializers.FoodDetailSerializer
     queryset = Food.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [
+        ExpiringTokenAuthentication,
+        SignedTokenAuthentication,
+    ]
     permission_classes = [custom_permissions.UserPermission]
+    throttle_classes = [WriteThrottle]
+    throttle_scope = 'write'
+    # prefix matches use the index of migration 0020
+    filter_backends = [filters.SearchFilter]
+    search_fields = ['^title']
 
     def get_queryset(self):
         """Retrieve recipes for authenticated user"""
         return self.queryset.order_by('-id')
 
     def get_serializer_class(self):
-        if self.action == 'list':
+        if self.action in ['list', 'trending']:
             return serializers.FoodSerializer
-        return self.serializer_class
+        return super().get_serializer_class()
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve a food and count it as used"""
+        response = super().retrieve(request, *args, **kwargs)
+        trending.record(response.data['id'])
+        recent.record(request.user.pk, 'food', response.data['id'])
+        return response
+
+    @action(detail=False)
+    def trending(self, request):
+        """List the most used foods of the last days"""
+        serializer = self.get_serializer(trending.top_foods(), many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, url_path=r'barcode/(?P<code>[0-9 -]+)')
+    def barcode(self, request, code=None):
+        """Retrieve the food with a scanned EAN/UPC code"""
+        try:
+            code = barcodes.normalise(code)
+        except barcodes.InvalidBarcode as exc:
+            raise ValidationError({'code': [str(exc)]})
+
+        def load(code):
+            food = self.queryset.filter(barcodes__code=code).first()
+            if food is None:
+                return None
+            return dict(self.get_serializer(food).data)
+
+        data = barcodes.lookup(code, load)
+        if data is None:
+            raise NotFound()
+
+        trending.record(data['id'])
+        recent.record(request.user.pk, 'food', data['id'])
+        return Response(data)
 
     def perform_create(self, serializer):
         """Create new food"""
         serializer.save(user=self.request.user)
+
+
+class FoodAsyncView(AsyncCatalogView):
+    """Async list and detail view for foods"""
+    model = Food
+    serializer_class = serializers.FoodSerializer
+    detail_serializer_class = serializers.FoodDetailSerializer
@@ -1,11 +1,44 @@
 """Serializers for recipe API"""
+from django.db import transaction
+
 from rest_framework import serializers
 
+from core import images
+from core.fields import TenthsModelSerializerMixin
 from core.models import Recipe
+from core.storage import release
+
+
+class RecipeImageField(serializers.ImageField):
+    """Image field validating uploads from their header"""
+
+    def to_internal_value(self, data):
+        # skip the full Pillow verification of ImageField
+        file = serializers.FileField.to_internal_value(self, data)
+        try:
+            return images.prepare_upload(file)
+        except images.InvalidImage as exc:
+            raise serializers.ValidationError(str(exc))
+
 
+class ReleaseImageMixin:
+    """Release the stored image a recipe update replaces"""
 
-class RecipeSerializer(serializers.ModelSerializer):
+    def update(self, instance, validated_data):
+        old_image = instance.image.name
+        with transaction.atomic():
+            recipe = super().update(instance, validated_data)
+            if 'image' in validated_data:
+                release(old_image)
+
+        return recipe
+
+
+class RecipeSerializer(
+    ReleaseImageMixin, TenthsModelSerializerMixin, serializers.ModelSerializer,
+):
     """Serializer for recipes"""
+    image = RecipeImageField(required=False, allow_null=True)
 
     class Meta:
         model = Recipe
@@ -20,8 +53,10 @@ class RecipeDetailSerializer(RecipeSerializer):
         fields = RecipeSerializer.Meta.fields + ['fibers', 'time_minutes', 'description','ingredients']
 
 
-class RecipeImageSerializer(serializers.ModelSerializer):
+class RecipeImageSerializer(ReleaseImageMixin, serializers.ModelSerializer):
     """Serializer for uploading images to recipes"""
+    image = RecipeImageField()
+
     class Meta:
         model = Recipe
         fields = ['id', 'image']
@@ -12,7 +12,7 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Recipe
+from core.models import MediaFile, Recipe
 
 from recipe.serializers import (
     RecipeSerializer,
@@ -126,11 +126,11 @@ class PrivateRecipeApiTests(TestCase):
             'title': 'Sample Recipe',
             'category': 'Sample Category',
             'time_minutes': 15,
-            'calories': Decimal('680.3'),
-            'protein': Decimal('18.3'),
-            'carbs': Decimal('25.3'),
-            'fibers': Decimal('2.3'),
-            'fat': Decimal('21.3'),
+            'calories': 680.3,
+            'protein': 18.3,
+            'carbs': 25.3,
+            'fibers': 2.3,
+            'fat': 21.3,
         }
 
         # make request
@@ -208,11 +208,11 @@ class PrivateRecipeApiTests(TestCase):
             'title': 'New Sample Recipe',
             'category': 'New Sample Category',
             'time_minutes': 24,
-            'calories': Decimal('780.5'),
-            'protein': Decimal('28.4'),
-            'carbs': Decimal('45.3'),
-            'fibers': Decimal('5.1'),
-            'fat': Decimal('61.3'),
+            'calories': 780.5,
+            'protein': 28.4,
+            'carbs': 45.3,
+            'fibers': 5.1,
+            'fat': 61.3,
             'description': 'New Sample Recipe Description',
             'ingredients': 'New Sample Recipe Ingredients',
         }
@@ -328,5 +328,28 @@ class ImageUploadTests(TestCase):
         # check if result returns an error
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_upload_identical_image_deduplicated(self):
+        """Test identical uploads share one stored file"""
+        other = create_recipe(user=self.user)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
+            img = Image.new('RGB', (10, 10))
+            img.save(image_file, format='JPEG')
+            for recipe in [self.recipe, other]:
+                image_file.seek(0)
+                res = self.client.post(
+                    image_upload_url(recipe.id),
+                    {'image': image_file},
+                    format='multipart',
+                )
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
 
-
+        self.recipe.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.recipe.image.name, other.image.name)
+        media_file = MediaFile.objects.get(name=other.image.name)
+        self.assertEqual(media_file.references, 2)
+
+        # deleting a recipe releases its reference
+        other.delete()
+        media_file.refresh_from_db()
+        self.assertEqual(media_file.references, 1)
@@ -17,4 +17,14 @@ app_name = 'recipe'
 
 urlpatterns = [
     path('', include(router.urls)),
+    path(
+        'async/recipes/',
+        views.RecipeAsyncView.as_view(),
+        name='async-recipe-list',
+    ),
+    path(
+        'async/recipes/<int:pk>/',
+        views.RecipeAsyncView.as_view(),
+        name='async-recipe-detail',
+    ),
 ]
@@ -2,20 +2,32 @@
 from rest_framework import (viewsets, status)
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.authentication import TokenAuthentication
 
 from auth import custom_permissions
+from auth.authentication import (
+    ExpiringTokenAuthentication,
+    SignedTokenAuthentication,
+)
+from auth.throttling import WriteThrottle
 
+from core import recent
+from core.async_views import AsyncCatalogView
+from core.batch import BatchRetrieveMixin
 from core.models import Recipe
 from recipe import serializers
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(BatchRetrieveMixin, viewsets.ModelViewSet):
     """View for manage recipe API"""
     serializer_class = serializers.RecipeDetailSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [
+        ExpiringTokenAuthentication,
+        SignedTokenAuthentication,
+    ]
     permission_classes = [custom_permissions.UserPermission]
+    throttle_classes = [WriteThrottle]
+    throttle_scope = 'write'
 
     def get_queryset(self):
         """Retrieve recipes for authenticated user"""
@@ -28,7 +40,13 @@ class RecipeViewSet(viewsets.ModelViewSet):
         elif self.action == 'upload_image':
             return serializers.RecipeImageSerializer
 
-        return self.serializer_class
+        return super().get_serializer_class()
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve a recipe and add it to the recent list of the user"""
+        response = super().retrieve(request, *args, **kwargs)
+        recent.record(request.user.pk, 'recipe', response.data['id'])
+        return response
 
     def perform_create(self, serializer):
         """Create new recipe"""
@@ -52,3 +70,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class RecipeAsyncView(AsyncCatalogView):
+    """Async list and detail view for recipes"""
+    model = Recipe
+    serializer_class = serializers.RecipeSerializer
+    detail_serializer_class = serializers.RecipeDetailSerializer
@@ -3,12 +3,16 @@ from django.contrib.auth import (
     get_user_model,
     authenticate,
 )
+from django.utils import timezone
 from django.utils.translation import gettext as _
 
 from rest_framework import serializers
 
+from core.fields import TenthsModelSerializerMixin, TenthsSerializerField
+from core.models import AuthToken
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(TenthsModelSerializerMixin, serializers.ModelSerializer):
     """Serializer for the user object"""
 
     class Meta:
@@ -40,6 +44,8 @@ class UserSerializer(serializers.ModelSerializer):
         # update password the user changes it
         if password:
             user.set_password(password)
+            # revoke the signed tokens issued with the old password
+            user.token_generation += 1
             user.save()
 
         return user
@@ -52,6 +58,13 @@ class AuthTokenSerializer(serializers.Serializer):
         style={'input_style': 'password'},
         trim_whitespace=False,
     )
+    # every device of a user gets its own token
+    device = serializers.CharField(
+        max_length=64,
+        required=False,
+        allow_blank=True,
+        default='',
+    )
 
     def validate(self, attrs):
         """Validate and authenticate user"""
@@ -76,3 +89,71 @@ class AuthTokenSerializer(serializers.Serializer):
         # set user attribute to use user in the view
         attrs['user'] = user
         return attrs
+
+
+class RefreshTokenSerializer(serializers.Serializer):
+    """Serializer to exchange a refresh token for an access token"""
+    refresh = serializers.CharField()
+
+    def validate(self, attrs):
+        """Validate the refresh token is current"""
+        try:
+            token = AuthToken.objects.select_related('user').get(
+                key=attrs['refresh'],
+            )
+        except AuthToken.DoesNotExist:
+            token = None
+
+        if (
+            token is None or
+            token.expires <= timezone.now() or
+            not token.user.is_active or
+            token.generation != token.user.token_generation
+        ):
+            msg = _('Invalid or expired refresh token')
+            raise serializers.ValidationError(msg, code='authorization')
+
+        attrs['user'] = token.user
+        return attrs
+
+
+class RecentItemSerializer(serializers.Serializer):
+    """Serializer for a recently used food or recipe"""
+    type = serializers.ChoiceField(choices=['food', 'recipe'])
+    id = serializers.IntegerField()
+    title = serializers.CharField()
+    calories = TenthsSerializerField()
+    uses = serializers.IntegerField()
+
+
+class RecentListsSerializer(serializers.Serializer):
+    """Serializer for the quick add lists of a user"""
+    recent = RecentItemSerializer(many=True)
+    frequent = RecentItemSerializer(many=True)
+
+
+class EnergyTargetsSerializer(serializers.Serializer):
+    """Serializer for the daily targets of a user, None when unknown"""
+    bmr = serializers.FloatField(allow_null=True)
+    tdee = serializers.FloatField(allow_null=True)
+    calories = serializers.FloatField(allow_null=True)
+    protein = serializers.FloatField(allow_null=True)
+    carbs = serializers.FloatField(allow_null=True)
+    fat = serializers.FloatField(allow_null=True)
+
+
+class ActivitySuggestionSerializer(serializers.Serializer):
+    """Serializer for a suggested activity"""
+    id = serializers.IntegerField()
+    title = serializers.CharField()
+    met = TenthsSerializerField()
+    # burned by the user in 30 minutes, None until the weight is known
+    calories = serializers.FloatField(allow_null=True)
+
+
+class DashboardSerializer(serializers.Serializer):
+    """Serializer for the home screen of a user"""
+    profile = UserSerializer()
+    targets = EnergyTargetsSerializer()
+    recent = RecentItemSerializer(many=True)
+    suggestions = ActivitySuggestionSerializer(many=True)
@@ -1,15 +1,29 @@
 """Tests for the user API"""
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from django.utils import timezone
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from auth.authentication import issue_access_token
+from core import recent
+from core.models import Activity, AuthToken, Food, Recipe, RecentList
+
 
 CREATE_USER_URL = reverse('user:create')
 TOKEN_URL = reverse('user:token')
+REFRESH_URL = reverse('user:token-refresh')
 ME_URL = reverse('user:me')
+ASYNC_ME_URL = reverse('user:async-me')
+RECENT_URL = reverse('user:recent')
+DASHBOARD_URL = reverse('dashboard')
 
 
 def create_user(**params):
@@ -204,3 +218,512 @@ class PrivateUserApiTests(TestCase):
         self.assertEqual(self.user.name, payload['name'])
         self.assertTrue(self.user.check_password(payload['password']))
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class AsyncUserApiTests(TestCase):
+    """Test the async profile endpoint"""
+
+    def setUp(self):
+        self.user = create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='test.name',
+        )
+        self.token = AuthToken.objects.issue(self.user)
+
+    async def test_retrieve_profile(self):
+        """Test the async profile matches the sync profile"""
+        headers = {'Authorization': f'Token {self.token.key}'}
+
+        res = await self.async_client.get(ASYNC_ME_URL, headers=headers)
+        sync_res = await self.async_client.get(ME_URL, headers=headers)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), sync_res.json())
+
+    async def test_invalid_token(self):
+        """Test an unknown token is rejected"""
+        headers = {'Authorization': 'Token not-a-token'}
+
+        res = await self.async_client.get(ASYNC_ME_URL, headers=headers)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_revoked_token(self):
+        """Test a token issued before the tokens were revoked is rejected"""
+        self.user.token_generation += 1
+        await self.user.asave()
+        headers = {'Authorization': f'Token {self.token.key}'}
+
+        res = await self.async_client.get(ASYNC_ME_URL, headers=headers)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(RATE_LIMITS={
+    'login': {'ip': '10/min', 'email': '2/min'},
+    'signup': {'ip': '2/hour'},
+    'write': {'token': '2/min'},
+})
+class RateLimitTests(TestCase):
+    """Test rate limits of the user API"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        create_user(email='test@example.com', password='testpass123')
+
+    def tearDown(self):
+        cache.clear()
+
+    def login(self, email='test@example.com', **extra):
+        """Post a login attempt"""
+        return self.client.post(TOKEN_URL, {
+            'email': email,
+            'password': 'wrong-password',
+        }, **extra)
+
+    @patch('auth.throttling.SlidingWindowThrottle.timer', return_value=960.0)
+    def test_login_limited_by_email(self, patched_timer):
+        """Test logins for one email are limited and report Retry-After"""
+        self.login()
+        self.login()
+        res = self.login()
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res['Retry-After'], '60')
+
+        # other emails from the same IP are still allowed
+        res = self.login(email='other@example.com')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch('auth.throttling.SlidingWindowThrottle.timer')
+    def test_window_slides(self, patched_timer):
+        """Test the previous window weighs less as time passes"""
+        patched_timer.return_value = 960.0
+        self.login()
+        self.login()
+
+        # the previous window still fully counts at the start of the next
+        patched_timer.return_value = 1020.0
+        self.assertEqual(
+            self.login().status_code, status.HTTP_429_TOO_MANY_REQUESTS,
+        )
+
+        # half way through only half of it counts
+        patched_timer.return_value = 1050.0
+        self.assertEqual(self.login().status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch('auth.throttling.SlidingWindowThrottle.timer', return_value=960.0)
+    def test_rejected_logins_not_counted(self, patched_timer):
+        """Test requests turned away do not extend the limit"""
+        for _ in range(5):
+            self.login()
+
+        key = 'throttle:login:email:test@example.com:16'
+        self.assertEqual(cache.get(key), 2)
+
+    def test_non_string_email_limited_by_ip(self):
+        """Test a malformed email is limited like its client"""
+        for _ in range(3):
+            res = self.client.post(
+                TOKEN_URL, {'email': 123, 'password': 'x'}, format='json',
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_forwarded_for_not_trusted(self):
+        """Test a spoofed X-Forwarded-For does not reset the limit"""
+        for i in range(3):
+            res = self.client.post(CREATE_USER_URL, {
+                'email': f'spoof{i}@example.com',
+                'password': 'testpass123',
+                'name': 'new',
+            }, HTTP_X_FORWARDED_FOR=f'10.0.0.{i}')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_signup_limited_by_ip(self):
+        """Test signups are limited per client IP"""
+        for i in range(2):
+            self.client.post(CREATE_USER_URL, {
+                'email': f'new{i}@example.com',
+                'password': 'testpass123',
+                'name': 'new',
+            })
+
+        res = self.client.post(CREATE_USER_URL, {
+            'email': 'new3@example.com',
+            'password': 'testpass123',
+            'name': 'new',
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', res)
+
+    def test_writes_limited_by_token(self):
+        """Test profile writes are limited per token but reads are not"""
+        user = get_user_model().objects.get(email='test@example.com')
+        token = AuthToken.objects.issue(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        for _ in range(3):
+            self.assertEqual(
+                self.client.get(ME_URL).status_code, status.HTTP_200_OK,
+            )
+        self.client.patch(ME_URL, {'fullname': 'One'})
+        self.client.patch(ME_URL, {'fullname': 'Two'})
+        res = self.client.patch(ME_URL, {'fullname': 'Three'})
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+
+class ExpiringTokenTests(TestCase):
+    """Test issuing and using expiring tokens"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = create_user(
+            email='token@example.com',
+            password='testpass123',
+        )
+
+    def login(self, **params):
+        """Log in and return the response"""
+        payload = {'email': 'token@example.com', 'password': 'testpass123'}
+        payload.update(params)
+        return self.client.post(TOKEN_URL, payload)
+
+    def test_token_per_device(self):
+        """Test each device gets its own token and logins replace it"""
+        phone = self.login(device='phone').data['token']
+        tablet = self.login(device='tablet').data['token']
+        new_phone = self.login(device='phone').data['token']
+
+        keys = set(AuthToken.objects.filter(
+            user=self.user,
+        ).values_list('key', flat=True))
+        self.assertEqual(keys, {tablet, new_phone})
+        self.assertNotEqual(phone, new_phone)
+
+    def test_token_expiry_returned(self):
+        """Test the token response includes its expiry"""
+        res = self.login()
+
+        token = AuthToken.objects.get(key=res.data['token'])
+        self.assertEqual(res.data['expires'], token.expires)
+
+    def test_expired_token_rejected(self):
+        """Test an expired token cannot authenticate"""
+        token = AuthToken.objects.issue(self.user)
+        token.expires = timezone.now() - timedelta(seconds=1)
+        token.save()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_stale_generation_rejected(self):
+        """Test a token issued before the tokens were revoked is rejected"""
+        token = AuthToken.objects.issue(self.user)
+        self.user.token_generation += 1
+        self.user.save()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_issue_locks_user(self):
+        """Test issuing a token runs in a transaction locking the user"""
+        with patch.object(
+            get_user_model().objects, 'select_for_update',
+            wraps=get_user_model().objects.select_for_update,
+        ) as patched_lock:
+            AuthToken.objects.issue(self.user, device='phone')
+
+        patched_lock.assert_called_once_with()
+        self.assertEqual(AuthToken.objects.filter(user=self.user).count(), 1)
+
+    def test_sliding_renewal(self):
+        """Test a token is extended once most of its lifetime passed"""
+        token = AuthToken.objects.issue(self.user)
+        fresh_expiry = token.expires
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        self.client.get(ME_URL)
+        token.refresh_from_db()
+        self.assertEqual(token.expires, fresh_expiry)
+
+        token.expires = timezone.now() + timedelta(days=1)
+        token.save()
+        self.client.get(ME_URL)
+        token.refresh_from_db()
+        self.assertGreater(token.expires, fresh_expiry)
+
+
+@override_settings(AUTH_SIGNED_TOKENS=True)
+class SignedTokenTests(TestCase):
+    """Test signed access tokens and their refresh tokens"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = create_user(
+            email='signed@example.com',
+            password='testpass123',
+        )
+
+    def login(self):
+        """Log in and return the response data"""
+        payload = {'email': 'signed@example.com', 'password': 'testpass123'}
+        return self.client.post(TOKEN_URL, payload).data
+
+    def test_login_returns_access_token(self):
+        """Test the login response carries an access token"""
+        data = self.login()
+
+        self.assertIn('access', data)
+        self.assertIn('access_expires', data)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {data["access"]}')
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_tampered_access_token_rejected(self):
+        """Test an access token with a bad signature is rejected"""
+        access = self.login()['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}x')
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_expired_access_token_rejected(self):
+        """Test an access token past its lifetime is rejected"""
+        access = self.login()['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+
+        with override_settings(AUTH_ACCESS_TOKEN_TTL=timedelta(seconds=-1)):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_token(self):
+        """Test a refresh token is exchanged for a new access token"""
+        data = self.login()
+
+        res = self.client.post(REFRESH_URL, {'refresh': data['token']})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('access', res.data)
+
+    def test_password_change_revokes_tokens(self):
+        """Test changing the password revokes refresh and access tokens"""
+        data = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {data["access"]}')
+        self.client.patch(ME_URL, {'password': 'newpass123'})
+
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        res = self.client.post(REFRESH_URL, {'refresh': data['token']})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_async_access_token(self):
+        """Test the async views accept access tokens"""
+        user = await get_user_model().objects.aget(pk=self.user.pk)
+        access = issue_access_token(user)[0]
+
+        res = await self.async_client.get(
+            ASYNC_ME_URL, headers={'Authorization': f'Bearer {access}'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(AUTH_SIGNED_TOKENS=False)
+    def test_disabled(self):
+        """Test no access tokens are issued unless enabled"""
+        data = self.login()
+
+        self.assertNotIn('access', data)
+        res = self.client.post(REFRESH_URL, {'refresh': data['token']})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(RECENT_SAVE_EVERY=3, TRENDING_FLUSH_INTERVAL=3600)
+class RecentListTests(TestCase):
+    """Test the recent and frequent quick add lists"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user(
+            email='recent@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        macros = {
+            'calories': Decimal('100'),
+            'carbs': Decimal('10'),
+            'fibers': Decimal('1'),
+            'fat': Decimal('5'),
+            'protein': Decimal('8'),
+        }
+        self.apple = Food.objects.create(user=self.user, title='Apple', **macros)
+        self.bread = Food.objects.create(user=self.user, title='Bread', **macros)
+        self.soup = Recipe.objects.create(
+            user=self.user, title='Soup', category='Lunch', time_minutes=30,
+            **macros,
+        )
+
+    def use(self, *objs):
+        """Retrieve foods and recipes like the app does to log them"""
+        for obj in objs:
+            kind = 'food' if isinstance(obj, Food) else 'recipe'
+            self.client.get(reverse(f'{kind}:{kind}-detail', args=[obj.id]))
+
+    def test_recent_and_frequent(self):
+        """Test the lists are ordered by recency and by uses"""
+        self.use(self.apple, self.apple, self.soup, self.bread)
+
+        with self.assertNumQueries(2):
+            res = self.client.get(RECENT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['title'] for item in res.data['recent']],
+            ['Bread', 'Soup', 'Apple'],
+        )
+        self.assertEqual(res.data['frequent'][0], {
+            'type': 'food',
+            'id': self.apple.id,
+            'title': 'Apple',
+            'calories': 100.0,
+            'uses': 2,
+        })
+        self.assertEqual(res.data['recent'][1]['type'], 'recipe')
+
+    def test_saved_lazily(self):
+        """Test the list is saved every few uses and survives the cache"""
+        self.use(self.apple, self.bread)
+        self.assertFalse(RecentList.objects.exists())
+
+        self.use(self.soup)
+        cache.clear()
+        res = self.client.get(RECENT_URL)
+
+        self.assertEqual(
+            [item['title'] for item in res.data['recent']],
+            ['Soup', 'Bread', 'Apple'],
+        )
+
+    @override_settings(RECENT_SIZE=4)
+    def test_bounded_keeps_frequent(self):
+        """Test the least used of the oldest entries are evicted first"""
+        self.use(self.apple, self.apple, self.apple)
+        for title in ['A', 'B', 'C', 'D']:
+            recent.record(self.user.id, 'food', Food.objects.create(
+                user=self.user, title=title, calories=1, carbs=1, fibers=1,
+                fat=1, protein=1,
+            ).id)
+
+        items = recent.load(self.user.id)['items']
+
+        self.assertEqual(len(items), 4)
+        self.assertIn(['food', self.apple.id, 3], items)
+
+    def test_deleted_objects_skipped(self):
+        """Test deleted foods drop out of the lists"""
+        self.use(self.apple, self.bread)
+        self.bread.delete()
+
+        res = self.client.get(RECENT_URL)
+
+        self.assertEqual(
+            [item['title'] for item in res.data['recent']], ['Apple'],
+        )
+
+
+class DashboardTests(TestCase):
+    """Test the home screen dashboard"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user(
+            email='home@example.com',
+            password='testpass123',
+            weight=Decimal('70'),
+            height=Decimal('175'),
+            gender=1,
+            activity_factor=3,
+            dob=timezone.localdate() - timedelta(days=30 * 366),
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_dashboard(self):
+        """Test the profile, targets, recent items and suggestions"""
+        food = Food.objects.create(
+            user=self.user, title='Apple', calories=52, carbs=14, fibers=2.4,
+            fat=0.2, protein=0.3,
+        )
+        self.client.get(reverse('food:food-detail', args=[food.id]))
+        for title, met in [('Yoga', 2.5), ('Mers', 3.5), ('Alergare', 9.8)]:
+            Activity.objects.create(user=self.user, title=title, met=met)
+
+        res = self.client.get(DASHBOARD_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['profile']['email'], self.user.email)
+        self.assertEqual(res.data['targets']['bmr'], 1648.8)
+        self.assertEqual(res.data['targets']['calories'], 2555.6)
+        self.assertEqual(
+            [item['title'] for item in res.data['recent']], ['Apple'],
+        )
+        self.assertEqual(
+            [(a['title'], a['calories']) for a in res.data['suggestions']],
+            [('Mers', 122.5), ('Alergare', 343.0)],
+        )
+
+    def test_calorie_goal_wins(self):
+        """Test the calorie goal of the user is the calorie target"""
+        self.user.calorie_goal = 2000
+        self.user.save()
+
+        res = self.client.get(DASHBOARD_URL)
+
+        self.assertEqual(res.data['targets']['calories'], 2000.0)
+        self.assertEqual(res.data['targets']['protein'], 100.0)
+
+    def test_unknown_measurements(self):
+        """Test the estimates are empty until weight and height are set"""
+        user = create_user(email='new@example.com', password='testpass123')
+        self.client.force_authenticate(user)
+
+        res = self.client.get(DASHBOARD_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsNone(res.data['targets']['tdee'])
+        self.assertIsNone(res.data['targets']['protein'])
+
+    def test_signed_token_authenticates_once(self):
+        """Test a signed access token loads the user for the profile"""
+        access, _ = issue_access_token(self.user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+
+        with override_settings(AUTH_SIGNED_TOKENS=True):
+            res = client.get(DASHBOARD_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['profile']['name'], self.user.name)
+
+    def test_auth_required(self):
+        """Test the dashboard requires authentication"""
+        res = APIClient().get(DASHBOARD_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
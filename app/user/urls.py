@@ -9,5 +9,12 @@ app_name = 'user'
 urlpatterns = [
     path('create/', views.CreateUserView.as_view(), name='create'),
     path('token/', views.CreateTokenView.as_view(), name='token'),
+    path(
+        'token/refresh/',
+        views.RefreshTokenView.as_view(),
+        name='token-refresh',
+    ),
     path('me/', views.ManageUserView.as_view(), name='me'),
+    path('me/recent/', views.RecentView.as_view(), name='recent'),
+    path('async/me/', views.AsyncManageUserView.as_view(), name='async-me'),
 ]
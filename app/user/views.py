@@ -1,20 +1,63 @@
 """Views for the user API"""
-from rest_framework import generics, authentication, permissions
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.views import View
+
+from rest_framework import generics, permissions
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
 
+from auth.async_authentication import authenticate
+from auth.authentication import (
+    ExpiringTokenAuthentication,
+    SignedTokenAuthentication,
+    check_generation,
+    issue_access_token,
+)
+from auth.throttling import SlidingWindowThrottle, WriteThrottle
+from core import dashboard, recent
+from core.async_views import json_response, unauthorized
+from core.models import AuthToken
 from user.serializers import (
     UserSerializer,
     AuthTokenSerializer,
+    DashboardSerializer,
+    RecentListsSerializer,
+    RefreshTokenSerializer,
 )
 
 
+def load_user(request):
+    """Return the authenticated user with all of its fields"""
+    user = request.user
+    # signed tokens only carry a few fields of the user
+    if user.get_deferred_fields():
+        user = generics.get_object_or_404(
+            get_user_model(), pk=user.pk, is_active=True,
+        )
+        check_generation(user, request.auth)
+
+    return user
+
+
+def access_token_data(user):
+    """Return the response fields of a new signed access token"""
+    access, expires = issue_access_token(user)
+    return {'access': access, 'access_expires': expires}
+
+
 class CreateUserView(generics.CreateAPIView):
     """Create a new user in system"""
 
     # override default serializer
     serializer_class = UserSerializer
 
+    # limit signups per client
+    throttle_classes = [SlidingWindowThrottle]
+    throttle_scope = 'signup'
+
 
 class CreateTokenView(ObtainAuthToken):
     """Create a new auth token for user"""
@@ -23,6 +66,46 @@ class CreateTokenView(ObtainAuthToken):
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
 
+    # limit login attempts before any password is hashed
+    throttle_classes = [SlidingWindowThrottle]
+    throttle_scope = 'login'
+
+    def post(self, request, *args, **kwargs):
+        """Issue a new expiring token for the user device"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        token = AuthToken.objects.issue(
+            serializer.validated_data['user'],
+            device=serializer.validated_data['device'],
+        )
+
+        data = {'token': token.key, 'expires': token.expires}
+        # the auth token doubles as the refresh token of the access token
+        if settings.AUTH_SIGNED_TOKENS:
+            data.update(access_token_data(token.user))
+
+        return Response(data)
+
+
+class RefreshTokenView(generics.GenericAPIView):
+    """Issue a new signed access token for a refresh token"""
+    serializer_class = RefreshTokenSerializer
+    authentication_classes = []
+    permission_classes = []
+
+    throttle_classes = [SlidingWindowThrottle]
+    throttle_scope = 'refresh'
+
+    def post(self, request, *args, **kwargs):
+        """Return a new access token"""
+        if not settings.AUTH_SIGNED_TOKENS:
+            raise NotFound()
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        return Response(access_token_data(serializer.validated_data['user']))
+
 
 class ManageUserView(generics.RetrieveUpdateDestroyAPIView):
     """Manage authenticated users"""
@@ -31,12 +114,93 @@ class ManageUserView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = UserSerializer
 
     # set token authentication
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [
+        ExpiringTokenAuthentication,
+        SignedTokenAuthentication,
+    ]
 
     # user must be authenticated to use this API
     permission_classes = [permissions.IsAuthenticated]
 
+    throttle_classes = [WriteThrottle]
+    throttle_scope = 'write'
+
     # override get_object
     def get_object(self):
         """Retrieve and return the authenticated user"""
-        return self.request.user
+        return load_user(self.request)
+
+
+class RecentView(generics.GenericAPIView):
+    """List the foods and recipes the user used recently and often"""
+    serializer_class = RecentListsSerializer
+    authentication_classes = [
+        ExpiringTokenAuthentication,
+        SignedTokenAuthentication,
+    ]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        """Return the recent and the frequent lists"""
+        recent_items, frequent_items = recent.lists(request.user.pk)
+        serializer = self.get_serializer({
+            'recent': recent.entries(recent_items),
+            'frequent': recent.entries(frequent_items),
+        })
+        return Response(serializer.data)
+
+
+class DashboardView(generics.GenericAPIView):
+    """Everything the home screen shows in one response"""
+    serializer_class = DashboardSerializer
+    authentication_classes = [
+        ExpiringTokenAuthentication,
+        SignedTokenAuthentication,
+    ]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        """Return the profile, targets, recent items and suggestions"""
+        user_id = request.user.pk
+        parts = dashboard.gather({
+            'profile': lambda: load_user(request),
+            'recent': lambda: recent.lists(user_id)[0],
+            'suggestions': dashboard.suggestions,
+        })
+
+        user = parts['profile']
+        serializer = self.get_serializer({
+            'profile': user,
+            'targets': dashboard.energy_targets(user),
+            'recent': recent.entries(parts['recent']),
+            'suggestions': [
+                {
+                    'id': activity.id,
+                    'title': activity.title,
+                    'met': activity.met,
+                    'calories': dashboard.burned(activity, user.weight),
+                }
+                for activity in parts['suggestions']
+            ],
+        })
+        return Response(serializer.data)
+
+
+class AsyncManageUserView(View):
+    """Retrieve the authenticated user without pinning a thread"""
+
+    async def get(self, request):
+        """Return the authenticated user"""
+        user = await authenticate(request)
+        if user is None:
+            return unauthorized()
+
+        if user.get_deferred_fields():
+            user = await get_user_model().objects.filter(
+                pk=user.pk, is_active=True,
+                token_generation=user.token_generation,
+            ).afirst()
+            if user is None:
+                return unauthorized()
+
+        return json_response(UserSerializer(user).data)